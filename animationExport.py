@@ -0,0 +1,268 @@
+"""Export move sequences as animations, streamed one frame at a time.
+
+frames() plays moves through a RubiksCube's own animation model,
+advancing update_animation() by exactly one frame interval per frame, and
+yields the headless render of each frame. Moves are pulled from their
+iterable a few at a time and the history is trimmed as it grows, so memory
+stays flat for sequences of any length, including move files read in
+chunks.
+
+Frames go to numbered PNGs or an uncompressed YUV4MPEG2 (.y4m) stream,
+both written with the standard library. Any other extension is piped raw
+to ffmpeg. export_recordings() runs many exports at once in worker
+processes.
+
+    python animationExport.py solves/ --size 3 --scramble 25 --solve --count 8
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+import numpy as np
+
+from jazzCube import RubiksCube, get_move_tables
+from moveLog import read_move_file
+from scrambleGenerator import ScrambleGenerator
+
+# Moves kept queued ahead of the animation, so turns of parallel slices can
+# still join one step; the cube size is used when it is larger
+LOOKAHEAD = 4
+
+# Committed moves kept in the recording cube's history before it is cleared
+HISTORY_LIMIT = 4096
+
+# Full-range RGB to BT.601 studio-swing YCbCr, for .y4m output
+YCBCR_MATRIX = np.array([[65.481, 128.553, 24.966],
+                         [-37.797, -74.203, 112.0],
+                         [112.0, -93.786, -18.214]]) / 255
+YCBCR_OFFSET = np.array([16.0, 128.0, 128.0])
+
+
+def frames(cube, moves, fps=30, width=480, height=480, hold=0.5):
+    """Yield (height, width, 3) frames of cube playing moves, holding still for hold seconds at each end"""
+    moves = iter(moves)
+    held = round(hold * fps)
+    for _ in range(held):
+        yield cube.render_image(width, height)
+
+    # Frame time is simulated, so renders never fall behind
+    now = 0.0
+    cube.last_update = None
+    lookahead = max(LOOKAHEAD, cube.size)
+    while True:
+        while len(cube.move_queue) < lookahead:
+            move = next(moves, None)
+            if move is None:
+                break
+            cube.queue_moves([move])
+        if not cube.move_queue and not cube.is_animating:
+            break
+        cube.update_animation(now)
+        if len(cube.move_history) >= HISTORY_LIMIT:
+            cube.move_history.clear()
+        yield cube.render_image(width, height)
+        now += 1.0 / fps
+
+    for _ in range(held):
+        yield cube.render_image(width, height)
+
+
+def file_moves(path, size):
+    """Moves of a binary move file, decoded chunk by chunk"""
+    file_size, chunks = read_move_file(path)
+    if file_size != size:
+        chunks.close()
+        raise ValueError(f"Move file is for a {file_size}x{file_size}x{file_size} cube, not {size}x{size}x{size}")
+    return decoded_moves(chunks, get_move_tables(size))
+
+
+def decoded_moves(chunks, tables):
+    """(face, layer, clockwise) moves of a stream of code chunks"""
+    decode = tables.decode_move
+    for chunk in chunks:
+        for code in chunk.tolist():
+            yield decode(code)
+
+
+def encode_png(image, level=6):
+    """PNG file bytes of an (height, width, 3) uint8 image"""
+    height, width, _ = image.shape
+    # Each scanline starts with filter type 0 (none)
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)], axis=1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows.tobytes(), level))
+            + chunk(b'IEND', b''))
+
+
+def write_pngs(frames, directory, prefix='frame'):
+    """Write frames as directory/prefix_000000.png, ...; returns the frame count"""
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for count, image in enumerate(frames, 1):
+        with open(os.path.join(directory, f"{prefix}_{count - 1:06d}.png"), 'wb') as file:
+            file.write(encode_png(image))
+    return count
+
+
+def write_y4m(frames, path, fps=30):
+    """Write frames as an uncompressed 4:4:4 YUV4MPEG2 stream; returns the frame count"""
+    rate = Fraction(fps).limit_denominator(1001)
+    count = 0
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as file:
+        for image in frames:
+            if not count:
+                height, width, _ = image.shape
+                file.write(f"YUV4MPEG2 W{width} H{height} F{rate.numerator}:{rate.denominator} "
+                           f"Ip A1:1 C444\n".encode())
+            planes = image.reshape(-1, 3) @ YCBCR_MATRIX.T + YCBCR_OFFSET
+            file.write(b'FRAME\n')
+            file.write(planes.T.round().clip(0, 255).astype(np.uint8).tobytes())
+            count += 1
+    return count
+
+
+def write_ffmpeg(frames, path, fps=30):
+    """Pipe raw frames to ffmpeg, which picks the format from path; returns the frame count"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError(f"Writing {path} needs ffmpeg on PATH; .y4m and PNG output work without it")
+    process = None
+    count = 0
+    try:
+        for image in frames:
+            if process is None:
+                height, width, _ = image.shape
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                process = subprocess.Popen(
+                    [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                     '-s', f"{width}x{height}", '-r', str(fps), '-i', '-',
+                     '-pix_fmt', 'yuv420p', path],
+                    stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            process.stdin.write(np.ascontiguousarray(image).tobytes())
+            count += 1
+    except BrokenPipeError:
+        pass
+    if process is not None:
+        process.stdin.close()
+        error = process.stderr.read().decode(errors='replace')
+        if process.wait():
+            raise RuntimeError(f"ffmpeg failed writing {path}: {error.strip()}")
+    return count
+
+
+def write_frames(frames, output, fps=30):
+    """Stream frames to output: a .y4m file, another video file via ffmpeg, or a PNG directory"""
+    extension = os.path.splitext(output)[1].lower()
+    if not extension:
+        return write_pngs(frames, output)
+    if extension == '.y4m':
+        return write_y4m(frames, output, fps)
+    return write_ffmpeg(frames, output, fps)
+
+
+def export_recording(output, size=3, moves=(), scramble=None, seed=None, solve=False,
+                     move_file=None, fps=30, width=480, height=480, move_duration=0.3, hold=0.5):
+    """Record a cube playing moves and stream it to output.
+
+    scramble adds that many random moves (reproducible with seed) in front
+    of moves. With solve, the scramble is applied unseen and the recording
+    shows the solver's solution instead. move_file streams the moves of a
+    binary move file after everything else.
+    """
+    cube = RubiksCube(size)
+    cube.move_duration = move_duration
+    cube.max_queue_time = float('inf')  # Play every move at full length
+
+    sequence = list(moves)
+    if scramble is not None:
+        sequence = ScrambleGenerator(size, seed).moves(scramble) + sequence
+    if solve:
+        from cubeSolver import solve as solve_cube, tables_ready
+        if not tables_ready():
+            raise ValueError("Solver tables have not been generated yet")
+        cube.apply_moves(sequence)
+        sequence = solve_cube(cube)
+
+    played = [0]
+
+    def counted(moves):
+        for move in moves:
+            played[0] += 1
+            yield move
+
+    def all_moves():
+        yield from sequence
+        if move_file is not None:
+            yield from file_moves(move_file, size)
+
+    count = write_frames(frames(cube, counted(all_moves()), fps, width, height, hold), output, fps)
+    return {'output': output, 'frames': count, 'moves': played[0]}
+
+
+def export_job(job):
+    """Worker task: export_recording() for a dict of its arguments"""
+    return export_recording(**job)
+
+
+def export_recordings(jobs, workers=None):
+    """Run export_recording() for each argument dict in parallel; results come back in job order"""
+    jobs = list(jobs)
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        return [export_job(job) for job in jobs]
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(export_job, jobs))
+
+
+def numbered(output, index):
+    """output with index added before its extension, or as a subdirectory"""
+    stem, extension = os.path.splitext(output)
+    if not extension:
+        return os.path.join(output, f"recording_{index:03d}")
+    return f"{stem}_{index:03d}{extension}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export cube animations as PNG frames or video")
+    parser.add_argument('output', help="PNG directory, .y4m file, or any video file ffmpeg can write")
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--scramble', type=int, help="random moves to play, or to solve with --solve")
+    parser.add_argument('--seed', type=int, help="seed of the first scramble; later recordings count up")
+    parser.add_argument('--solve', action='store_true', help="record the solution of the scramble")
+    parser.add_argument('--moves', help="binary move file to play")
+    parser.add_argument('--count', type=int, default=1, help="number of recordings")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--width', type=int, default=480)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--move-duration', type=float, default=0.3, help="seconds per quarter turn")
+    parser.add_argument('--hold', type=float, default=0.5, help="seconds to hold still at each end")
+    args = parser.parse_args(argv)
+    if args.scramble is None and args.moves is None:
+        parser.error("nothing to record: give --scramble and/or --moves")
+
+    jobs = []
+    for index in range(args.count):
+        seed = None if args.seed is None else args.seed + index
+        output = args.output if args.count == 1 else numbered(args.output, index)
+        jobs.append({'output': output, 'size': args.size, 'scramble': args.scramble, 'seed': seed,
+                     'solve': args.solve, 'move_file': args.moves, 'fps': args.fps,
+                     'width': args.width, 'height': args.height,
+                     'move_duration': args.move_duration, 'hold': args.hold})
+    for result in export_recordings(jobs, args.workers):
+        print(f"{result['output']}: {result['frames']} frames, {result['moves']} moves")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Benchmarks for move application, rendering, solving and startup.
+
+Run `python benchmarks.py` for the default sizes, or pick them with
+--sizes 2-15,20,50. Results are printed or written (--output) as JSON, and
+--compare flags every metric that got worse than an earlier run by more than
+--tolerance. Frames are drawn with the NumPy renderer, so no window is
+needed; --gl also times CubeRenderer in an EGL context. Importing the engine
+must stay within ENGINE_IMPORT_TARGET_S of importing NumPy and must not load
+any GUI package; a missed budget fails the run like a regression.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = list(range(2, 16)) + [20, 50, 100]
+
+# Metrics where a larger value is an improvement; every other number is a cost
+HIGHER_IS_BETTER = ('moves_per_s',)
+
+# Startup budget: seconds the engine may add to NumPy's own import in a fresh
+# interpreter, and GUI packages that importing it must not load
+ENGINE_IMPORT_TARGET_S = 0.05
+GUI_MODULES = ('pygame', 'OpenGL', 'tkinter')
+
+
+def parse_sizes(text):
+    """'2-5,8' -> [2, 3, 4, 5, 8]"""
+    sizes = []
+    for part in text.split(','):
+        low, _, high = part.partition('-')
+        sizes += range(int(low), int(high or low) + 1)
+    return sizes
+
+
+def percentiles(seconds, scale=1e6):
+    """p50/p90/p99/max of a list of timings, in microseconds by default"""
+    values = np.asarray(seconds) * scale
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99), 'max': float(values.max())}
+
+
+def random_moves(size, count, rng):
+    return [(rng.choice('RLUDFB'), rng.randrange(size), rng.random() < 0.5) for _ in range(count)]
+
+
+def run_python(code):
+    """Run code in a fresh interpreter next to this file and return its stdout"""
+    return subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+
+
+def import_time(statement, repeats):
+    """Best wall-clock seconds for a fresh interpreter to run an import"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run_python(statement)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_startup(repeats=3):
+    """Import times of the engine and solver, checked against the startup budget"""
+    # The engine's own share, timed inside an interpreter that already has NumPy
+    own_s = min(float(run_python("import time, numpy; start = time.perf_counter(); import jazzCube; "
+                                 "print(time.perf_counter() - start)")) for _ in range(repeats))
+    loaded = run_python(f"import sys, jazzCube; print(*(name for name in {GUI_MODULES!r} "
+                        "if name in sys.modules))").split()
+    return {
+        'import_s': import_time('import jazzCube', repeats),
+        'engine_import_s': own_s,
+        'solver_import_s': import_time('import cubeSolver', repeats),
+        'gui_modules_loaded': loaded,
+        'target_met': own_s <= ENGINE_IMPORT_TARGET_S and not loaded,
+    }
+
+
+def bench_size(size, moves, rng):
+    """Move, scramble, frame and memory figures for one cube size"""
+    from jazzCube import RubiksCube, _move_tables
+    from headlessRenderer import HeadlessRenderer
+    from scrambleGenerator import ScrambleGenerator
+
+    # Memory of the first cube of a size includes its shared move tables
+    _move_tables.pop(size, None)
+    tracemalloc.start()
+    cube = RubiksCube(size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {'memory_bytes': {'first_cube_peak': peak, 'facelets': int(cube.facelets.nbytes)}}
+
+    # One animated move: start the rotation, then commit it
+    sequence = random_moves(size, moves, rng)
+    latencies = []
+    for move in sequence:
+        start = time.perf_counter()
+        cube.apply_rotation(*move)
+        cube.complete_rotation()
+        cube.is_animating = False
+        latencies.append(time.perf_counter() - start)
+    result['complete_rotation'] = {'moves_per_s': moves / sum(latencies),
+                                   'latency_us': percentiles(latencies)}
+
+    lookups = []
+    for face, layer, _ in sequence[:200]:
+        start = time.perf_counter()
+        cube.get_face_positions(face, layer)
+        lookups.append(time.perf_counter() - start)
+    result['get_face_positions'] = {'latency_us': percentiles(lookups)}
+
+    start = time.perf_counter()
+    cube.apply_moves(sequence)
+    result['apply_moves'] = {'moves_per_s': moves / (time.perf_counter() - start)}
+
+    # Scramble generation plus committing it without animation
+    cube.reset_cube()
+    cube.skip_animation = True
+    start = time.perf_counter()
+    cube.scramble()
+    count = len(cube.move_queue)
+    cube.update_animation()
+    result['scramble'] = {'moves_per_s': count / (time.perf_counter() - start), 'moves': count}
+
+    # Bulk scrambles plus the states they reach, capped at about 10 MB of facelets
+    generator = ScrambleGenerator(size, 0)
+    count = max(1, min(10000, 10 ** 7 // cube.facelets.size))
+    start = time.perf_counter()
+    codes, _ = generator.bulk(count)
+    result['bulk_scramble'] = {'moves_per_s': codes.size / (time.perf_counter() - start), 'scrambles': count}
+
+    # Frames: the first one builds the resting map, later ones reuse it
+    renderer = HeadlessRenderer(size, 256, 256)
+    start = time.perf_counter()
+    renderer.render(cube.facelets)
+    first = time.perf_counter() - start
+    resting = []
+    for _ in range(10):
+        start = time.perf_counter()
+        renderer.render(cube.facelets)
+        resting.append(time.perf_counter() - start)
+    cube.skip_animation = False
+    cube.apply_rotation(*sequence[0])
+    turning = []
+    for progress in np.linspace(0.1, 0.9, 5):
+        start = time.perf_counter()
+        renderer.render(cube.facelets, cube.current_rotation, progress)
+        turning.append(time.perf_counter() - start)
+    cube.complete_rotation()
+    cube.is_animating = False
+    result['headless_frame_ms'] = {'first': first * 1e3, 'resting': percentiles(resting, 1e3),
+                                   'turning': percentiles(turning, 1e3)}
+    return result
+
+
+def bench_gl_frames(sizes, frames=20):
+    """Milliseconds per CubeRenderer frame in an offscreen EGL context"""
+    from OpenGL.GL import glFinish
+    from cubeRenderer import OffscreenContext
+    from jazzCube import RubiksCube
+
+    context = OffscreenContext(800, 600)
+    results = {}
+    try:
+        for size in sizes:
+            cube = RubiksCube(size)
+            cube.apply_moves(random_moves(size, 50, random.Random(size)))
+            cube.draw()
+            glFinish()
+            timings = []
+            for _ in range(frames):
+                start = time.perf_counter()
+                cube.draw()
+                glFinish()
+                timings.append(time.perf_counter() - start)
+            cube.renderer.delete()
+            results[str(size)] = percentiles(timings, 1e3)
+    finally:
+        context.close()
+    return results
+
+
+def bench_solver(count, rng):
+    """Two-phase solve times over random 3x3 scrambles, if the tables exist"""
+    from cubeSolver import get_two_phase_solver, solve, tables_ready
+    from jazzCube import RubiksCube
+
+    if not tables_ready():
+        return {'skipped': 'solver tables not generated'}
+    start = time.perf_counter()
+    get_two_phase_solver()
+    load = time.perf_counter() - start
+
+    timings, lengths = [], []
+    for _ in range(count):
+        cube = RubiksCube(3)
+        cube.apply_moves(random_moves(3, 40, rng))
+        start = time.perf_counter()
+        moves = solve(cube)
+        timings.append(time.perf_counter() - start)
+        lengths.append(len(moves))
+    return {'table_load_s': load, 'solve_ms': percentiles(timings, 1e3),
+            'mean_quarter_turns': float(np.mean(lengths))}
+
+
+def flatten(results, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """Metrics that are worse than the baseline by more than tolerance"""
+    old = flatten(baseline)
+    regressions = []
+    for name, value in flatten(results).items():
+        if name not in old or not old[name] or name.startswith(('environment', 'format')):
+            continue
+        if name.endswith(('moves', 'facelets', 'mean_quarter_turns')):
+            continue
+        change = value / old[name] - 1
+        if any(part in name for part in HIGHER_IS_BETTER):
+            change = -change
+        if change > tolerance:
+            regressions.append({'metric': name, 'baseline': old[name], 'current': value,
+                                'worse_by': change})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cube engine")
+    parser.add_argument('--sizes', type=parse_sizes, default=DEFAULT_SIZES,
+                        help="cube sizes, e.g. 2-15,20,50 (default: 2-15,20,50,100)")
+    parser.add_argument('--moves', type=int, default=1000, help="moves timed per size")
+    parser.add_argument('--solves', type=int, default=20, help="3x3 scrambles to solve, 0 to skip")
+    parser.add_argument('--gl', action='store_true', help="also time GL frames in an EGL context")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON results to this file")
+    parser.add_argument('--compare', help="earlier JSON results to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="fraction a metric may worsen before it counts (default: 0.1)")
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    if args.gl:
+        # PyOpenGL picks its platform when the engine first imports it
+        os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+        os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+    results = {
+        'format': FORMAT_VERSION,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'system': platform.system(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'startup': bench_startup(),
+        'sizes': {},
+    }
+    # Pay for first imports before any memory is measured
+    from jazzCube import RubiksCube
+    RubiksCube(1)
+    for size in args.sizes:
+        print(f"Benchmarking {size}x{size}x{size}...", file=sys.stderr)
+        results['sizes'][str(size)] = bench_size(size, args.moves, rng)
+    if args.gl:
+        results['gl_frame_ms'] = bench_gl_frames(args.sizes)
+    if args.solves:
+        results['solver'] = bench_solver(args.solves, rng)
+
+    if args.compare:
+        with open(args.compare) as file:
+            results['regressions'] = compare(results, json.load(file), args.tolerance)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    # A non-zero exit lets CI fail on regressions or a missed startup budget
+    return 1 if results.get('regressions') or not results['startup']['target_met'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
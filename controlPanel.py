@@ -0,0 +1,223 @@
+"""Tk control panel, run in its own process by cubeApp.
+
+Buttons send commands to the render process over a panelChannel.Channel;
+status, cube size and frame timings come back the same way.
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox
+from panelChannel import Channel, ChannelClosed
+
+
+class ControlPanel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.channel = None
+        self.root = None
+        self.status_var = None
+        self.perf_var = None
+        
+    def create_panel(self):
+        """Create the control panel"""
+        self.root = tk.Tk()
+        self.root.title("Rubik's Cube Controls")
+        self.root.geometry("350x800")
+        self.root.resizable(False, False)
+        
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Title
+        title_label = ttk.Label(main_frame, text="🎲 Rubik's Cube", 
+                               font=('Arial', 14, 'bold'))
+        title_label.grid(row=0, column=0, columnspan=2, pady=(0, 10))
+        
+        # Cube info
+        self.info_var = tk.StringVar(value="")
+        info_label = ttk.Label(main_frame, textvariable=self.info_var, font=('Arial', 10))
+        info_label.grid(row=1, column=0, columnspan=2, pady=(0, 15))
+        
+        # Status
+        status_frame = ttk.LabelFrame(main_frame, text="Status", padding="5")
+        status_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        self.status_var = tk.StringVar(value="Ready! Optimized for larger cubes.")
+        status_label = ttk.Label(status_frame, textvariable=self.status_var, 
+                                wraplength=300, justify=tk.LEFT)
+        status_label.grid(row=0, column=0, sticky=tk.W)
+        
+        # New cube section
+        new_cube_frame = ttk.LabelFrame(main_frame, text="New Cube", padding="10")
+        new_cube_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Label(new_cube_frame, text="Size (1-100):").grid(row=0, column=0, sticky=tk.W, pady=2)
+        self.size_var = tk.StringVar(value="")
+        size_entry = ttk.Entry(new_cube_frame, textvariable=self.size_var, width=5)
+        size_entry.grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=2)
+        
+        ttk.Button(new_cube_frame, text="🆕 Create New Cube", 
+                  command=self.create_new_cube).grid(row=1, column=0, columnspan=2, pady=(5, 0))
+        
+        # Controls
+        controls_frame = ttk.LabelFrame(main_frame, text="Controls", padding="10")
+        controls_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Button(controls_frame, text="🔀 Scramble", 
+                  command=self.scramble_cube).grid(row=0, column=0, columnspan=2, 
+                                                   sticky=(tk.W, tk.E), pady=2)
+        
+        ttk.Button(controls_frame, text="⚡ Undo Step (SPACE)", 
+                  command=self.solve_step).grid(row=1, column=0, padx=(0, 2), 
+                                               sticky=(tk.W, tk.E), pady=2)
+        
+        ttk.Button(controls_frame, text="🧩 Solve (ENTER)", 
+                  command=self.solve_cube).grid(row=1, column=1, padx=(2, 0), 
+                                               sticky=(tk.W, tk.E), pady=2)
+        
+        ttk.Button(controls_frame, text="🔄 Reset View", 
+                  command=self.reset_view).grid(row=2, column=0, padx=(0, 2), 
+                                              sticky=(tk.W, tk.E), pady=2)
+        
+        ttk.Button(controls_frame, text="✅ Reset Cube", 
+                  command=self.reset_cube).grid(row=2, column=1, padx=(2, 0), 
+                                               sticky=(tk.W, tk.E), pady=2)
+        
+        self.skip_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(controls_frame, text="⏩ Skip animations", variable=self.skip_var,
+                        command=self.toggle_skip_animation).grid(row=3, column=0, columnspan=2,
+                                                                 sticky=tk.W, pady=2)
+        
+        controls_frame.columnconfigure(0, weight=1)
+        controls_frame.columnconfigure(1, weight=1)
+        
+        # Manual rotations
+        manual_frame = ttk.LabelFrame(main_frame, text="Manual Rotations", padding="10")
+        manual_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        faces = [('R', 'Right'), ('L', 'Left'), ('U', 'Up'), ('D', 'Down'), ('F', 'Front'), ('B', 'Back')]
+        for i, (face, name) in enumerate(faces):
+            row = i // 2
+            col = i % 2
+            ttk.Button(manual_frame, text=f"{face} - {name}", 
+                      command=lambda f=face: self.manual_rotation(f)).grid(
+                          row=row, column=col, padx=2, pady=2, sticky=(tk.W, tk.E))
+        
+        manual_frame.columnconfigure(0, weight=1)
+        manual_frame.columnconfigure(1, weight=1)
+        
+        # Performance
+        perf_frame = ttk.LabelFrame(main_frame, text="Performance", padding="10")
+        perf_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(perf_frame, text="📊 Show frame timings (F3)", variable=self.profile_var,
+                        command=self.toggle_profiler).grid(row=0, column=0, sticky=tk.W, pady=2)
+        ttk.Button(perf_frame, text="⏺ Start/Stop Trace (F4)",
+                  command=self.toggle_trace).grid(row=0, column=1, sticky=tk.E, pady=2)
+        
+        self.perf_var = tk.StringVar(value="")
+        ttk.Label(perf_frame, textvariable=self.perf_var, font=('Courier', 8),
+                  justify=tk.LEFT).grid(row=1, column=0, columnspan=2, sticky=tk.W)
+        
+        # Instructions
+        inst_frame = ttk.LabelFrame(main_frame, text="Instructions", padding="10")
+        inst_frame.grid(row=7, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        
+        instructions = [
+            "🖱️ Mouse: Drag to rotate view",
+            "⎵ SPACE: Undo last move", 
+            "⏎ ENTER: Solve the cube", 
+            "🔀 S: Start scrambling",
+            "🔄 R: Reset camera view",
+            "⌨️ 1-6: Manual face rotations",
+            "⌨️ Hold SHIFT for counter-clockwise",
+            "📊 F3: Frame timings, F4: Trace to file",
+            "⌨ ESC: Quit"
+        ]
+        
+        for i, instruction in enumerate(instructions):
+            ttk.Label(inst_frame, text=instruction, font=('Arial', 8)).grid(row=i, column=0, 
+                                                                            sticky=tk.W, pady=1)
+        
+    def create_new_cube(self):
+        try:
+            size = int(self.size_var.get())
+            if size < 1 or size > 100:
+                messagebox.showerror("Error", "Size must be between 1 and 100!")
+                return
+            self.send('new_cube', size)
+            self.status_var.set(f"Creating new {size}×{size}×{size} cube...")
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid number!")
+    
+    def send(self, command, data=None):
+        """Queue a command for the render process"""
+        self.channel.send(command, data)
+    
+    def scramble_cube(self):
+        self.send('scramble')
+    
+    def solve_step(self):
+        self.send('solve_step')
+    
+    def solve_cube(self):
+        self.send('solve')
+    
+    def reset_view(self):
+        self.send('reset_view')
+    
+    def reset_cube(self):
+        self.send('reset_cube')
+    
+    def manual_rotation(self, face):
+        self.send('manual_rotation', face)
+    
+    def toggle_skip_animation(self):
+        self.send('skip_animation', self.skip_var.get())
+    
+    def toggle_profiler(self):
+        self.send('profile', self.profile_var.get())
+    
+    def toggle_trace(self):
+        self.send('trace')
+    
+    def update_status(self, event=None):
+        """Show status updates from the render process; closes the panel once it exits"""
+        for message in self.channel.receive():
+            if isinstance(message, ChannelClosed):
+                self.root.destroy()
+                return
+            fields = message.fields
+            if 'message' in fields:
+                self.status_var.set(fields['message'])
+            if 'size' in fields:
+                size = fields['size']
+                self.info_var.set(f"{size}×{size}×{size} Cube")
+                self.size_var.set(str(size))
+            if 'skip_animation' in fields:
+                self.skip_var.set(fields['skip_animation'])
+            if 'profiling' in fields:
+                self.profile_var.set(fields['profiling'])
+            if 'perf' in fields:
+                self.perf_var.set(fields['perf'])
+    
+    def notify(self):
+        """Called on the channel's receiver thread; hands over to the Tk thread"""
+        try:
+            self.root.event_generate('<<ChannelMessage>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            pass
+    
+    def run(self):
+        self.create_panel()
+        self.root.bind('<<ChannelMessage>>', self.update_status)
+        self.channel = Channel(self.connection, self.notify)
+        
+        # Messages that arrive before the main loop runs cannot be signalled
+        self.root.after_idle(self.update_status)
+        self.root.mainloop()
+        self.channel.close()
+
+
+def run_panel(connection):
+    """Entry point of the panel process"""
+    ControlPanel(connection).run()
@@ -0,0 +1,304 @@
+"""Interactive viewer: the pygame/OpenGL window, with the Tk control panel in a child process.
+
+Run with `python jazzCube.py`; the engine module only imports this from main().
+"""
+import pygame
+from pygame.locals import *
+import multiprocessing
+import sys
+import queue
+import time
+from controlPanel import run_panel
+from cubeRenderer import setup_gl
+from frameProfiler import FrameProfiler, PerfOverlay
+from jazzCube import RubiksCube
+from panelChannel import Channel, Command
+
+# Posted from other threads to wake a main loop that is waiting for events
+WAKE_EVENT = pygame.USEREVENT + 1
+
+# Longest an idle main loop sleeps before polling solver and status updates
+IDLE_TIMEOUT_MS = 100
+
+# Events after which the window contents must be drawn again
+EXPOSE_EVENTS = {VIDEOEXPOSE, VIDEORESIZE, WINDOWEXPOSED, WINDOWRESTORED, WINDOWSIZECHANGED}
+
+
+def start_panel():
+    """Start the control panel process; returns the render side of its channel"""
+    context = multiprocessing.get_context('spawn')
+    connection, panel_connection = context.Pipe()
+    context.Process(target=run_panel, args=(panel_connection,), daemon=True).start()
+    panel_connection.close()
+    return Channel(connection, wake_main_loop)
+
+def publish_changes(channel, published, **fields):
+    """Publish the status fields whose values differ from what the panel was last sent"""
+    for field, value in fields.items():
+        if published.get(field, object()) != value:
+            channel.publish(field, value)
+            published[field] = value
+
+def toggle_trace(profiler):
+    """Start a trace file of frame timings, or finish the running one"""
+    path = profiler.stop_trace()
+    if path:
+        return f"Trace saved to {path}"
+    path = time.strftime("jazzCube-trace-%Y%m%d-%H%M%S.json")
+    profiler.start_trace(path)
+    return f"Tracing frames to {path}..."
+
+def wake_main_loop():
+    """Wake the main loop from another thread"""
+    if pygame.display.get_init():
+        pygame.event.post(pygame.event.Event(WAKE_EVENT))
+
+def wake_on_solution(cube):
+    """Wake the main loop as soon as a running search finishes"""
+    if cube.pending_solve is not None:
+        cube.pending_solve[0].add_done_callback(lambda future: wake_main_loop())
+
+def main():
+    size = 3  # Start with 3x3x3
+    
+    print(f"Starting {size}×{size}×{size} Rubik's cube with face rotations...")
+    
+    pygame.init()
+    
+    width, height = 1000, 800
+    screen = pygame.display.set_mode((width, height), DOUBLEBUF | OPENGL)
+    pygame.display.set_caption(f"3D Rubik's Cube ({size}×{size}×{size}) - Face Rotations")
+    
+    # OpenGL setup
+    setup_gl(width, height)
+    
+    cube = RubiksCube(size)
+    
+    # Status messages from this process and the solver table thread
+    status_queue = queue.Queue()
+    
+    # Frame timings, off until toggled from the panel or with F3
+    profiler = FrameProfiler()
+    overlay = PerfOverlay()
+    
+    # Control panel process; its commands wake the loop below when it is idle
+    channel = start_panel()
+    published = {}
+    
+    # Solver tables are generated once in the background, then memory-mapped
+    # by the worker processes that search for solutions
+    from cubeSolver import prepare_tables, SolverPool
+    prepare_tables(lambda fraction, message: status_queue.put(
+        f"Generating solver tables: {message} ({fraction:.0%})"))
+    solver_pool = SolverPool()
+    
+    # Control variables
+    mouse_down = False
+    last_mouse_pos = [0, 0]
+    clock = pygame.time.Clock()
+    keys_pressed = set()
+    
+    # Scramble progress last reported to the panel
+    reported_remaining = None
+    
+    # Frames are only drawn when something visible changed; drawn_view is
+    # the (cube, state, camera) of the last frame on screen
+    needs_frame = True
+    drawn_view = None
+    
+    print("🎲 Enhanced Rubik's Cube Features:")
+    print("✅ Proper face/slice rotations")
+    print("✅ Only exterior cubes rendered") 
+    print("✅ Support for larger cubes (up to 100×100×100)")
+    print("✅ Two-phase and reduction solving")
+    print("✅ Smooth animations")
+    
+    running = True
+    while running:
+        profiler.start_frame()
+        
+        # Animate at up to 60 fps; with nothing moving, sleep until an event
+        # arrives. Profiling measures the render loop, so it keeps it running
+        moving = cube.is_animating or len(cube.move_queue) or mouse_down
+        if moving or needs_frame or profiler.enabled:
+            clock.tick(60)
+            events = pygame.event.get()
+        else:
+            event = pygame.event.wait(IDLE_TIMEOUT_MS)
+            events = [] if event.type == NOEVENT else [event] + pygame.event.get()
+        profiler.mark('idle')
+        
+        # Report scramble progress as the move queue drains
+        if cube.is_scrambled:
+            remaining = len(cube.move_queue)
+            if remaining == 0 and not cube.is_animating:
+                status_queue.put("Scramble complete! Press ENTER to solve, or SPACE to undo step by step.")
+                cube.is_scrambled = False
+            elif remaining != reported_remaining:
+                status_queue.put(f"Scrambling... {remaining} moves left")
+            reported_remaining = remaining
+        
+        # Queue a solution once the solver workers deliver it
+        result = cube.finish_solve()
+        if result:
+            status_queue.put(result)
+        
+        # Process commands from the panel
+        for message in channel.receive():
+            if not isinstance(message, Command):
+                continue
+            command, data = message
+            needs_frame = True
+            if command == 'scramble':
+                result = cube.scramble()
+                status_queue.put(result)
+            elif command == 'solve_step':
+                result = cube.solve_step()
+                status_queue.put(result)
+            elif command == 'solve':
+                result = cube.solve(solver_pool)
+                wake_on_solution(cube)
+                status_queue.put(result)
+            elif command == 'reset_view':
+                cube.rotation_x = 20
+                cube.rotation_y = 45
+                status_queue.put("View reset!")
+            elif command == 'reset_cube':
+                cube.reset_cube()
+                status_queue.put("Cube reset to solved state!")
+            elif command == 'new_cube':
+                if cube.renderer is not None:
+                    cube.renderer.delete()
+                skip_animation = cube.skip_animation
+                cube = RubiksCube(data)
+                cube.skip_animation = skip_animation
+                pygame.display.set_caption(f"3D Rubik's Cube ({data}×{data}×{data}) - Face Rotations")
+                status_queue.put(f"New {data}×{data}×{data} cube created!")
+            elif command == 'manual_rotation':
+                cube.queue_moves([(data, 0, True)])
+                status_queue.put(f"Queued {data} rotation")
+            elif command == 'skip_animation':
+                cube.skip_animation = data
+                status_queue.put("Skipping animations" if data else "Animating moves")
+            elif command == 'profile':
+                profiler.enable(data)
+            elif command == 'trace':
+                status_queue.put(toggle_trace(profiler))
+        
+        # Send status updates to the control panel; the channel coalesces them
+        while not status_queue.empty():
+            channel.publish('message', status_queue.get_nowait())
+        publish_changes(channel, published, size=cube.size, skip_animation=cube.skip_animation,
+                        profiling=profiler.enabled, perf=profiler.summary)
+        profiler.mark('commands')
+        
+        for event in events:
+            if event.type == QUIT:
+                running = False
+            
+            elif event.type in EXPOSE_EVENTS:
+                needs_frame = True
+            
+            elif event.type == KEYDOWN:
+                keys_pressed.add(event.key)
+                needs_frame = True
+                
+                if event.key == K_ESCAPE or event.key == K_q:
+                    running = False
+                elif event.key == K_SPACE:
+                    result = cube.solve_step()
+                    status_queue.put(result)
+                elif event.key == K_RETURN:
+                    result = cube.solve(solver_pool)
+                    wake_on_solution(cube)
+                    status_queue.put(result)
+                elif event.key == K_s:
+                    result = cube.scramble()
+                    status_queue.put(result)
+                elif event.key == K_r:
+                    cube.rotation_x = 20
+                    cube.rotation_y = 45
+                    status_queue.put("View reset!")
+                elif event.key == K_F3:
+                    profiler.enable(not profiler.enabled)
+                elif event.key == K_F4:
+                    status_queue.put(toggle_trace(profiler))
+                
+                # Manual face rotations with shift for counter-clockwise
+                shift_pressed = K_LSHIFT in keys_pressed or K_RSHIFT in keys_pressed
+                clockwise = not shift_pressed
+                
+                if event.key == K_1:  # R face
+                    cube.queue_moves([('R', 0, clockwise)])
+                elif event.key == K_2:  # L face
+                    cube.queue_moves([('L', 0, clockwise)])
+                elif event.key == K_3:  # U face
+                    cube.queue_moves([('U', 0, clockwise)])
+                elif event.key == K_4:  # D face
+                    cube.queue_moves([('D', 0, clockwise)])
+                elif event.key == K_5:  # F face
+                    cube.queue_moves([('F', 0, clockwise)])
+                elif event.key == K_6:  # B face
+                    cube.queue_moves([('B', 0, clockwise)])
+                
+                # Arrow keys for camera
+                elif event.key == K_LEFT:
+                    cube.rotation_y -= 5
+                elif event.key == K_RIGHT:
+                    cube.rotation_y += 5
+                elif event.key == K_UP:
+                    cube.rotation_x -= 5
+                elif event.key == K_DOWN:
+                    cube.rotation_x += 5
+            
+            elif event.type == KEYUP:
+                keys_pressed.discard(event.key)
+            
+            elif event.type == MOUSEBUTTONDOWN:
+                if event.button == 1:
+                    mouse_down = True
+                    last_mouse_pos = pygame.mouse.get_pos()
+            
+            elif event.type == MOUSEBUTTONUP:
+                if event.button == 1:
+                    mouse_down = False
+            
+            elif event.type == MOUSEMOTION:
+                if mouse_down:
+                    mouse_pos = pygame.mouse.get_pos()
+                    dx = mouse_pos[0] - last_mouse_pos[0]
+                    dy = mouse_pos[1] - last_mouse_pos[1]
+                    
+                    cube.rotation_y += dx * 0.3
+                    cube.rotation_x += dy * 0.3
+                    
+                    last_mouse_pos = mouse_pos
+        
+        profiler.mark('events')
+        
+        cube.update_animation()
+        profiler.mark('animation')
+        
+        view = (cube, cube.state_version, cube.rotation_x, cube.rotation_y)
+        if not (needs_frame or cube.is_animating or profiler.enabled or view != drawn_view):
+            continue
+        cube.draw()
+        profiler.mark('draw')
+        if profiler.enabled:
+            overlay.draw(profiler.summary)
+            profiler.mark('overlay')
+        pygame.display.flip()
+        profiler.mark('flip')
+        if profiler.enabled:
+            profiler.end_frame({**cube.renderer.stats, 'stickers': cube.facelets.size})
+        needs_frame = False
+        drawn_view = view
+    
+    profiler.stop_trace()
+    channel.close()
+    solver_pool.shutdown()
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
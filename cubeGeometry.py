@@ -0,0 +1,68 @@
+"""Window-independent geometry and colors shared by the GL and NumPy renderers."""
+import itertools
+import numpy as np
+
+# Corners of a unit cubie, numbered like the vertices in the original
+# draw_single_cube: back face first, then front face
+CORNERS = np.array([
+    [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+    [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1],
+], dtype=np.float32)
+
+# Corners of each sticker quad, in facelet face order
+# (front, back, right, left, top, bottom)
+FACE_CORNERS = [
+    [4, 7, 6, 5],
+    [1, 0, 3, 2],
+    [5, 6, 2, 1],
+    [0, 4, 7, 3],
+    [3, 7, 6, 2],
+    [0, 1, 5, 4],
+]
+
+# Corner signs of each sticker quad, used to rebuild merged quads from a box
+FACE_SIGNS = CORNERS[np.array(FACE_CORNERS)]
+
+# Outward normal of each facelet face (front, back, right, left, top, bottom)
+FACE_NORMALS = [(0, 0, 1), (0, 0, -1), (1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)]
+
+
+def symmetry_matrices():
+    """(48, 3, 3) signed permutation matrices: identity first, the 24 rotations, then the mirrors"""
+    matrices = []
+    for axes in itertools.permutations(range(3)):
+        for signs in itertools.product((1, -1), repeat=3):
+            matrix = np.zeros((3, 3), dtype=int)
+            matrix[axes, range(3)] = signs
+            matrices.append(matrix)
+    return np.array(sorted(matrices, key=lambda m: (round(np.linalg.det(m)) < 0, (m != np.eye(3)).any())))
+
+
+SYMMETRY_MATRICES = symmetry_matrices()
+
+
+# Wireframe edges of a cubie
+EDGES = [
+    [0, 1], [1, 2], [2, 3], [3, 0],  # back face
+    [4, 5], [5, 6], [6, 7], [7, 4],  # front face
+    [0, 4], [1, 5], [2, 6], [3, 7]   # connecting edges
+]
+
+# Standard Rubik's cube colors in facelet face order, and the backdrop
+STICKER_COLORS = [
+    [1.0, 1.0, 1.0],  # White - Front (positive Z)
+    [1.0, 1.0, 0.0],  # Yellow - Back (negative Z)
+    [0.0, 1.0, 0.0],  # Green - Right (positive X)
+    [0.0, 0.0, 1.0],  # Blue - Left (negative X)
+    [1.0, 0.0, 0.0],  # Red - Top (positive Y)
+    [1.0, 0.5, 0.0],  # Orange - Bottom (negative Y)
+]
+BACKGROUND_COLOR = (0.2, 0.2, 0.2)
+
+
+def sticker_quads(sticker_cells, size, cube_size=1.0, gap=0.1):
+    """(6*N*N, 4, 3) world-space corners of every sticker quad, in flat facelet order"""
+    spacing = cube_size + gap
+    centers = (sticker_cells - (size - 1) / 2) * spacing
+    faces = np.repeat(np.arange(6), size * size)
+    return centers[:, None, :] + FACE_SIGNS[faces] * (cube_size / 2)
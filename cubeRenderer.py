@@ -0,0 +1,338 @@
+from OpenGL.GL import *
+from OpenGL.GLU import *
+import ctypes
+import numpy as np
+
+from cubeGeometry import BACKGROUND_COLOR, CORNERS, EDGES, FACE_SIGNS, sticker_quads
+
+# Cubes larger than this draw merged same-colored sticker runs without the
+# per-cubie wireframe while no slice is turning
+LOD_SIZE = 20
+
+
+def setup_gl(width, height):
+    """Depth test, background and perspective shared by every GL context"""
+    glViewport(0, 0, width, height)
+    glEnable(GL_DEPTH_TEST)
+    glClearColor(*BACKGROUND_COLOR, 1.0)
+
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(60, width/height, 1, 100)
+    glMatrixMode(GL_MODELVIEW)
+
+
+def fit_projection(size):
+    """Push the far clipping plane out far enough for a size-N cube"""
+    _, _, width, height = glGetIntegerv(GL_VIEWPORT)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(60, width/height, 1, max(100, size * 6))
+    glMatrixMode(GL_MODELVIEW)
+
+
+def merge_runs(facelets, quads, pad=0.0):
+    """Merge runs of same-colored stickers along each facelet row.
+
+    Quads grow by pad within their face plane so the gaps between cubies do
+    not show the inside of the hollow cube. Returns the merged quad vertices
+    and the facelet index of each run, whose color the whole run shares.
+    """
+    colors = facelets.reshape(-1, facelets.shape[-1])
+    changed = np.ones(colors.shape, dtype=bool)
+    changed[:, 1:] = colors[:, 1:] != colors[:, :-1]
+    ends = np.ones(colors.shape, dtype=bool)
+    ends[:, :-1] = changed[:, 1:]
+    starts = np.flatnonzero(changed)
+    ends = np.flatnonzero(ends)
+
+    # Bounding box of the first and last sticker of each run
+    lo = np.minimum(quads[starts].min(axis=1), quads[ends].min(axis=1))
+    hi = np.maximum(quads[starts].max(axis=1), quads[ends].max(axis=1))
+    in_plane = hi > lo
+    lo = lo - pad * in_plane
+    hi = hi + pad * in_plane
+    signs = FACE_SIGNS[starts // (colors.shape[1] ** 2)]
+    merged = np.where(signs < 0, lo[:, None, :], hi[:, None, :])
+    return merged.astype(np.float32), starts
+
+def vertex_indices(mask, per_item):
+    """uint32 vertex indices of the items selected by mask, per_item vertices each"""
+    items = np.flatnonzero(mask)[:, None] * per_item
+    return (items + np.arange(per_item)).ravel().astype(np.uint32)
+
+
+class CubeRenderer:
+    """Draws a RubiksCube from vertex buffers uploaded once per cube size.
+
+    Sticker quads and the cubie wireframe never move, so they live in static
+    buffers. Only the per-sticker colors are re-uploaded, and only when the
+    cube's state_version changes. While slices turn, the cubies are split
+    into a static batch and a rotating batch per turn direction through
+    element buffers that are uploaded once per animated step. A step turns
+    every queued slice of one axis together.
+
+    Above LOD_SIZE the resting cube is drawn from merged same-colored runs,
+    so a 100x100x100 cube needs far fewer than its 60,000 sticker quads.
+    """
+    def __init__(self, cube):
+        self.size = cube.size
+        n = cube.size
+        s = cube.cube_size / 2
+        spacing = cube.cube_size + cube.gap
+
+        # Four vertices per sticker, laid out in flat facelet order so the
+        # color buffer is just the palette gathered through the facelets
+        self.sticker_cells = cube.tables.sticker_cells
+        self.cubie_cells = cube.tables.cubie_cells
+        quads = sticker_quads(self.sticker_cells, n, cube.cube_size, cube.gap).astype(np.float32)
+        self.quads = quads
+        self.gap = cube.gap
+
+        centers = (self.cubie_cells - (n - 1) / 2) * spacing
+        lines = centers[:, None, :] + CORNERS[np.array(EDGES).ravel()] * s
+        lines = lines.reshape(-1, 3).astype(np.float32)
+
+        self.quad_count = len(quads) * 4
+        self.line_count = len(lines)
+        self.uploaded_version = None
+
+        # Figures for the last draw, read by the frame profiler
+        self.stats = {'draw_calls': 0, 'buffer_uploads': 0, 'quads': 0}
+
+        self.quad_buffer, self.color_buffer, self.line_buffer = glGenBuffers(3)
+        glBindBuffer(GL_ARRAY_BUFFER, self.quad_buffer)
+        glBufferData(GL_ARRAY_BUFFER, quads.nbytes, quads, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.color_buffer)
+        glBufferData(GL_ARRAY_BUFFER, quads.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.line_buffer)
+        glBufferData(GL_ARRAY_BUFFER, lines.nbytes, lines, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        # Merged runs for the resting large cube, rebuilt per state change
+        self.lod = n > LOD_SIZE
+        self.lod_buffers = glGenBuffers(2) if self.lod else None
+        self.lod_count = 0
+        self.lod_version = None
+
+        # Static batch and one rotating batch per direction for the animated step
+        self.selected_slices = None
+        self.batches = {}
+        self.element_buffers = glGenBuffers(6)
+
+        fit_projection(n)
+
+    def select_slices(self, axis, turns):
+        """Split stickers and wireframe into a static batch and one per turn direction.
+
+        turns maps each turning slice index of axis to True for a positive
+        quarter turn; batches are keyed by (kind, 0, 1 or -1).
+        """
+        slice_key = (axis, tuple(sorted(turns.items())))
+        if slice_key == self.selected_slices:
+            return
+
+        slice_turns = np.zeros(self.size, dtype=np.int8)
+        for index, positive in turns.items():
+            slice_turns[index] = 1 if positive else -1
+        sticker_turns = slice_turns[self.sticker_cells[:, axis]]
+        cubie_turns = slice_turns[self.cubie_cells[:, axis]]
+        edge_vertices = len(EDGES) * 2
+        batches = {}
+        for turn in (0, 1, -1):
+            batches[('quads', turn)] = vertex_indices(sticker_turns == turn, 4)
+            batches[('lines', turn)] = vertex_indices(cubie_turns == turn, edge_vertices)
+
+        self.batches = {}
+        for buffer, (key, indices) in zip(self.element_buffers, batches.items()):
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, buffer)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_DYNAMIC_DRAW)
+            self.batches[key] = (buffer, len(indices))
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        self.stats['buffer_uploads'] += len(batches)
+        self.selected_slices = slice_key
+
+    def update_colors(self, cube):
+        """Re-upload sticker colors if the cube changed since the last upload"""
+        if self.uploaded_version == cube.state_version:
+            return
+
+        palette = np.asarray(cube.colors, dtype=np.float32)
+        colors = np.repeat(palette[cube.facelets.reshape(-1)], 4, axis=0)
+        glBindBuffer(GL_ARRAY_BUFFER, self.color_buffer)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, colors.nbytes, colors)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.stats['buffer_uploads'] += 1
+        self.uploaded_version = cube.state_version
+
+    def update_lod(self, cube):
+        """Rebuild the merged-run buffers if the cube changed"""
+        if self.lod_version == cube.state_version:
+            return
+
+        merged, runs = merge_runs(cube.facelets, self.quads, self.gap / 2)
+        palette = np.asarray(cube.colors, dtype=np.float32)
+        colors = np.repeat(palette[cube.facelets.reshape(-1)[runs]], 4, axis=0)
+        for buffer, data in zip(self.lod_buffers, (merged, colors)):
+            glBindBuffer(GL_ARRAY_BUFFER, buffer)
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.stats['buffer_uploads'] += len(self.lod_buffers)
+        self.lod_count = len(merged) * 4
+        self.lod_version = cube.state_version
+
+    def draw_lod(self):
+        """Draw the merged runs with one call"""
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        vertex_buffer, color_buffer = self.lod_buffers
+        glBindBuffer(GL_ARRAY_BUFFER, color_buffer)
+        glColorPointer(3, GL_FLOAT, 0, ctypes.c_void_p(0))
+        glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+        glVertexPointer(3, GL_FLOAT, 0, ctypes.c_void_p(0))
+        glDrawArrays(GL_QUADS, 0, self.lod_count)
+        self.stats['draw_calls'] += 1
+        self.stats['quads'] = self.lod_count // 4
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def draw_scene(self, cube):
+        """Clear the frame, place the camera and draw the cube"""
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+
+        # Camera positioning
+        camera_distance = cube.size * 4
+        glTranslatef(0.0, 0.0, -camera_distance)
+        glRotatef(cube.rotation_x, 1, 0, 0)
+        glRotatef(cube.rotation_y, 0, 1, 0)
+
+        self.draw(cube)
+
+    def draw(self, cube):
+        """Draw the cube, turning the animated slices under one glRotatef per direction"""
+        rotation = cube.current_rotation if cube.is_animating else None
+        self.stats = {'draw_calls': 0, 'buffer_uploads': 0, 'quads': 0}
+        if self.lod and rotation is None:
+            self.update_lod(cube)
+            self.draw_lod()
+            return
+
+        self.update_colors(cube)
+        self.stats['quads'] = self.quad_count // 4
+
+        # The color pointer keeps referring to the color buffer once set
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, self.color_buffer)
+        glColorPointer(3, GL_FLOAT, 0, ctypes.c_void_p(0))
+        glLineWidth(1.5)
+
+        if rotation is None:
+            self.draw_batch(None)
+        else:
+            self.select_slices(rotation['axis'], rotation['turns'])
+            self.draw_batch(0)
+
+            # Positive turns are counter-clockwise seen from the positive end of the axis
+            axis = [0, 0, 0]
+            axis[rotation['axis']] = 1
+            for turn in (1, -1):
+                if self.batches[('quads', turn)][1]:
+                    glPushMatrix()
+                    glRotatef(turn * cube.animation_progress * 90, *axis)
+                    self.draw_batch(turn)
+                    glPopMatrix()
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def draw_batch(self, moving):
+        """Draw stickers, then the black wireframe; moving is a batch turn, None draws every cubie"""
+        glEnableClientState(GL_COLOR_ARRAY)
+        self.draw_elements('quads', GL_QUADS, self.quad_buffer, self.quad_count, moving)
+        glDisableClientState(GL_COLOR_ARRAY)
+
+        # The wireframe is lost in the noise on large cubes
+        if not self.lod:
+            glColor3f(0.0, 0.0, 0.0)
+            self.draw_elements('lines', GL_LINES, self.line_buffer, self.line_count, moving)
+
+    def draw_elements(self, kind, mode, vertex_buffer, count, moving):
+        """One draw call over a whole vertex buffer or one of its batches"""
+        glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+        glVertexPointer(3, GL_FLOAT, 0, ctypes.c_void_p(0))
+
+        self.stats['draw_calls'] += 1
+        if moving is None:
+            glDrawArrays(mode, 0, count)
+            return
+
+        element_buffer, element_count = self.batches[(kind, moving)]
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, element_buffer)
+        glDrawElements(mode, element_count, GL_UNSIGNED_INT, ctypes.c_void_p(0))
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        """Free the GL buffers"""
+        glDeleteBuffers(3, [self.quad_buffer, self.color_buffer, self.line_buffer])
+        glDeleteBuffers(6, self.element_buffers)
+        if self.lod:
+            glDeleteBuffers(2, self.lod_buffers)
+
+
+class OffscreenContext:
+    """Window-less OpenGL context on Mesa's software rasterizer, through EGL.
+
+    PyOpenGL picks its platform on first import, so run with
+    PYOPENGL_PLATFORM=egl (and EGL_PLATFORM=surfaceless when there is no
+    display server) set before OpenGL is imported.
+    """
+    def __init__(self, width=1000, height=800):
+        from OpenGL import EGL
+
+        self.width = width
+        self.height = height
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("Could not initialize EGL")
+
+        config_attribs = (EGL.EGLint * 13)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE,
+        )
+        config = EGL.EGLConfig()
+        num_configs = EGL.EGLint()
+        EGL.eglChooseConfig(self.display, config_attribs, ctypes.pointer(config), 1,
+                            ctypes.pointer(num_configs))
+        if num_configs.value < 1:
+            raise RuntimeError("No EGL config with an OpenGL pbuffer")
+
+        surface_attribs = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+        self.surface = EGL.eglCreatePbufferSurface(self.display, config, surface_attribs)
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context):
+            raise RuntimeError("Could not make the EGL context current")
+
+        setup_gl(width, height)
+
+    def read_pixels(self):
+        """Current framebuffer as an (height, width, 3) uint8 array, top row first"""
+        glFinish()
+        data = glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE)
+        frame = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+        return frame[::-1].copy()
+
+    def close(self):
+        """Release the context and its surface"""
+        from OpenGL import EGL
+
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(self.display, self.context)
+        EGL.eglDestroySurface(self.display, self.surface)
+        EGL.eglTerminate(self.display)
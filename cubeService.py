@@ -0,0 +1,435 @@
+"""Headless asyncio service hosting many independent cube sessions.
+
+Clients connect over TCP (127.0.0.1 by default) and exchange one JSON object
+per line. A request names an operation and its arguments, plus an optional
+id that is echoed back:
+
+    {"id": 1, "op": "create", "size": 3}
+    -> {"id": 1, "ok": true, "session": "...", "size": 3}
+    {"op": "move", "session": "...", "moves": [["R", 0, true], ["U", 0, false]]}
+    {"op": "scramble", "session": "...", "count": 25, "seed": 7}
+    {"op": "undo", "session": "...", "count": 1}
+    {"op": "state", "session": "..."}
+    {"op": "close", "session": "..."}
+    {"op": "stats"}
+
+Failures answer {"ok": false, "error": "..."}.
+
+Sessions do not each hold a RubiksCube, which carries animation, GL and
+solver state. Instead, every session is one cube of a CubeBatch per cube
+size. Moves queued by all sessions within a short batch window are then
+applied together, with one vectorized gather per round of moves. Histories
+are MoveLogs, so undo pops 16-bit codes and applies their inverses; they
+only change once a batch has been applied. Sessions idle for longer than
+idle_timeout are evicted, and so are the least recently used ones once
+max_sessions is exceeded or their state takes more than max_memory bytes.
+
+Run with `python cubeService.py --port 8765`.
+"""
+import argparse
+import asyncio
+import json
+import secrets
+import sys
+import time
+from collections import OrderedDict
+import numpy as np
+
+from jazzCube import CubeBatch
+from moveLog import MoveLog
+from scrambleGenerator import ScrambleGenerator
+
+# Most moves a single scramble request may ask for
+MAX_SCRAMBLE_MOVES = 5000
+
+
+class PendingMoves:
+    """One session's requests in a batch: their codes and futures, and how its history will change"""
+    __slots__ = ('codes', 'futures', 'added', 'popped')
+
+    def __init__(self):
+        self.codes = []
+        self.futures = []
+        self.added = []  # Codes to record once the batch is applied
+        self.popped = 0  # Recorded codes to drop once the batch is applied
+
+    def undo_codes(self, history, count):
+        """Inverse codes of the last count moves, counting moves added earlier in the batch"""
+        codes = []
+        for _ in range(min(count, len(self.added) + len(history) - self.popped)):
+            if self.added:
+                code = self.added.pop()
+            else:
+                self.popped += 1
+                code = history.codes[-self.popped]
+            # Move codes differ from their inverse in the lowest bit
+            codes.append(code ^ 1)
+        return codes
+
+
+class Session:
+    """One client's cube: a cube of its size's batch, its move history and its last use"""
+    __slots__ = ('id', 'store', 'slot', 'history', 'last_active', 'pending')
+
+    def __init__(self, session_id, store):
+        self.id = session_id
+        self.store = store
+        self.slot = store.allocate()
+        self.history = MoveLog(store.tables)
+        self.last_active = time.monotonic()
+        self.pending = 0  # Requests waiting for the next batch
+
+
+class CubeService:
+    """Sessions, the move batcher and the JSON-lines protocol"""
+    def __init__(self, max_sessions=100000, idle_timeout=600.0, max_memory=None,
+                 max_size=100, batch_window=0.002):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_memory = max_memory
+        self.max_size = max_size
+        self.batch_window = batch_window
+
+        self.sessions = OrderedDict()  # Least recently used first
+        self.stores = {}  # CubeBatch per cube size
+        self.pending = []  # (session, codes, undo count, future) waiting for the next batch
+        self.wakeup = None
+        self.tasks = []
+        self.server = None
+
+        # Counters reported by stats()
+        self.batches = 0
+        self.batched_moves = 0
+        self.evictions = 0
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Listen for clients and start the batcher; returns the bound (host, port)"""
+        self.wakeup = asyncio.Event()
+        self.tasks = [asyncio.create_task(self.run_batches()),
+                      asyncio.create_task(self.run_evictions())]
+        self.server = await asyncio.start_server(self.handle_client, host, port, limit=1 << 22)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self.tasks:
+            task.cancel()
+
+    def get_session(self, session_id):
+        """Session by id, marked as just used"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ValueError(f"Unknown or expired session {session_id!r}")
+        session.last_active = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def create_session(self, size):
+        if not isinstance(size, int) or not 1 <= size <= self.max_size:
+            raise ValueError(f"Size must be an integer between 1 and {self.max_size}")
+        while len(self.sessions) >= self.max_sessions:
+            if not self.evict_oldest():
+                raise ValueError("Too many sessions")
+        if size not in self.stores:
+            self.stores[size] = CubeBatch(size, 0)
+        session = Session(secrets.token_hex(8), self.stores[size])
+        self.sessions[session.id] = session
+        return session
+
+    def close_session(self, session_id):
+        session = self.get_session(session_id)
+        if session.pending:
+            raise ValueError("Session has moves in progress")
+        self.remove(session)
+
+    def remove(self, session):
+        del self.sessions[session.id]
+        store = session.store
+        store.release(session.slot)
+        # A size nobody uses any more gives its whole array back
+        if len(store.free) == store.count:
+            del self.stores[store.size]
+
+    def evict_oldest(self):
+        """Drop and return the least recently used session without pending moves, if any"""
+        for session in self.sessions.values():
+            if not session.pending:
+                self.remove(session)
+                self.evictions += 1
+                return session
+        return None
+
+    async def run_evictions(self):
+        """Drop idle sessions, then least recently used ones while over max_memory"""
+        interval = min(self.idle_timeout / 4, 5.0)
+        while True:
+            await asyncio.sleep(interval)
+            cutoff = time.monotonic() - self.idle_timeout
+            idle = []
+            for session in self.sessions.values():
+                if session.last_active > cutoff:
+                    break
+                if not session.pending:
+                    idle.append(session)
+            for session in idle:
+                self.remove(session)
+            self.evictions += len(idle)
+            if self.max_memory is not None:
+                excess = self.memory_usage()['total_bytes'] - self.max_memory
+                while excess > 0:
+                    session = self.evict_oldest()
+                    if session is None:
+                        break
+                    excess -= sum(self.session_bytes(session))
+
+    def session_bytes(self, session):
+        """(cube, history, objects) bytes that dropping a session frees"""
+        n = session.store.size
+        codes = session.history.codes
+        return (6 * n * n, len(codes) * codes.itemsize,
+                sys.getsizeof(session) + sys.getsizeof(session.history))
+
+    def queue_codes(self, session, codes, undo=0):
+        """Future for the session's state once codes, or undo moves, have been applied in a batch"""
+        future = asyncio.get_running_loop().create_future()
+        if not len(codes) and not undo:
+            future.set_result(self.session_state(session, session.store.solved_mask([session.slot])[0]))
+            return future
+        session.pending += 1
+        self.pending.append((session, np.asarray(codes, dtype=np.uint16), undo, future))
+        self.wakeup.set()
+        return future
+
+    async def run_batches(self):
+        """Wait a batch window after the first queued move, then apply everything queued"""
+        while True:
+            await self.wakeup.wait()
+            await asyncio.sleep(self.batch_window)
+            self.wakeup.clear()
+            pending, self.pending = self.pending, []
+            try:
+                self.apply_batch(pending)
+            except Exception as error:
+                for session, _, _, future in pending:
+                    if not future.done():
+                        session.pending -= 1
+                        future.set_exception(error)
+
+    def apply_batch(self, pending):
+        """Apply queued requests grouped by cube size, merging requests of the same session.
+
+        Undo codes are worked out here in queue order, so they see every move
+        queued before them, and histories are only updated once all moves apply.
+        """
+        by_store = {}
+        for session, codes, undo, future in pending:
+            moves = by_store.setdefault(session.store, {}).setdefault(session, PendingMoves())
+            if undo:
+                codes = moves.undo_codes(session.history, undo)
+            else:
+                codes = codes.tolist()
+                moves.added.extend(codes)
+            moves.codes.extend(codes)
+            moves.futures.append(future)
+
+        for store, sessions in by_store.items():
+            slots = [session.slot for session in sessions]
+            store.apply_sequences(slots, [moves.codes for moves in sessions.values()])
+            solved = store.solved_mask(slots)
+            for (session, moves), is_solved in zip(sessions.items(), solved):
+                for _ in range(moves.popped):
+                    session.history.pop()
+                session.history.extend_codes(moves.added)
+                session.pending -= len(moves.futures)
+                self.batched_moves += len(moves.codes)
+                result = self.session_state(session, is_solved)
+                for future in moves.futures:
+                    if not future.done():
+                        future.set_result(result)
+        self.batches += 1
+
+    def session_state(self, session, solved):
+        return {'session': session.id, 'solved': bool(solved), 'history': len(session.history)}
+
+    async def move(self, session_id, moves):
+        """Apply (face, layer, clockwise) moves and record them for undo"""
+        session = self.get_session(session_id)
+        encode = session.store.tables.encode_move
+        codes = []
+        for face, layer, clockwise in moves:
+            if not isinstance(clockwise, bool):
+                raise ValueError(f"Move direction must be true or false, not {clockwise!r}")
+            codes.append(encode(face, layer, clockwise))
+        return await self.queue_codes(session, codes)
+
+    async def scramble(self, session_id, count=None, seed=None):
+        """Apply a random scramble, reproducible when seeded"""
+        session = self.get_session(session_id)
+        if count is not None and (not isinstance(count, int) or isinstance(count, bool)
+                                  or not 0 <= count <= MAX_SCRAMBLE_MOVES):
+            raise ValueError(f"Scramble count must be an integer between 0 and {MAX_SCRAMBLE_MOVES}")
+        moves = ScrambleGenerator(session.store.size, seed).moves(count)
+        return await self.move(session_id, moves)
+
+    async def undo(self, session_id, count=1):
+        """Reverse the last count recorded moves, or all of them if there are fewer"""
+        session = self.get_session(session_id)
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            raise ValueError(f"Undo count must be a non-negative integer, not {count!r}")
+        return await self.queue_codes(session, [], undo=count)
+
+    def state(self, session_id):
+        """Facelets as one digit per sticker, face by face in FACE_NAMES order"""
+        session = self.get_session(session_id)
+        store = session.store
+        facelets = store.facelets[session.slot]
+        return {**self.session_state(session, store.solved_mask([session.slot])[0]),
+                'size': store.size,
+                'facelets': (facelets.reshape(-1) + ord('0')).tobytes().decode('ascii'),
+                'pending': session.pending}
+
+    def memory_usage(self):
+        """Bytes held by sessions, which max_memory bounds, plus the arrays and move tables they share.
+
+        total_bytes only counts what evicting sessions frees: their cubes,
+        move histories and session objects. Batch arrays keep their spare
+        cubes until a size has no sessions left, and move tables stay cached.
+        """
+        facelet_bytes = history_bytes = session_bytes = 0
+        for session in self.sessions.values():
+            cube, history, objects = self.session_bytes(session)
+            facelet_bytes += cube
+            history_bytes += history
+            session_bytes += objects
+        array_bytes = table_bytes = 0
+        for store in self.stores.values():
+            array_bytes += store.facelets.nbytes
+            tables = store.tables
+            table_bytes += sum(perm.nbytes for perm in tables.perms.values())
+            if tables.perm_matrix is not None:
+                table_bytes += tables.perm_matrix.nbytes
+        return {'facelet_bytes': facelet_bytes, 'history_bytes': history_bytes,
+                'session_bytes': session_bytes,
+                'total_bytes': facelet_bytes + history_bytes + session_bytes,
+                'array_bytes': array_bytes, 'table_bytes': table_bytes}
+
+    def stats(self):
+        return {
+            'sessions': len(self.sessions),
+            'sizes': {str(size): store.count - len(store.free) for size, store in self.stores.items()},
+            'batches': self.batches,
+            'batched_moves': self.batched_moves,
+            'evictions': self.evictions,
+            'memory': self.memory_usage(),
+        }
+
+    async def dispatch(self, request):
+        """Run one protocol request and return its response fields"""
+        if not isinstance(request, dict):
+            raise ValueError("Requests must be JSON objects")
+        op = request.get('op')
+        if op == 'create':
+            session = self.create_session(request.get('size', 3))
+            return {'session': session.id, 'size': session.store.size}
+        if op == 'close':
+            self.close_session(request['session'])
+            return {}
+        if op == 'move':
+            return await self.move(request['session'], request['moves'])
+        if op == 'scramble':
+            return await self.scramble(request['session'], request.get('count'), request.get('seed'))
+        if op == 'undo':
+            return await self.undo(request['session'], request.get('count', 1))
+        if op == 'state':
+            return self.state(request['session'])
+        if op == 'stats':
+            return self.stats()
+        raise ValueError(f"Unknown operation {op!r}")
+
+    async def handle_client(self, reader, writer):
+        """Answer one connection's requests in order until it closes"""
+        try:
+            while line := await reader.readline():
+                request = {}
+                try:
+                    request = json.loads(line)
+                    response = {'ok': True, **await self.dispatch(request)}
+                except KeyError as error:
+                    response = {'ok': False, 'error': f"Missing field {error}"}
+                except (ValueError, TypeError) as error:
+                    response = {'ok': False, 'error': str(error)}
+                except Exception as error:
+                    # One bad request must not take the connection down with it
+                    response = {'ok': False, 'error': f"Internal error: {type(error).__name__}: {error}"}
+                if isinstance(request, dict) and 'id' in request:
+                    response['id'] = request['id']
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+
+class CubeClient:
+    """Small asyncio client for the service, for scripts and load tests"""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765):
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 22)
+        return cls(reader, writer)
+
+    async def request(self, op, **fields):
+        """Send one request and return its response; errors raise ValueError"""
+        async with self.lock:
+            self.next_id += 1
+            self.writer.write(json.dumps({'id': self.next_id, 'op': op, **fields}).encode() + b'\n')
+            await self.writer.drain()
+            response = json.loads(await self.reader.readline())
+        if not response.pop('ok'):
+            raise ValueError(response['error'])
+        response.pop('id', None)
+        return response
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def serve(host, port, **options):
+    service = CubeService(**options)
+    host, port = await service.start(host, port)
+    print(f"Cube service listening on {host}:{port}")
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve independent cube sessions over JSON lines")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-sessions', type=int, default=100000)
+    parser.add_argument('--idle-timeout', type=float, default=600.0, help="seconds before an idle session is dropped")
+    parser.add_argument('--max-memory', type=float, help="megabytes of session state to keep before evicting")
+    parser.add_argument('--max-size', type=int, default=100)
+    args = parser.parse_args(argv)
+    max_memory = None if args.max_memory is None else int(args.max_memory * 1e6)
+    try:
+        asyncio.run(serve(args.host, args.port, max_sessions=args.max_sessions,
+                          idle_timeout=args.idle_timeout, max_memory=max_memory,
+                          max_size=args.max_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1051 @@
+"""Solvers that turn any RubiksCube state into a move list.
+
+2x2 and 3x3 cubes use Kociemba's two-phase algorithm over move and pruning
+tables built with NumPy and cached on disk. Larger cubes are reduced to a
+3x3: centers and edge wings are placed with pure commutators, then the
+two-phase solver finishes the outer layers.
+
+Moves come back as (face, layer, clockwise) tuples, ready for
+RubiksCube.queue_moves() or apply_moves(). SolverPool runs the same searches
+in worker processes and hands back futures, so callers never block on them.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+from jazzCube import FACE_LETTERS, MOVE_AXES, facelets_solved, get_move_tables, simplify_moves, slice_move
+from tableCache import table_cache
+
+# Grid axes that index the rows and columns of each facelet face
+FACE_GRID_AXES = [(0, 1), (0, 1), (1, 2), (1, 2), (0, 2), (0, 2)]
+
+# Colors of opposite faces in the standard scheme
+OPPOSITE_COLORS = [1, 0, 3, 2, 5, 4]
+
+# Corner and edge cubies in Kociemba's order, stickers listed in his facelet order
+CORNER_NAMES = ['URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB']
+EDGE_NAMES = ['UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR']
+
+# Face turns as (corner perm, corner twist, edge perm, edge flip), "replaced by" form
+BASIC_MOVES = {
+    'U': ([3, 0, 1, 2, 4, 5, 6, 7], [0, 0, 0, 0, 0, 0, 0, 0],
+          [3, 0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11], [0] * 12),
+    'R': ([4, 1, 2, 0, 7, 5, 6, 3], [2, 0, 0, 1, 1, 0, 0, 2],
+          [8, 1, 2, 3, 11, 5, 6, 7, 4, 9, 10, 0], [0] * 12),
+    'F': ([1, 5, 2, 3, 0, 4, 6, 7], [1, 2, 0, 0, 2, 1, 0, 0],
+          [0, 9, 2, 3, 4, 8, 6, 7, 1, 5, 10, 11], [0, 1, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0]),
+    'D': ([0, 1, 2, 3, 5, 6, 7, 4], [0, 0, 0, 0, 0, 0, 0, 0],
+          [0, 1, 2, 3, 5, 6, 7, 4, 8, 9, 10, 11], [0] * 12),
+    'L': ([0, 2, 6, 3, 4, 1, 5, 7], [0, 1, 2, 0, 0, 2, 1, 0],
+          [0, 1, 10, 3, 4, 5, 9, 7, 8, 2, 6, 11], [0] * 12),
+    'B': ([0, 1, 3, 7, 4, 5, 2, 6], [0, 0, 1, 2, 0, 0, 2, 1],
+          [0, 1, 2, 11, 4, 5, 6, 10, 8, 9, 3, 7], [0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 1]),
+}
+
+# Two-phase move m is face 'URFDLB'[m // 3] turned m % 3 + 1 quarter turns
+SEARCH_FACES = 'URFDLB'
+PHASE2_MOVES = [0, 1, 2, 9, 10, 11, 4, 13, 7, 16]  # U, U2, U', D, D2, D', R2, L2, F2, B2
+
+# Both phases meet in the middle: every state within TABLE_DEPTH moves of the
+# goal is tabled, and up to FORWARD moves are searched from the start
+PHASE1_TABLE_DEPTH = 7
+PHASE1_FORWARD = 5
+PHASE2_TABLE_DEPTH = 7
+PHASE2_FORWARD = 6
+PHASE2_LIMIT = PHASE2_TABLE_DEPTH + PHASE2_FORWARD
+
+# Phase-2 moves worth trying after a move of each face (row 6: no move yet);
+# repeating a face or turning opposite faces in both orders is redundant
+PHASE2_FACES = np.array([m // 3 for m in PHASE2_MOVES])
+PHASE2_FOLLOWS = np.array([(PHASE2_FACES != face) & (PHASE2_FACES != face - 3) for face in range(7)])
+
+# Sizes of the two-phase coordinates
+N_TWIST = 2187
+N_FLIP = 2048
+N_SLICE = 495
+N_SLICE_SORTED = 11880
+N_PERM8 = 40320
+
+# Bump when a table layout changes, so stale caches are rebuilt
+TWO_PHASE_VERSION = 1
+ORBIT_VERSION = 1
+
+
+def multiply(a, b):
+    """Cubie-level product a*b: apply b after a"""
+    cp_a, co_a, ep_a, eo_a = a
+    cp_b, co_b, ep_b, eo_b = b
+    return ([cp_a[p] for p in cp_b],
+            [(co_a[p] + o) % 3 for p, o in zip(cp_b, co_b)],
+            [ep_a[p] for p in ep_b],
+            [(eo_a[p] + o) % 2 for p, o in zip(ep_b, eo_b)])
+
+
+def build_move_cubies():
+    """Cubie form of the 18 two-phase moves"""
+    moves = []
+    for face in SEARCH_FACES:
+        cubie = BASIC_MOVES[face]
+        moves.append(cubie)
+        moves.append(multiply(moves[-1], cubie))
+        moves.append(multiply(moves[-1], cubie))
+    return moves
+
+
+MOVE_CUBIES = build_move_cubies()
+
+
+def perm_parity(perm):
+    """0 for an even permutation, 1 for an odd one"""
+    seen = [False] * len(perm)
+    parity = 0
+    for start in range(len(perm)):
+        length = 0
+        i = start
+        while not seen[i]:
+            seen[i] = True
+            i = perm[i]
+            length += 1
+        if length:
+            parity ^= (length - 1) & 1
+    return parity
+
+
+def perm_rank(perms):
+    """Lexicographic rank of each row of an (M, n) permutation array"""
+    perms = np.asarray(perms)
+    n = perms.shape[-1]
+    rank = np.zeros(perms.shape[:-1], dtype=np.int64)
+    for i in range(n - 1):
+        smaller_after = (perms[..., i + 1:] < perms[..., i:i + 1]).sum(axis=-1)
+        rank = rank * (n - i) + smaller_after
+    return rank
+
+
+def all_perms(n):
+    """Every permutation of range(n), in lexicographic (rank) order"""
+    return np.array(list(itertools.permutations(range(n))), dtype=np.int64)
+
+
+# 4-subsets of edge positions, ordered so the UD-slice positions come first
+SLICE_COMBOS = list(itertools.combinations(range(11, -1, -1), 4))
+SLICE_COMBO_RANK = np.full(1 << 12, -1, dtype=np.int64)
+for rank, combo in enumerate(SLICE_COMBOS):
+    SLICE_COMBO_RANK[sum(1 << p for p in combo)] = rank
+
+
+def encode_slice_sorted(ep):
+    """Positions and order of the FR, FL, BL, BR edges, as one number < 11880"""
+    ep = np.asarray(ep)
+    in_slice = ep >= 8
+    mask = (in_slice * (1 << np.arange(12))).sum(axis=-1)
+    order = ep[in_slice].reshape(ep.shape[:-1] + (4,)) - 8
+    return SLICE_COMBO_RANK[mask] * 24 + perm_rank(order)
+
+
+def encode_twist(co):
+    return np.asarray(co)[..., :7] @ (3 ** np.arange(6, -1, -1))
+
+
+def encode_flip(eo):
+    return np.asarray(eo)[..., :11] @ (2 ** np.arange(10, -1, -1))
+
+
+def decode_orientations(count, base, pieces):
+    """All orientation vectors for a twist (base 3) or flip (base 2) coordinate"""
+    digits = np.zeros((count, pieces), dtype=np.int64)
+    value = np.arange(count)
+    for i in range(pieces - 2, -1, -1):
+        digits[:, i] = value % base
+        value //= base
+    digits[:, -1] = (-digits[:, :-1].sum(axis=1)) % base
+    return digits
+
+
+def build_pruning(move_a, move_b, size_b, moves):
+    """Breadth-first distance to the solved coordinate pair (0, 0)"""
+    table = np.full(move_a.shape[0] * size_b, -1, dtype=np.int8)
+    table[0] = 0
+    frontier = np.array([0])
+    depth = 0
+    while len(frontier):
+        a, b = np.divmod(frontier, size_b)
+        depth += 1
+        for m in moves:
+            reached = move_a[a, m] * size_b + move_b[b, m]
+            table[reached[table[reached] < 0]] = depth
+        frontier = np.flatnonzero(table == depth)
+    return table
+
+
+def first_occurrences(values):
+    """Index of the first occurrence of each distinct value, in value order"""
+    order = np.argsort(values, kind='stable')
+    ordered = values[order]
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = ordered[1:] != ordered[:-1]
+    return order[first]
+
+
+def build_distance_table(expand, depth, progress=None):
+    """Sorted keys of every state within depth moves of key 0, and their distances.
+
+    expand maps an array of keys to the (len(keys), moves) keys one move away.
+    progress, if given, is called with each level number as it is reached.
+    """
+    levels = [np.zeros(1, dtype=np.int64)]
+    seen = levels[0]
+    for level in range(1, depth + 1):
+        if progress:
+            progress(level)
+        reached = expand(levels[-1]).reshape(-1)
+        reached = reached[first_occurrences(reached)]
+        pos = np.minimum(np.searchsorted(seen, reached), len(seen) - 1)
+        levels.append(reached[seen[pos] != reached])
+        seen = np.sort(np.concatenate([seen, levels[-1]]))
+    depths = np.concatenate([np.full(len(keys), d, dtype=np.uint8) for d, keys in enumerate(levels)])
+    order = np.argsort(np.concatenate(levels))
+    return seen, depths[order]
+
+
+def lookup_depths(table_keys, table_depths, keys):
+    """Distance of each key from the table, or 255 when it is not tabled"""
+    keys = keys.astype(table_keys.dtype)
+    if len(keys) > 256:
+        # Sorted keys walk the table in order, which keeps big lookups cache friendly
+        order = np.argsort(keys)
+        pos = np.empty(len(keys), dtype=np.intp)
+        pos[order] = np.searchsorted(table_keys, keys[order])
+    else:
+        pos = np.searchsorted(table_keys, keys)
+    pos = np.minimum(pos, len(table_keys) - 1)
+    return np.where(table_keys[pos] == keys, table_depths[pos], 255)
+
+
+def phase1_key(twist, flip, comb):
+    """One number naming a phase-1 state, below 2**32"""
+    return (twist * N_FLIP + flip) * N_SLICE + comb
+
+
+def phase2_key(corner, edge8, slice_perm):
+    """One number naming a phase-2 state"""
+    return (corner * N_PERM8 + edge8) * 24 + slice_perm
+
+
+class TwoPhaseTables:
+    """Coordinate move tables and distance tables of the two-phase algorithm"""
+    def __init__(self, arrays):
+        # Plain views of memory-mapped arrays skip np.memmap's per-index overhead
+        for name, array in arrays.items():
+            setattr(self, name, np.asarray(array))
+
+        # Derived tables, cheap enough to rebuild on load
+        self.comb_move = self.slice_move[::24] // 24
+        self.corner2_move = self.corner_move[:, PHASE2_MOVES]
+        self.slice2_move = self.slice_move[:24, PHASE2_MOVES]
+
+    def phase1_expand(self, keys):
+        """Phase-1 keys one move away from each of keys"""
+        rest, comb = np.divmod(keys, N_SLICE)
+        twist, flip = np.divmod(rest, N_FLIP)
+        return phase1_key(self.twist_move[twist], self.flip_move[flip], self.comb_move[comb])
+
+    def phase2_expand(self, keys):
+        """Phase-2 keys one phase-2 move away from each of keys"""
+        rest, slice_perm = np.divmod(keys, 24)
+        corner, edge8 = np.divmod(rest, N_PERM8)
+        return phase2_key(self.corner2_move[corner], self.edge8_move[edge8], self.slice2_move[slice_perm])
+
+    @classmethod
+    def build(cls, progress=None):
+        """Build every table with NumPy, in a few seconds"""
+        report = progress or (lambda fraction, message: None)
+        cps = np.array([m[0] for m in MOVE_CUBIES])
+        cos = np.array([m[1] for m in MOVE_CUBIES])
+        eps = np.array([m[2] for m in MOVE_CUBIES])
+        eos = np.array([m[3] for m in MOVE_CUBIES])
+        arrays = {}
+
+        report(0.0, "move tables")
+        twists = decode_orientations(N_TWIST, 3, 8)
+        arrays['twist_move'] = np.stack([encode_twist((twists[:, cps[m]] + cos[m]) % 3)
+                                         for m in range(18)], axis=1)
+        flips = decode_orientations(N_FLIP, 2, 12)
+        arrays['flip_move'] = np.stack([encode_flip((flips[:, eps[m]] + eos[m]) % 2)
+                                        for m in range(18)], axis=1)
+
+        # Slice edges placed by every (positions, order) pair; other edges are
+        # irrelevant and left as 0
+        slice_eps = np.zeros((N_SLICE_SORTED, 12), dtype=np.int64)
+        orders = all_perms(4)
+        for rank, combo in enumerate(SLICE_COMBOS):
+            positions = sorted(combo)
+            slice_eps[rank * 24:(rank + 1) * 24, positions] = orders + 8
+        arrays['slice_move'] = np.stack([encode_slice_sorted(slice_eps[:, eps[m]])
+                                         for m in range(18)], axis=1)
+
+        perms8 = all_perms(8)
+        arrays['corner_move'] = np.stack([perm_rank(perms8[:, cps[m]]) for m in range(18)], axis=1)
+        arrays['edge8_move'] = np.stack([perm_rank(perms8[:, eps[m][:8]]) for m in PHASE2_MOVES], axis=1)
+
+        report(0.1, "pruning tables")
+        tables = cls(arrays)
+        arrays['corner_slice'] = build_pruning(tables.corner2_move, tables.slice2_move, 24, range(10))
+        arrays['edge8_slice'] = build_pruning(tables.edge8_move, tables.slice2_move, 24, range(10))
+
+        keys, arrays['phase1_depth'] = build_distance_table(
+            tables.phase1_expand, PHASE1_TABLE_DEPTH,
+            lambda level: report(0.15 + 0.6 * level / PHASE1_TABLE_DEPTH, f"phase 1 depth {level}"))
+        arrays['phase1_keys'] = keys.astype(np.uint32)
+        arrays['phase2_keys'], arrays['phase2_depth'] = build_distance_table(
+            tables.phase2_expand, PHASE2_TABLE_DEPTH,
+            lambda level: report(0.75 + 0.25 * level / PHASE2_TABLE_DEPTH, f"phase 2 depth {level}"))
+        return arrays
+
+    @classmethod
+    def load(cls, progress=None):
+        """Memory-mapped tables from the cache, generating them on first use"""
+        return cls(table_cache.get('twophase', 3, TWO_PHASE_VERSION, cls.build, progress))
+
+
+def cubie_cell(name, size, free=0):
+    """Grid cell of the cubie named by its face letters; unnamed axes get free"""
+    cell = [free, free, free]
+    for letter in name:
+        axis, positive = MOVE_AXES[letter]
+        cell[axis] = size - 1 if positive else 0
+    return cell
+
+
+def sticker_index(letter, cell, size):
+    """Flat facelet index of the sticker on face letter of the cubie at cell"""
+    face = FACE_LETTERS[letter]
+    a, b = FACE_GRID_AXES[face]
+    return (face * size + cell[a]) * size + cell[b]
+
+
+def corner_scheme(facelets):
+    """Face letter -> color, taken from the DBL corner and its opposites"""
+    size = facelets.shape[-1]
+    flat = facelets.reshape(-1)
+    cell = cubie_cell('DBL', size)
+    scheme = {letter: int(flat[sticker_index(letter, cell, size)]) for letter in 'DBL'}
+    for letter, opposite in zip('UFR', 'DBL'):
+        scheme[letter] = OPPOSITE_COLORS[scheme[opposite]]
+    return scheme
+
+
+def center_scheme(facelets):
+    """Face letter -> color of the fixed center on an odd cube"""
+    mid = facelets.shape[-1] // 2
+    return {letter: int(facelets[face, mid, mid]) for letter, face in FACE_LETTERS.items()}
+
+
+def read_corners(facelets, scheme):
+    """Corner permutation and twist relative to a face color scheme"""
+    size = facelets.shape[-1]
+    flat = facelets.reshape(-1)
+    letter_of = {color: letter for letter, color in scheme.items()}
+    if len(letter_of) != 6:
+        raise ValueError("Face colors are not all different")
+
+    cp, co = [0] * 8, [0] * 8
+    for i, name in enumerate(CORNER_NAMES):
+        cell = cubie_cell(name, size)
+        letters = [letter_of.get(int(flat[sticker_index(letter, cell, size)])) for letter in name]
+        for ori in range(3):
+            if letters[ori] in ('U', 'D'):
+                break
+        else:
+            raise ValueError(f"Corner {name} has no U or D sticker")
+        key = (letters[(ori + 1) % 3], letters[(ori + 2) % 3])
+        matches = [j for j, other in enumerate(CORNER_NAMES) if (other[1], other[2]) == key]
+        if not matches:
+            raise ValueError(f"Corner {name} has an impossible coloring")
+        cp[i], co[i] = matches[0], ori
+    return cp, co
+
+
+def read_edges(facelets, scheme, free):
+    """Edge permutation and flip, reading each edge's sticker at index free"""
+    size = facelets.shape[-1]
+    flat = facelets.reshape(-1)
+    letter_of = {color: letter for letter, color in scheme.items()}
+
+    ep, eo = [0] * 12, [0] * 12
+    for i, name in enumerate(EDGE_NAMES):
+        cell = cubie_cell(name, size, free)
+        letters = ''.join(letter_of.get(int(flat[sticker_index(letter, cell, size)]), '?') for letter in name)
+        if letters in EDGE_NAMES:
+            ep[i], eo[i] = EDGE_NAMES.index(letters), 0
+        elif letters[::-1] in EDGE_NAMES:
+            ep[i], eo[i] = EDGE_NAMES.index(letters[::-1]), 1
+        else:
+            raise ValueError(f"Edge {name} has an impossible coloring")
+    return ep, eo
+
+
+def check_cubie(cubie):
+    """Raise ValueError unless the cubie state can be reached by face turns"""
+    cp, co, ep, eo = cubie
+    if sorted(cp) != list(range(8)) or sorted(ep) != list(range(12)):
+        raise ValueError("Cube has duplicated or missing pieces")
+    if sum(co) % 3:
+        raise ValueError("Cube has a twisted corner")
+    if sum(eo) % 2:
+        raise ValueError("Cube has a flipped edge")
+    if perm_parity(cp) != perm_parity(ep):
+        raise ValueError("Cube has two pieces swapped")
+
+
+def merge_turns(solution):
+    """Join neighbouring two-phase moves of the same face"""
+    merged = []
+    for m in solution:
+        if merged and merged[-1] // 3 == m // 3:
+            face, power = m // 3, (merged.pop() % 3 + m % 3 + 2) % 4
+            if power:
+                merged.append(3 * face + power - 1)
+        else:
+            merged.append(m)
+    return merged
+
+
+def search_moves(solution):
+    """Two-phase move numbers to (face, 0, clockwise) quarter turns"""
+    moves = []
+    for m in solution:
+        face, power = SEARCH_FACES[m // 3], m % 3 + 1
+        if power == 3:
+            moves.append((face, 0, False))
+        else:
+            moves.extend([(face, 0, True)] * power)
+    return moves
+
+
+def table_path(key, depth, expand, table_keys, table_depths):
+    """Moves taking a tabled key at depth down to key 0"""
+    path = []
+    while depth:
+        neighbours = expand(np.array([key]))[0]
+        m = int(np.argmax(lookup_depths(table_keys, table_depths, neighbours) == depth - 1))
+        path.append(m)
+        key, depth = neighbours[m], depth - 1
+    return path
+
+
+def forward_path(parents, level, index, moves):
+    """Moves leading from the start to entry index of a forward search level"""
+    path = []
+    for parent in reversed(parents[1:level + 1]):
+        index, m = divmod(int(parent[index]), moves)
+        path.append(m)
+    path.reverse()
+    return path
+
+
+def read_cubie(facelets):
+    """Cubie state (cp, co, ep, eo) of a (6, 3, 3) or (6, 2, 2) facelet array"""
+    size = facelets.shape[-1]
+    if size == 3:
+        scheme = center_scheme(facelets)
+        cp, co = read_corners(facelets, scheme)
+        ep, eo = read_edges(facelets, scheme, 1)
+    elif size == 2:
+        # Corners only: virtual edges get whichever parity matches
+        scheme = corner_scheme(facelets)
+        cp, co = read_corners(facelets, scheme)
+        ep, eo = list(range(12)), [0] * 12
+        if perm_parity(cp):
+            ep[0], ep[1] = 1, 0
+    else:
+        raise ValueError(f"The two-phase solver handles 2x2 and 3x3 cubes, not {size}x{size}")
+
+    check_cubie((cp, co, ep, eo))
+    return cp, co, ep, eo
+
+
+class TwoPhaseSolver:
+    """Kociemba's two-phase algorithm for 3x3 (and 2x2) cubes.
+
+    Both phases meet in the middle: a vectorized breadth-first search from the
+    scrambled state is matched against tables of every state a few moves from
+    the goal. Solution lengths count face turns, a half turn being one move.
+    """
+    def __init__(self, tables=None):
+        if tables is None:
+            tables = TwoPhaseTables.load()
+        self.tables = tables
+
+    def solve_facelets(self, facelets, max_length=25, time_limit=1.0):
+        """Solve a (6, 3, 3) or (6, 2, 2) facelet array"""
+        found = self.solve_cubie(read_cubie(facelets), max_length, time_limit)
+        if found is None:
+            raise ValueError("No solution found")
+        return search_moves(found)
+
+    def solve_cubie(self, cubie, max_length=25, time_limit=1.0):
+        """Two-phase move numbers solving a cubie state.
+
+        Returns the first solution of max_length moves or fewer, otherwise the
+        shortest one found once time_limit seconds have passed.
+        """
+        tables = self.tables
+        cp, co, ep, eo = cubie
+        start = phase1_key(int(encode_twist(co)), int(encode_flip(eo)),
+                           int(encode_slice_sorted(ep)) // 24)
+        deadline = time.perf_counter() + time_limit
+        self.tried = {}
+        best = None
+
+        levels, parents = [np.array([start])], [None]
+        for forward in range(PHASE1_FORWARD + 1):
+            if forward:
+                reached = tables.phase1_expand(levels[-1]).reshape(-1)
+                keep = first_occurrences(reached)
+                levels.append(reached[keep])
+                parents.append(keep)
+
+            depths = lookup_depths(tables.phase1_keys, tables.phase1_depth, levels[-1])
+            hits = np.flatnonzero(depths < 255)
+            for index in hits[np.argsort(depths[hits], kind='stable')].tolist():
+                length1 = forward + int(depths[index])
+                if best is not None and length1 >= len(best):
+                    break
+                path1 = forward_path(parents, forward, index, 18)
+                path1 += table_path(int(levels[forward][index]), length1 - forward, tables.phase1_expand,
+                                    tables.phase1_keys, tables.phase1_depth)
+
+                limit = (len(best) - 1 if best is not None else 30) - length1
+                path2 = self.phase2(cubie, path1, limit, max_length - length1)
+                if path2 is not None:
+                    best = merge_turns(path1 + path2)
+                    if len(best) <= max_length:
+                        return best
+                if best is not None and time.perf_counter() > deadline:
+                    return best
+        return best
+
+    def phase2(self, cubie, path1, limit, enough):
+        """Phase-2 move numbers finishing cubie after path1, or None.
+
+        Returns the shortest path of at most limit moves, or the first one
+        found of at most enough moves.
+        """
+        limit = min(limit, PHASE2_LIMIT)
+        if limit < 0:
+            return None
+        for m in path1:
+            cubie = multiply(cubie, MOVE_CUBIES[m])
+        cp, _, ep, _ = cubie
+        start = phase2_key(int(perm_rank(cp)), int(perm_rank(ep[:8])), int(encode_slice_sorted(ep)))
+
+        # Different phase-1 paths often end on the same state
+        if self.tried.get(start, -1) >= limit:
+            return None
+        self.tried[start] = limit
+
+        tables = self.tables
+        levels, parents = [np.array([start])], [None]
+        best = None
+        for forward in range(min(limit, PHASE2_FORWARD) + 1):
+            if best is not None and (forward >= best[0] or best[0] <= enough):
+                break
+            if forward:
+                last = PHASE2_FACES[parents[-1] % 10] if forward > 1 else np.full(len(levels[-1]), 6)
+                follows = np.flatnonzero(PHASE2_FOLLOWS[last])
+                levels.append(tables.phase2_expand(levels[-1]).reshape(-1)[follows])
+                parents.append(follows)
+
+            # Drop states the pruning tables prove too far away; parents keep
+            # each survivor's index into the previous level times 10 plus its move
+            rest, slice_perm = np.divmod(levels[-1], 24)
+            corner, edge8 = np.divmod(rest, N_PERM8)
+            bound = np.maximum(tables.corner_slice[corner * 24 + slice_perm],
+                               tables.edge8_slice[edge8 * 24 + slice_perm])
+            near = np.flatnonzero(bound <= limit - forward)
+            if not len(near):
+                break
+            levels[-1] = levels[-1][near]
+            if forward:
+                parents[-1] = parents[-1][near]
+
+            depths = lookup_depths(tables.phase2_keys, tables.phase2_depth, levels[-1])
+            index = int(np.argmin(depths))
+            length = forward + int(depths[index])
+            if length <= limit and (best is None or length < best[0]):
+                best = (length, forward, index)
+        if best is None:
+            return None
+
+        length, forward, index = best
+        path = forward_path(parents, forward, index, 10)
+        path += table_path(int(levels[forward][index]), length - forward, tables.phase2_expand,
+                           tables.phase2_keys, tables.phase2_depth)
+        return [PHASE2_MOVES[i] for i in path]
+
+
+def inverse(move):
+    """Inverse of an (axis, index, positive) slice turn"""
+    axis, index, positive = move
+    return axis, index, not positive
+
+
+def build_orbit_library(ref_size, rep_sticker, slice_indices):
+    """Arrays describing one orbit kind: its slots and a move sequence per 3-cycle.
+
+    Pure 3-cycles are found on a small reference cube; conjugating a base
+    commutator by single moves reaches every directed 3-cycle of the orbit.
+    """
+    tables = get_move_tables(ref_size)
+    faces = [(axis, index, positive) for axis in range(3) for index in (0, ref_size - 1)
+             for positive in (True, False)]
+    slices = [(axis, index, positive) for axis in range(3) for index in slice_indices
+              for positive in (True, False)]
+    moves = faces + slices
+    perms = {m: tables.move_perm(*slice_move(*m, ref_size)) for m in moves}
+
+    # Stickers the representative can reach
+    orbit = {rep_sticker}
+    frontier = [rep_sticker]
+    while frontier:
+        reached = {int(perms[m][s]) for m in moves for s in frontier} - orbit
+        orbit |= reached
+        frontier = list(reached)
+
+    # A wing cannot flip in place, so its other sticker rides along in a
+    # second orbit; label 0 is always the orbit sticker
+    stickers_at = {}
+    for sticker, cell in enumerate(map(tuple, tables.sticker_cells)):
+        stickers_at.setdefault(cell, []).append(sticker)
+    slots = np.array([[s] + [t for t in stickers_at[tuple(tables.sticker_cells[s])] if t != s]
+                      for s in sorted(orbit)])
+    slot_of = {int(s): i for i, s in enumerate(slots[:, 0])}
+    slot_maps = {m: [slot_of[int(perms[m][s])] for s in slots[:, 0]] for m in moves}
+
+    base_cycle, base = find_base_cycle(perms, moves, slices, slots, slot_of)
+
+    # Breadth-first conjugation keeps the sequences short
+    cycles = {base_cycle: base}
+    frontier = [base_cycle]
+    while frontier:
+        next_frontier = []
+        for cycle in frontier:
+            for m in moves:
+                moved = tuple(slot_maps[m][s] for s in cycle)
+                if not any(key in cycles for key in rotations(moved)):
+                    cycles[moved] = [m] + cycles[cycle] + [inverse(m)]
+                    next_frontier.append(moved)
+        frontier = next_frontier
+
+    keys = list(cycles)
+    sequences = [cycles[key] for key in keys]
+    return {
+        'slots': slots,
+        'cycle_keys': np.array(keys, dtype=np.int16),
+        'cycle_starts': np.cumsum([0] + [len(seq) for seq in sequences]).astype(np.int32),
+        'cycle_moves': np.array([m for seq in sequences for m in seq], dtype=np.int16),
+    }
+
+
+def find_base_cycle(perms, moves, slices, slots, slot_of):
+    """First commutator [A, P Q P'] that 3-cycles pieces of one orbit only"""
+    per_piece = slots.shape[1]
+    orbit = set(slots.reshape(-1).tolist())
+    labelled = set(slots[:, 0].tolist())
+    identity = np.arange(len(perms[moves[0]]))
+
+    for a in slices:
+        for p in moves:
+            for q in moves:
+                seq = [a, p, q, inverse(p), inverse(a), p, inverse(q), inverse(p)]
+                perm = identity
+                for m in seq:
+                    perm = perm[perms[m]]
+                support = np.flatnonzero(perm != identity).tolist()
+                if len(support) != 3 * per_piece or not set(support) <= orbit:
+                    continue
+                # Follow label-0 stickers: perm[d] is the sticker moving to d
+                cycle = {slot_of[int(perm[d])]: slot_of[d] for d in support if d in labelled}
+                first = next(iter(cycle))
+                return (first, cycle[first], cycle[cycle[first]]), seq
+    raise RuntimeError("No pure 3-cycle found for this orbit")
+
+
+def rotations(cycle):
+    """The three ways of writing a directed 3-cycle"""
+    a, b, c = cycle
+    return (a, b, c), (b, c, a), (c, a, b)
+
+
+class OrbitLibrary:
+    """Pure 3-cycles of one kind of center or wing orbit.
+
+    The cycles come from a small reference cube and carry over to any orbit
+    of the same kind on a larger cube by renaming layer indices, since the
+    moves act on the orbit the same way whatever the layers are.
+    """
+    def __init__(self, ref_size, arrays):
+        self.ref_size = ref_size
+        self.slots = np.asarray(arrays['slots'])
+        starts = arrays['cycle_starts'].tolist()
+        moves = [(axis, index, bool(positive)) for axis, index, positive in arrays['cycle_moves'].tolist()]
+
+        # Cycle (q, p, r) sends q's piece to p, p's to r and r's to q
+        self.cycles = {}
+        for k, cycle in enumerate(arrays['cycle_keys'].tolist()):
+            seq = moves[starts[k]:starts[k + 1]]
+            for key in rotations(cycle):
+                self.cycles[key] = seq
+
+    def place(self, coord_map, size):
+        """Flat sticker indices of the orbit's slots on a size-N cube"""
+        ref = self.ref_size
+        face, i, j = np.unravel_index(self.slots, (6, ref, ref))
+        return (face * size + coord_map[i]) * size + coord_map[j]
+
+    def cycle_moves(self, key, coord_map, size):
+        """A library 3-cycle as (face, layer, clockwise) moves on a size-N cube"""
+        return [slice_move(axis, int(coord_map[index]), positive, size)
+                for axis, index, positive in self.cycles[key]]
+
+
+# Orbit kinds: (reference size, representative front-face sticker (x, y), slice indices)
+ORBIT_KINDS = {
+    'wing': (4, (1, 3), [1, 2]),
+    'x-center': (4, (1, 1), [1, 2]),
+    '+-center': (5, (1, 2), [1, 2, 3]),
+    'oblique': (6, (1, 2), [1, 2, 3, 4]),
+    'oblique-mirror': (6, (2, 1), [1, 2, 3, 4]),
+}
+
+_libraries = {}
+
+
+def get_library(kind):
+    """Shared OrbitLibrary of one orbit kind, from the table cache"""
+    if kind not in _libraries:
+        ref_size = ORBIT_KINDS[kind][0]
+        arrays = table_cache.get(f"orbit-{kind}", ref_size, ORBIT_VERSION, orbit_builder(kind))
+        _libraries[kind] = OrbitLibrary(ref_size, arrays)
+    return _libraries[kind]
+
+
+def orbit_builder(kind):
+    """Table-cache build function for one orbit kind"""
+    ref_size, (x, y), slice_indices = ORBIT_KINDS[kind]
+    return lambda progress: build_orbit_library(ref_size, x * ref_size + y, slice_indices)
+
+
+class ReductionSolver:
+    """Reduction method for NxN cubes (N >= 4).
+
+    Wing orbit parity is fixed first with single slice turns, then every
+    center orbit and every wing orbit is solved piece by piece with pure
+    3-cycles, and the resulting 3x3 is finished by the two-phase solver.
+    """
+    def __init__(self, size, two_phase=None):
+        if size < 4:
+            raise ValueError("The reduction solver handles cubes of size 4 and up")
+        self.size = size
+        self.two_phase = two_phase
+        n = size
+        self.inner = [k for k in range(1, n - 1) if 2 * k < n - 1]
+        self.mid = n // 2 if n % 2 else None
+
+    def orbits(self):
+        """(kind, coord_map) of every center and wing orbit"""
+        n = self.size
+        last = n - 1
+        orbits = []
+        for k in self.inner:
+            orbits.append(('wing', np.array([0, k, last - k, last])))
+        for a in self.inner:
+            orbits.append(('x-center', np.array([0, a, last - a, last])))
+            if self.mid is not None:
+                orbits.append(('+-center', np.array([0, a, self.mid, last - a, last])))
+            for b in self.inner:
+                lo, hi = min(a, b), max(a, b)
+                coord_map = np.array([0, lo, hi, last - hi, last - lo, last])
+                if a < b:
+                    orbits.append(('oblique', coord_map))
+                elif a > b:
+                    orbits.append(('oblique-mirror', coord_map))
+        return orbits
+
+    def target_colors(self, facelets, scheme):
+        """Color every sticker should end up with after reduction"""
+        n = self.size
+        target = np.zeros_like(facelets)
+        for letter, face in FACE_LETTERS.items():
+            target[face] = scheme[letter]
+
+        if self.mid is not None:
+            # Wings pair up with the middle edge already in place
+            mid = self.mid
+            for face in range(6):
+                target[face, 0, 1:-1] = facelets[face, 0, mid]
+                target[face, -1, 1:-1] = facelets[face, -1, mid]
+                target[face, 1:-1, 0] = facelets[face, mid, 0]
+                target[face, 1:-1, -1] = facelets[face, mid, -1]
+        else:
+            # Even cubes: with odd corner parity the edges must end one quarter
+            # turn away from home, or the 3x3 stage would be unsolvable
+            cp, _ = read_corners(facelets, scheme)
+            if perm_parity(cp):
+                target = get_move_tables(n).turn(target, 'U', 0, True)
+        return target
+
+    def solve(self, facelets):
+        """Moves that solve a (6, N, N) facelet array"""
+        solution, reduced = self.reduce(facelets)
+        if self.two_phase is None:
+            self.two_phase = get_two_phase_solver()
+        return solution + self.two_phase.solve_facelets(reduced)
+
+    def reduce(self, facelets):
+        """(moves, 3x3 facelets): moves pairing centers and wings, and the 3x3 left"""
+        n = self.size
+        state = facelets.copy()
+        scheme = center_scheme(state) if self.mid is not None else corner_scheme(state)
+        target = self.target_colors(state, scheme)
+        tables = get_move_tables(n)
+        solution = []
+
+        orbits = [(kind, coord_map, get_library(kind)) for kind, coord_map in self.orbits()]
+
+        # A quarter turn of slice k is a 4-cycle of wing orbit k, which
+        # fixes an odd orbit; the centers it disturbs are solved next
+        for kind, coord_map, library in orbits:
+            if kind != 'wing':
+                continue
+            slots = library.place(coord_map, n)
+            if self.wing_parity(state.reshape(-1), target.reshape(-1), slots):
+                move = slice_move(0, int(coord_map[1]), True, n)
+                state = tables.turn(state, *move)
+                solution.append(move)
+
+        flat = state.reshape(-1).copy()
+        goal = target.reshape(-1)
+        for kind, coord_map, library in orbits:
+            if kind != 'wing':
+                solution += self.solve_centers(flat, goal, library, coord_map)
+        for kind, coord_map, library in orbits:
+            if kind == 'wing':
+                solution += self.solve_wings(flat, goal, library, coord_map)
+
+        # What is left behaves like a 3x3 turned by its outer layers
+        state = flat.reshape(state.shape)
+        index = [0, self.mid if self.mid is not None else 1, n - 1]
+        return solution, state[:, index][:, :, index]
+
+    def wing_parity(self, flat, goal, slots):
+        """Parity of the permutation taking a wing orbit to its target"""
+        pieces = {tuple(flat[slot]): i for i, slot in enumerate(slots)}
+        try:
+            perm = [pieces[tuple(goal[slot])] for slot in slots]
+        except KeyError:
+            raise ValueError("Cube has an impossible edge coloring")
+        return perm_parity(perm)
+
+    def solve_centers(self, flat, goal, library, coord_map):
+        """Place every center of one orbit, updating flat in place"""
+        n = self.size
+        slots = library.place(coord_map, n)[:, 0]
+        colors = flat[slots].tolist()
+        targets = goal[slots].tolist()
+        count = len(slots)
+        moves = []
+
+        for p in range(count):
+            if colors[p] == targets[p]:
+                continue
+            # Take the needed color from a slot that does not want it, and
+            # send p's color to a slot that wants it, ideally a wrong one
+            sources = [q for q in range(p + 1, count) if colors[q] == targets[p]]
+            q = next((q for q in sources if colors[q] != targets[q]), sources[0])
+            sinks = [r for r in range(count) if r not in (p, q) and targets[r] == colors[p]]
+            r = next((r for r in sinks if r > p and colors[r] != targets[r]), sinks[0])
+
+            moves += library.cycle_moves((q, p, r), coord_map, n)
+            colors[p], colors[r], colors[q] = colors[q], colors[p], colors[r]
+
+        flat[slots] = colors
+        return moves
+
+    def solve_wings(self, flat, goal, library, coord_map):
+        """Place every wing of one orbit, updating flat in place"""
+        n = self.size
+        slots = library.place(coord_map, n)
+        colors = [tuple(c) for c in flat[slots].tolist()]
+        targets = [tuple(c) for c in goal[slots].tolist()]
+        count = len(slots)
+        moves = []
+
+        for p in range(count):
+            if colors[p] == targets[p]:
+                continue
+            q = colors.index(targets[p], p + 1)
+            rest = [r for r in range(p + 1, count) if r != q]
+            r = next((r for r in rest if targets[r] == colors[p]), rest[0])
+
+            moves += library.cycle_moves((q, p, r), coord_map, n)
+            colors[p], colors[r], colors[q] = colors[q], colors[p], colors[r]
+
+        flat[slots] = np.array(colors)
+        return moves
+
+
+_two_phase_solver = None
+
+
+def solver_tables():
+    """(kind, size, version, build) of every table set the solvers use"""
+    sets = [('twophase', 3, TWO_PHASE_VERSION, TwoPhaseTables.build)]
+    for kind, (ref_size, _, _) in ORBIT_KINDS.items():
+        sets.append((f"orbit-{kind}", ref_size, ORBIT_VERSION, orbit_builder(kind)))
+    return sets
+
+
+def tables_ready():
+    """True once every solver table set is on disk"""
+    return all(table_cache.exists(kind, size, version) for kind, size, version, _ in solver_tables())
+
+
+def prepare_tables(progress=None):
+    """Start generating missing solver tables in the background.
+
+    progress(fraction, message) is called from the build threads; returns
+    the builds in flight, empty when everything is cached already.
+    """
+    builds = []
+    for kind, size, version, build in solver_tables():
+        if not table_cache.exists(kind, size, version):
+            report = None
+            if progress:
+                report = lambda fraction, message, kind=kind: progress(fraction, f"{kind} {message}")
+            builds.append(table_cache.generate(kind, size, version, build, report))
+    return builds
+
+
+def get_two_phase_solver():
+    """Shared TwoPhaseSolver, loading or building its tables on first use"""
+    global _two_phase_solver
+    if _two_phase_solver is None:
+        _two_phase_solver = TwoPhaseSolver()
+    return _two_phase_solver
+
+
+def solve(cube, max_length=25, time_limit=1.0):
+    """Move list that solves a RubiksCube from its current state"""
+    facelets = cube.facelets
+    if facelets_solved(facelets):
+        return []
+    if cube.size <= 3:
+        moves = get_two_phase_solver().solve_facelets(facelets, max_length, time_limit)
+    else:
+        moves = ReductionSolver(cube.size).solve(facelets)
+    return simplify_moves(moves, cube.size)
+
+
+def search_from(cubie, first, max_length, time_limit):
+    """Worker task: two-phase move numbers solving cubie that start with move first"""
+    solver = get_two_phase_solver()
+    if first is None:
+        return solver.solve_cubie(cubie, max_length, time_limit)
+    found = solver.solve_cubie(multiply(cubie, MOVE_CUBIES[first]), max_length - 1, time_limit)
+    return merge_turns([first] + found) if found is not None else None
+
+
+def reduce_facelets(facelets):
+    """Worker task: ReductionSolver.reduce() for a (6, N, N) facelet array"""
+    return ReductionSolver(facelets.shape[-1]).reduce(facelets)
+
+
+class SolverPool:
+    """Solver searches spread over a pool of worker processes.
+
+    Workers memory-map the same cached table files, so the tables are shared
+    read-only through the OS page cache instead of copied per process. A 3x3
+    search is split by first move: one task starts from the scramble and one
+    from each of the 18 states a move away, each with its share of the time
+    budget, and the shortest solution wins. Larger cubes are reduced in a
+    worker first. Results come back as futures, resolved by a waiting thread.
+    """
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.lock = threading.Lock()
+        self.executor = self.start_executor()
+
+    def start_executor(self):
+        # Spawned workers start clean instead of inheriting the GL and Tk state of a fork
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def restart(self, broken):
+        """Replace a broken executor, unless another search already has"""
+        with self.lock:
+            if self.executor is not broken:
+                return
+            self.executor = self.start_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def solve(self, facelets, max_length=20, time_limit=1.0):
+        """Future of the move list that solves a (6, N, N) facelet array.
+
+        The search stops early at a solution of max_length moves or fewer,
+        otherwise it returns the shortest found within about time_limit seconds.
+        """
+        result = Future()
+        facelets = np.array(facelets)
+        if facelets_solved(facelets):
+            result.set_result([])
+        else:
+            threading.Thread(target=self.run, args=(facelets, max_length, time_limit, result),
+                             daemon=True).start()
+        return result
+
+    def run(self, facelets, max_length, time_limit, result):
+        executor = self.executor
+        try:
+            size = facelets.shape[-1]
+            solution = []
+            if size > 3:
+                solution, facelets = executor.submit(reduce_facelets, facelets).result()
+            solution += self.search(read_cubie(facelets), max_length, time_limit, executor)
+            result.set_result(simplify_moves(solution, size))
+        except BrokenProcessPool as error:
+            # A worker died, for example out of memory; later searches get a fresh pool
+            self.restart(executor)
+            result.set_exception(error)
+        except Exception as error:
+            result.set_exception(error)
+
+    def search(self, cubie, max_length, time_limit, executor=None):
+        """Shortest solution of cubie over one worker task per first move"""
+        executor = executor or self.executor
+        starts = [None] + list(range(18))
+        budget = time_limit * self.workers / len(starts)
+        pending = {executor.submit(search_from, cubie, first, max_length, budget) for first in starts}
+        best = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for task in done:
+                found = task.result()
+                if found is not None and (best is None or len(found) < len(best)):
+                    best = found
+            if best is not None and len(best) <= max_length:
+                for task in pending:
+                    task.cancel()
+                break
+        if best is None:
+            raise ValueError("No solution found")
+        return search_moves(best)
+
+    def shutdown(self):
+        """Stop the workers, dropping searches that have not started"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,118 @@
+"""Symmetry reduction of cube states.
+
+The 48 symmetries of the cube (24 rotations, each optionally mirrored) act
+on a facelet array by moving stickers and recoloring them, so a solved cube
+stays solved. States related by a symmetry behave the same way under moves,
+so tables and caches only need to store one canonical representative: the
+lexicographically smallest transformed state. Optionally any recoloring is
+allowed too, with colors renumbered by their first appearance.
+
+Every function here works on one (6, N, N) array or an (M, 6, N, N) batch.
+"""
+import numpy as np
+
+from cubeGeometry import FACE_NORMALS, SYMMETRY_MATRICES
+
+
+class CubeSymmetries:
+    """Sticker permutations and color maps of the 48 symmetries for one cube size"""
+    def __init__(self, tables):
+        n = tables.size
+        self.size = n
+        self.length = 6 * n * n
+        matrices = SYMMETRY_MATRICES
+
+        # Doubled sticker coordinates centered on the cube, so they stay integer
+        normals = np.array(FACE_NORMALS)
+        faces = np.repeat(np.arange(6), n * n)
+        coords = 2 * tables.sticker_cells - (n - 1) + normals[faces]
+
+        # new_flat = old_flat[perms[s]] moves the sticker at x to matrix @ x
+        keys = self.encode(coords)
+        order = np.argsort(keys)
+        sources = np.einsum('sji,pj->spi', matrices, coords)  # matrix.T @ x for every sticker
+        self.perms = order[np.searchsorted(keys[order], self.encode(sources))]
+
+        # A color is named after its home face, which the symmetry moves too
+        turned = np.einsum('sij,cj->sci', matrices, normals)
+        self.color_maps = np.array([[FACE_NORMALS.index(tuple(v)) for v in row]
+                                    for row in turned.tolist()], dtype=np.uint8)
+
+        # Index of each symmetry's inverse, whose matrix is its transpose
+        flat = matrices.reshape(48, -1)
+        self.inverse = np.array([np.flatnonzero((flat == m.T.reshape(-1)).all(axis=1))[0]
+                                 for m in matrices])
+
+    def encode(self, coords):
+        """One integer per doubled coordinate triple"""
+        shifted = coords + self.size + 1
+        span = 2 * self.size + 3
+        return (shifted[..., 0] * span + shifted[..., 1]) * span + shifted[..., 2]
+
+    def apply(self, facelets, symmetry, colors=None):
+        """Transform facelets by one symmetry; colors overrides its color map"""
+        facelets = np.asarray(facelets)
+        flat = facelets.reshape(-1, self.length)
+        colors = self.color_maps[symmetry] if colors is None else np.asarray(colors)
+        return colors[flat[:, self.perms[symmetry]]].reshape(facelets.shape)
+
+    def canonicalize(self, facelets, recolor=False):
+        """(canonical facelets, symmetry, color map) for one state or a batch.
+
+        Without recolor the color map is the symmetry's own, so the canonical
+        state is reached by apply(facelets, symmetry). With recolor, colors
+        are renumbered by first appearance after the symmetry, and
+        apply(facelets, symmetry, color_map) gives the canonical state.
+        """
+        facelets = np.asarray(facelets)
+        flat = facelets.reshape(-1, self.length)
+        count = len(flat)
+        candidates = flat[:, self.perms]  # (M, 48, L)
+
+        if recolor:
+            # Color ranks in order of first appearance, absent colors last
+            present = candidates[..., None] == np.arange(6, dtype=candidates.dtype)
+            first = np.where(present.any(axis=2), present.argmax(axis=2), self.length)
+            order = np.argsort(first, axis=-1, kind='stable')
+            color_maps = np.empty_like(order, dtype=np.uint8)
+            np.put_along_axis(color_maps, order, np.arange(6, dtype=np.uint8), axis=-1)
+        else:
+            color_maps = np.broadcast_to(self.color_maps, (count, 48, 6))
+        candidates = np.take_along_axis(color_maps, candidates.astype(np.intp), axis=2)
+
+        # Equal-length byte strings order lexicographically; shift colors off
+        # zero since trailing zero bytes are ignored in comparisons
+        keys = np.ascontiguousarray(candidates + 1, dtype=np.uint8).view(f"S{self.length}")[..., 0]
+        best = keys.argmin(axis=1)
+        rows = np.arange(count)
+        canonical = candidates[rows, best].astype(facelets.dtype).reshape(facelets.shape)
+        color_maps = color_maps[rows, best]
+        if facelets.ndim == 3:
+            return canonical, int(best[0]), color_maps[0]
+        return canonical, best, color_maps
+
+    def transform_turns(self, turns, symmetry):
+        """Conjugate (axis, index, positive) slice turns by a symmetry.
+
+        Turns that take a state s to u become turns taking apply(s) to
+        apply(u); the inverse symmetry maps them back.
+        """
+        matrix = SYMMETRY_MATRICES[symmetry]
+        mirror = round(np.linalg.det(matrix)) < 0
+        transformed = []
+        for axis, index, positive in turns:
+            new_axis = int(np.flatnonzero(matrix[:, axis])[0])
+            flipped = matrix[new_axis, axis] < 0
+            transformed.append((new_axis, self.size - 1 - index if flipped else index,
+                                positive != (flipped != mirror)))
+        return transformed
+
+
+_symmetries = {}
+
+
+def get_symmetries(tables):
+    """Shared CubeSymmetries for the cube size of a MoveTables, built on first use"""
+    if tables.size not in _symmetries:
+        _symmetries[tables.size] = CubeSymmetries(tables)
+    return _symmetries[tables.size]
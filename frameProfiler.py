@@ -0,0 +1,177 @@
+"""Per-frame timing of the main loop, to find where frame time goes.
+
+The loop calls mark() at the end of each stage, which charges the time since
+the previous mark to that stage. Stats cover a rolling window of frames.
+While the profiler is disabled every probe returns at once, so the probes
+stay in the loop for good. GL work is queued during the draw stage but often
+waited for in the flip, so a slow flip usually means a heavy draw.
+
+Traces use the Chrome trace event format, which chrome://tracing and
+Perfetto open directly.
+"""
+import json
+import time
+from collections import deque
+import numpy as np
+
+# Frames kept for the rolling stats, and seconds between summary refreshes
+WINDOW_FRAMES = 120
+SUMMARY_INTERVAL = 0.5
+
+
+class FrameProfiler:
+    """Rolling per-stage frame timings and counters, optionally traced to a file"""
+    def __init__(self, window=WINDOW_FRAMES):
+        self.enabled = False
+        self.window = window
+        self.stages = {}  # Stage name -> deque of seconds, in first-seen order
+        self.counters = {}  # Counter name -> value in the last frame
+        self.frame_start = None
+        self.last_mark = None
+        self.events = []  # (stage, start, end) of the current frame, kept while tracing
+        self.trace = None
+        self.trace_path = None
+        self.summary = ""  # Refreshed every SUMMARY_INTERVAL, safe to read from other threads
+        self.summary_time = 0.0
+
+    def enable(self, enabled=True):
+        """Start or stop collecting; stopping also closes any trace"""
+        if not enabled:
+            self.stop_trace()
+        self.enabled = enabled
+        self.stages = {}
+        self.counters = {}
+        self.frame_start = self.last_mark = None
+        self.summary = ""
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last_mark = time.perf_counter()
+        self.events = []
+
+    def mark(self, stage):
+        """Charge the time since the previous mark to stage"""
+        if not self.enabled or self.last_mark is None:
+            return
+        now = time.perf_counter()
+        self.record(stage, self.last_mark, now)
+        self.last_mark = now
+
+    def record(self, stage, start, end):
+        if stage not in self.stages:
+            self.stages[stage] = deque(maxlen=self.window)
+        self.stages[stage].append(end - start)
+        if self.trace:
+            self.events.append((stage, start, end))
+
+    def end_frame(self, counters=None):
+        """Close the frame; counters are per-frame figures such as draw calls"""
+        if not self.enabled or self.frame_start is None:
+            return
+        now = time.perf_counter()
+        self.record('frame', self.frame_start, now)
+        if counters:
+            self.counters.update(counters)
+        if self.trace:
+            self.write_frame()
+        self.frame_start = self.last_mark = None
+        if now - self.summary_time >= SUMMARY_INTERVAL:
+            self.summary = self.format_summary()
+            self.summary_time = now
+
+    def stats(self):
+        """{stage: {'mean', 'p95', 'max'}} in milliseconds over the window"""
+        result = {}
+        for stage, seconds in self.stages.items():
+            values = np.fromiter(seconds, dtype=float) * 1e3
+            result[stage] = {'mean': float(values.mean()),
+                             'p95': float(np.percentile(values, 95)),
+                             'max': float(values.max())}
+        return result
+
+    def format_summary(self):
+        """Fixed-width text lines of the stats and counters"""
+        stats = self.stats()
+        if not stats:
+            return ""
+        frame = stats.get('frame')
+        lines = [f"{1e3 / frame['mean']:5.1f} fps" if frame and frame['mean'] else "",
+                 f"{'ms':<10}{'mean':>7}{'p95':>7}{'max':>7}"]
+        lines += [f"{stage:<10}{values['mean']:7.2f}{values['p95']:7.2f}{values['max']:7.2f}"
+                  for stage, values in stats.items()]
+        lines += [f"{name.replace('_', ' '):<17}{value:>10,}" for name, value in self.counters.items()]
+        return "\n".join(line for line in lines if line)
+
+    def start_trace(self, path):
+        """Write every following frame to a trace file, enabling the profiler if needed"""
+        self.stop_trace()
+        if not self.enabled:
+            self.enable()
+        self.trace = open(path, 'w')
+        self.trace.write("[\n")
+        self.trace_path = path
+        self.trace_first = True
+
+    def write_frame(self):
+        """Append the current frame's stages and counters as trace events"""
+        records = [{'name': stage, 'ph': 'X', 'pid': 1, 'tid': 1,
+                    'ts': start * 1e6, 'dur': (end - start) * 1e6}
+                   for stage, start, end in self.events]
+        if self.counters:
+            records.append({'name': 'counters', 'ph': 'C', 'pid': 1,
+                            'ts': self.events[-1][2] * 1e6, 'args': self.counters})
+        text = ",\n".join(json.dumps(record) for record in records)
+        self.trace.write(text if self.trace_first else ",\n" + text)
+        self.trace_first = False
+
+    def stop_trace(self):
+        """Close the trace file; returns its path, or None if no trace was running"""
+        if not self.trace:
+            return None
+        self.trace.write("\n]\n")
+        self.trace.close()
+        self.trace = None
+        path, self.trace_path = self.trace_path, None
+        return path
+
+
+class PerfOverlay:
+    """Profiler summary drawn as text over the top-left corner of the GL view"""
+    def __init__(self, font_size=14):
+        import pygame
+        self.pygame = pygame
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.font = pygame.font.SysFont('monospace', font_size)
+        self.text = None
+        self.pixels = None
+        self.image_size = (0, 0)
+
+    def draw(self, text):
+        """Draw text lines at the top left; the image is only re-rendered when text changes"""
+        from OpenGL.GL import (GL_DEPTH_TEST, GL_RGBA, GL_UNSIGNED_BYTE, GL_VIEWPORT,
+                               glDisable, glDrawPixels, glEnable, glGetIntegerv, glWindowPos2i)
+        if not text:
+            return
+        if text != self.text:
+            pygame = self.pygame
+            lines = [self.font.render(line, True, (255, 255, 255)) for line in text.split("\n")]
+            width = max(line.get_width() for line in lines) + 12
+            height = sum(line.get_height() for line in lines) + 12
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 255))
+            y = 6
+            for line in lines:
+                surface.blit(line, (6, y))
+                y += line.get_height()
+            self.pixels = pygame.image.tostring(surface, 'RGBA', True)
+            self.image_size = (width, height)
+            self.text = text
+
+        width, height = self.image_size
+        viewport_height = glGetIntegerv(GL_VIEWPORT)[3]
+        glWindowPos2i(8, max(0, viewport_height - 8 - height))
+        glDisable(GL_DEPTH_TEST)
+        glDrawPixels(width, height, GL_RGBA, GL_UNSIGNED_BYTE, self.pixels)
+        glEnable(GL_DEPTH_TEST)
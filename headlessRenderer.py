@@ -0,0 +1,183 @@
+"""NumPy rendering of cube states into RGB arrays, with no window or GL context.
+
+Sticker quads are projected orthographically from the same camera angles as
+the GL view and rasterized in one vectorized pass: each quad tests the
+pixels of its bounding box, and a depth sort keeps the nearest quad at every
+pixel. The result maps pixels to sticker indices, so drawing a state is a
+single palette gather. The map of the resting cube is built once per size
+and view, which turns a batch of thumbnails into one gather as well;
+animation frames rasterize again with their turning slices rotated.
+"""
+import numpy as np
+
+from cubeGeometry import BACKGROUND_COLOR, FACE_NORMALS, STICKER_COLORS, sticker_quads
+from jazzCube import get_move_tables
+
+# Wireframe width as a fraction of a sticker, drawn on cubes up to BORDER_SIZE
+BORDER_WIDTH = 0.06
+BORDER_SIZE = 20
+
+# Candidate pixels tested per rasterization chunk
+CHUNK_PIXELS = 1 << 22
+
+
+def rotation_matrix(axis, degrees):
+    """Right-handed rotation about axis 0, 1 or 2, like glRotatef"""
+    angle = np.radians(degrees)
+    c, s = np.cos(angle), np.sin(angle)
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    matrix = np.eye(3)
+    matrix[i, i], matrix[i, j], matrix[j, i], matrix[j, j] = c, -s, s, c
+    return matrix
+
+
+class HeadlessRenderer:
+    """Renders states of one cube size into (height, width, 3) uint8 arrays"""
+    def __init__(self, size, width=128, height=128, rotation_x=20, rotation_y=45,
+                 cube_size=1.0, gap=0.1):
+        tables = get_move_tables(size)
+        self.size = size
+        self.width = width
+        self.height = height
+        self.sticker_cells = tables.sticker_cells
+        self.normals = np.array(FACE_NORMALS, dtype=float)[np.repeat(np.arange(6), size * size)]
+        self.border_width = BORDER_WIDTH if size <= BORDER_SIZE else 0.0
+        if not self.border_width:
+            # Without a wireframe the gaps would be noise, so stickers fill them
+            cube_size, gap = cube_size + gap, 0.0
+        self.quads = sticker_quads(self.sticker_cells, size, cube_size, gap)
+
+        # Map values past the stickers stand for the wireframe and the backdrop
+        self.length = 6 * size * size
+        self.border = self.length
+        self.background = self.length + 1
+
+        # Same model-view rotation as the GL camera; the whole cube fits the frame
+        self.view = rotation_matrix(0, rotation_x) @ rotation_matrix(1, rotation_y)
+        radius = size * (cube_size + gap) / 2 * np.sqrt(3)
+        self.scale = 0.95 * min(width, height) / (2 * radius)
+
+        self.resting = None
+
+    def palette(self, colors=None):
+        """(8, 3) uint8 colors: six stickers, the wireframe, the backdrop"""
+        colors = STICKER_COLORS if colors is None else colors
+        rows = list(colors) + [(0.0, 0.0, 0.0), BACKGROUND_COLOR]
+        return (np.asarray(rows, dtype=float) * 255).round().astype(np.uint8)
+
+    def sticker_map(self, rotation=None, progress=0.0):
+        """(height, width) sticker index seen at each pixel, or border / background.
+
+        rotation is a RubiksCube.current_rotation step, drawn progress of the
+        way through its quarter turns.
+        """
+        if rotation is None or not progress:
+            if self.resting is None:
+                self.resting = self.rasterize(self.quads, self.normals)
+            return self.resting
+
+        quads, normals = self.quads.copy(), self.normals.copy()
+        axis = rotation['axis']
+        slice_turns = np.zeros(self.size, dtype=np.int8)
+        for index, positive in rotation['turns'].items():
+            slice_turns[index] = 1 if positive else -1
+        turns = slice_turns[self.sticker_cells[:, axis]]
+        for turn in (1, -1):
+            moving = turns == turn
+            matrix = rotation_matrix(axis, turn * progress * 90)
+            quads[moving] = quads[moving] @ matrix.T
+            normals[moving] = normals[moving] @ matrix.T
+        return self.rasterize(quads, normals)
+
+    def rasterize(self, quads, normals):
+        """Pixel map of world-space sticker quads, nearest quad winning"""
+        width, height = self.width, self.height
+
+        # Stickers facing away from the camera are hidden behind their cubie
+        visible = np.flatnonzero(normals @ self.view[2] > 1e-6)
+        view = quads[visible] @ self.view.T
+        screen = np.stack([width / 2 + view[..., 0] * self.scale,
+                           height / 2 - view[..., 1] * self.scale,
+                           view[..., 2]], axis=-1)
+
+        # Each quad is a parallelogram: origin plus u * edge1 + v * edge2
+        origin = screen[:, 0]
+        edge1 = screen[:, 1] - origin
+        edge2 = screen[:, 3] - origin
+        det = edge1[:, 0] * edge2[:, 1] - edge1[:, 1] * edge2[:, 0]
+        low = np.floor(screen[..., :2].min(axis=1)).astype(int).clip(0, [width, height])
+        high = np.ceil(screen[..., :2].max(axis=1)).astype(int).clip(0, [width, height])
+        keep = (np.abs(det) > 1e-9) & (high > low).all(axis=1)
+        visible, origin, edge1, edge2 = visible[keep], origin[keep], edge1[keep], edge2[keep]
+        det, low = det[keep], low[keep]
+
+        sticker_map = np.full(width * height, self.background, dtype=np.intp)
+        if not len(visible):
+            return sticker_map.reshape(height, width)
+        box_width, box_height = (high[keep] - low).max(axis=0)
+        step = max(1, CHUNK_PIXELS // (box_width * box_height))
+
+        pixels, depths, values = [], [], []
+        for start in range(0, len(visible), step):
+            part = slice(start, start + step)
+            xs = low[part, 0, None, None] + np.arange(box_width)
+            ys = low[part, 1, None, None] + np.arange(box_height)[:, None]
+            dx = xs + 0.5 - origin[part, 0, None, None]
+            dy = ys + 0.5 - origin[part, 1, None, None]
+            d = det[part, None, None]
+            u = (dx * edge2[part, 1, None, None] - dy * edge2[part, 0, None, None]) / d
+            v = (edge1[part, 0, None, None] * dy - edge1[part, 1, None, None] * dx) / d
+            inside = (u >= 0) & (u < 1) & (v >= 0) & (v < 1) & (xs < width) & (ys < height)
+
+            quad, row, col = np.nonzero(inside)
+            u, v = u[quad, row, col], v[quad, row, col]
+            quad += start
+            pixels.append((low[quad, 1] + row) * width + low[quad, 0] + col)
+            depths.append(origin[quad, 2] + u * edge1[quad, 2] + v * edge2[quad, 2])
+            edge = np.minimum(np.minimum(u, 1 - u), np.minimum(v, 1 - v)) < self.border_width
+            values.append(np.where(edge, self.border, visible[quad]))
+
+        # Keep the nearest candidate of each pixel: the last after sorting by depth
+        pixels, depths, values = np.concatenate(pixels), np.concatenate(depths), np.concatenate(values)
+        order = np.lexsort((depths, pixels))
+        pixels, values = pixels[order], values[order]
+        last = np.append(pixels[1:] != pixels[:-1], True)
+        sticker_map[pixels[last]] = values[last]
+        return sticker_map.reshape(height, width)
+
+    def render(self, facelets, rotation=None, progress=0.0, colors=None):
+        """(height, width, 3) image of one (6, N, N) state"""
+        return self.render_batch(facelets[None], rotation, progress, colors)[0]
+
+    def render_batch(self, states, rotation=None, progress=0.0, colors=None):
+        """(M, height, width, 3) images of an (M, 6, N, N) batch, in one gather"""
+        states = np.asarray(states).reshape(len(states), -1)
+        extra = np.broadcast_to(np.array([6, 7], dtype=states.dtype), (len(states), 2))
+        codes = np.concatenate([states, extra], axis=1)
+        return self.palette(colors)[codes[:, self.sticker_map(rotation, progress)]]
+
+    def render_frames(self, facelets, rotation, progresses, colors=None):
+        """(F, height, width, 3) frames of one animation step at each progress"""
+        palette = self.palette(colors)
+        codes = np.concatenate([np.asarray(facelets).reshape(-1), [6, 7]])
+        return np.stack([palette[codes[self.sticker_map(rotation, progress)]]
+                         for progress in progresses])
+
+
+_renderers = {}
+
+
+def get_renderer(size, width=128, height=128, rotation_x=20, rotation_y=45):
+    """Shared HeadlessRenderer for a size and view, keeping its resting map"""
+    key = (size, width, height, rotation_x, rotation_y)
+    if key not in _renderers:
+        if len(_renderers) >= 16:
+            del _renderers[next(iter(_renderers))]
+        _renderers[key] = HeadlessRenderer(*key)
+    return _renderers[key]
+
+
+def render_thumbnails(states, width=128, height=128, rotation_x=20, rotation_y=45):
+    """(M, height, width, 3) thumbnails of an (M, 6, N, N) batch of states"""
+    states = np.asarray(states)
+    return get_renderer(states.shape[-1], width, height, rotation_x, rotation_y).render_batch(states)
@@ -1,16 +1,420 @@
-import pygame
-from pygame.locals import *
-from OpenGL.GL import *
-from OpenGL.GLU import *
-import random
-import sys
-import tkinter as tk
-from tkinter import ttk, messagebox
-import threading
-import queue
+"""Cube state and move engine, importable without any GUI or GL package.
+
+The window, control panel and GL renderer live in cubeApp and
+cubeRenderer, which are only imported by main() and RubiksCube.draw().
+"""
 import time
-import math
 import numpy as np
+from cubeGeometry import STICKER_COLORS
+from moveLog import MoveLog, read_move_file
+from stateHash import TranspositionCache, get_zobrist_keys
+from cubeSymmetry import get_symmetries
+
+# Facelet layout: facelets[face, i, j] is the color of one sticker. Faces are
+# ordered like the color scheme and (i, j) are the two grid coordinates that
+# vary across the face, taken in x, y, z order.
+FACE_NAMES = ['front', 'back', 'right', 'left', 'top', 'bottom']
+
+# Outer face and axis of each move, and whether that face sits on the
+# positive end of the axis
+MOVE_AXES = {
+    'R': (0, True), 'L': (0, False),
+    'U': (1, True), 'D': (1, False),
+    'F': (2, True), 'B': (2, False),
+}
+
+# Face order used when moves are numbered, see MoveTables.encode_move
+MOVE_FACES = ['R', 'L', 'U', 'D', 'F', 'B']
+
+# Sticker strips cycled by a positive quarter turn about each axis (counter-
+# clockwise seen from the positive end). Strip i moves to strip i+1 and is
+# reversed on the way when i is even.
+SLICE_RINGS = {
+    0: [(4, 'row'), (0, 'row'), (5, 'row'), (1, 'row')],  # top -> front -> bottom -> back
+    1: [(0, 'col'), (2, 'row'), (1, 'col'), (3, 'row')],  # front -> right -> back -> left
+    2: [(2, 'col'), (4, 'col'), (3, 'col'), (5, 'col')],  # right -> top -> left -> bottom
+}
+
+# Largest size whose move permutations are all built up front. Bigger cubes
+# turn slices in place, which costs O(N) per inner slice instead of O(N^2)
+PERM_TABLE_LIMIT = 20
+
+# Faces lying across each axis (positive end, negative end) and the np.rot90
+# count that matches a positive quarter turn of their grid
+AXIS_FACES = {0: (2, 3, 1), 1: (4, 5, -1), 2: (0, 1, 1)}
+
+# Facelet face index of each face letter
+FACE_LETTERS = {letter: AXIS_FACES[axis][0 if positive else 1]
+                for letter, (axis, positive) in MOVE_AXES.items()}
+
+
+def sticker_position(face, i, j, size):
+    """Grid position of the cubie carrying sticker (face, i, j)"""
+    last = size - 1
+    return [
+        (i, j, last), (i, j, 0),   # front, back
+        (last, i, j), (0, i, j),   # right, left
+        (i, last, j), (i, 0, j),   # top, bottom
+    ][face]
+
+
+def is_valid_move(face, layer, size):
+    """True for a face letter and an integer layer that exist on a cube of size"""
+    # bool is an int subclass, and floats would be truncated once encoded
+    if isinstance(layer, bool) or not isinstance(layer, (int, np.integer)):
+        return False
+    return face in MOVE_AXES and 0 <= layer < size
+
+
+def solved_facelets(size):
+    """(6, N, N) uint8 facelets of a solved cube, each face in its own color"""
+    return np.repeat(np.arange(6, dtype=np.uint8), size * size).reshape(6, size, size)
+
+
+def facelets_solved(facelets):
+    """True where every face of a (..., 6, N, N) facelet array shows a single color"""
+    return (facelets == facelets[..., :1, :1]).all(axis=(-3, -2, -1))
+
+
+def slice_turn(face, layer, clockwise, size):
+    """Translate a (face, layer, clockwise) move into (axis, index, positive)"""
+    axis, positive_side = MOVE_AXES[face]
+    index = size - 1 - layer if positive_side else layer
+    # Clockwise seen from the positive end is a negative turn about the axis
+    return axis, index, clockwise != positive_side
+
+
+def slice_move(axis, index, positive, size):
+    """(face, layer, clockwise) move turning slice index of axis, named from the nearer face"""
+    if 2 * index >= size - 1:
+        face = {0: 'R', 1: 'U', 2: 'F'}[axis]
+        return face, size - 1 - index, not positive
+    face = {0: 'L', 1: 'D', 2: 'B'}[axis]
+    return face, index, positive
+
+
+def simplify_moves(moves, size):
+    """Shorter move list with the same effect, found by merging turns of each slice.
+    
+    Turns about one axis commute, so each run of them is collected into a
+    quarter-turn count per slice. Counts that reach zero vanish, which can
+    bring two runs on the same axis together to merge in turn. Half turns
+    come out as two clockwise quarter turns.
+    """
+    runs = []  # (axis, {slice index: positive quarter turns})
+    for face, layer, clockwise in moves:
+        axis, index, positive = slice_turn(face, layer, clockwise, size)
+        if not runs or runs[-1][0] != axis:
+            runs.append((axis, {}))
+        turns = runs[-1][1]
+        count = (turns.get(index, 0) + (1 if positive else 3)) % 4
+        if count:
+            turns[index] = count
+        else:
+            del turns[index]
+            if not turns:
+                runs.pop()
+    
+    simplified = []
+    for axis, turns in runs:
+        for index in sorted(turns):
+            count = turns[index]
+            if count == 2:
+                face, layer, _ = slice_move(axis, index, True, size)
+                simplified += [(face, layer, True)] * 2
+            else:
+                simplified.append(slice_move(axis, index, count == 1, size))
+    return simplified
+
+
+def rotate_slice(facelets, axis, index, positive=True):
+    """Quarter-turn one slice of a (..., 6, N, N) facelet array in place"""
+    size = facelets.shape[-1]
+    
+    strips = []
+    for face, kind in SLICE_RINGS[axis]:
+        if kind == 'row':
+            strips.append(facelets[..., face, index, :])
+        else:
+            strips.append(facelets[..., face, :, index])
+    old = [strip.copy() for strip in strips]
+    
+    for i in range(4):
+        if positive:
+            dst, src = strips[(i + 1) % 4], old[i]
+        else:
+            dst, src = strips[i], old[(i + 1) % 4]
+        dst[...] = src[..., ::-1] if i % 2 == 0 else src
+    
+    # Outer slices also spin the face lying across the axis
+    positive_face, negative_face, turns = AXIS_FACES[axis]
+    if not positive:
+        turns = -turns
+    for face, end in ((positive_face, size - 1), (negative_face, 0)):
+        if index == end:
+            facelets[..., face, :, :] = np.rot90(facelets[..., face, :, :], turns, axes=(-2, -1))
+
+
+class MoveTables:
+    """Precomputed permutation tables for every slice turn of one cube size"""
+    def __init__(self, size):
+        self.size = size
+        n = size
+        
+        # Grid cell of every sticker in flat facelet order, and the distinct
+        # exterior cubies they belong to
+        i, j = [a.ravel() for a in np.indices((n, n))]
+        self.sticker_cells = np.concatenate([
+            np.stack(np.broadcast_arrays(*sticker_position(face, i, j, n)), axis=-1)
+            for face in range(6)
+        ])
+        self.cubie_cells = np.unique(self.sticker_cells, axis=0)
+        
+        # Cubies in each (axis, index) slice as sets, filled on first use
+        self.positions = {}
+        
+        # new_flat = old_flat[perm] for each (axis, index, positive) turn.
+        # Large cubes only build the ones they actually use.
+        self.perms = {}
+        self.in_place = n > PERM_TABLE_LIMIT
+        if not self.in_place:
+            for axis in range(3):
+                for index in range(n):
+                    for positive in (True, False):
+                        self.build_perm(axis, index, positive)
+        
+        # Composed permutations of sequences marked for reuse, oldest dropped
+        # first once they hold more than max_sequence_bytes
+        self.sequences = {}
+        self.sequence_bytes = 0
+        self.max_sequence_bytes = 32 << 20
+        
+        # Row per move code, stacked on first batch use
+        self.perm_matrix = None
+        self.num_moves = len(MOVE_FACES) * n * 2
+
+    def build_perm(self, axis, index, positive):
+        """Permutation of one slice turn, found by turning an index array"""
+        n = self.size
+        perm = np.arange(6 * n * n).reshape(6, n, n)
+        rotate_slice(perm, axis, index, positive)
+        self.perms[(axis, index, positive)] = perm.ravel()
+        return self.perms[(axis, index, positive)]
+
+    def check_move(self, face, layer):
+        """Raise ValueError for a move that does not exist on this cube"""
+        if not is_valid_move(face, layer, self.size):
+            raise ValueError(f"Invalid move {face} layer {layer} for a {self.size}x{self.size}x{self.size} cube")
+
+    def move_perm(self, face, layer=0, clockwise=True):
+        """Permutation applied by a (face, layer, clockwise) move"""
+        self.check_move(face, layer)
+        key = slice_turn(face, layer, clockwise, self.size)
+        perm = self.perms.get(key)
+        return perm if perm is not None else self.build_perm(*key)
+
+    def slice_positions(self, axis, index):
+        """Set of exterior cubie positions in one slice"""
+        key = (axis, index)
+        if key not in self.positions:
+            cells = self.cubie_cells[self.cubie_cells[:, axis] == index]
+            self.positions[key] = set(map(tuple, cells.tolist()))
+        return self.positions[key]
+
+    def turn(self, facelets, face, layer=0, clockwise=True):
+        """Apply one move to a facelet array, returning the new array"""
+        if self.in_place:
+            self.check_move(face, layer)
+            rotate_slice(facelets, *slice_turn(face, layer, clockwise, self.size))
+            return facelets
+        perm = self.move_perm(face, layer, clockwise)
+        return facelets.reshape(-1)[perm].reshape(facelets.shape)
+
+    def encode_move(self, face, layer=0, clockwise=True):
+        """Number a move as (face * size + layer) * 2 + direction"""
+        self.check_move(face, layer)
+        return (MOVE_FACES.index(face) * self.size + layer) * 2 + (0 if clockwise else 1)
+
+    def decode_move(self, code):
+        """Turn a move code back into (face, layer, clockwise)"""
+        code = int(code)
+        face_layer, direction = divmod(code, 2)
+        face, layer = divmod(face_layer, self.size)
+        return MOVE_FACES[face], layer, direction == 0
+
+    def get_perm_matrix(self):
+        """(num_moves, 6*N*N) array holding the permutation of every move code"""
+        if self.in_place:
+            raise ValueError(f"A {self.size}x{self.size}x{self.size} cube turns slices in place "
+                             "and has no permutation matrix")
+        if self.perm_matrix is None:
+            self.perm_matrix = np.stack([self.move_perm(*self.decode_move(code))
+                                         for code in range(self.num_moves)])
+        return self.perm_matrix
+
+    def compose(self, moves, reuse=False):
+        """Single permutation equivalent to applying moves in order.
+
+        Only sequences marked reuse are cached, one-off sequences would just
+        push the ones worth keeping out.
+        """
+        key = tuple(moves)
+        perm = self.sequences.get(key)
+        if perm is None:
+            n = self.size
+            perm = np.arange(6 * n * n)
+            if self.in_place:
+                # Turning an index array composes the moves directly
+                perm = perm.reshape(6, n, n)
+                for face, layer, clockwise in key:
+                    self.turn(perm, face, layer, clockwise)
+                perm = perm.reshape(-1)
+            else:
+                for face, layer, clockwise in key:
+                    perm = perm[self.move_perm(face, layer, clockwise)]
+            if reuse:
+                self.remember_sequence(key, perm)
+        return perm
+
+    def remember_sequence(self, key, perm):
+        """Cache a composed sequence, dropping the oldest ones to stay within max_sequence_bytes"""
+        if perm.nbytes > self.max_sequence_bytes:
+            return
+        while self.sequences and self.sequence_bytes + perm.nbytes > self.max_sequence_bytes:
+            self.sequence_bytes -= self.sequences.pop(next(iter(self.sequences))).nbytes
+        self.sequences[key] = perm
+        self.sequence_bytes += perm.nbytes
+
+    def compose_codes(self, codes):
+        """Single permutation for an array of move codes, without caching it"""
+        n = self.size
+        perm = np.arange(6 * n * n)
+        if self.in_place:
+            perm = perm.reshape(6, n, n)
+            for code in np.asarray(codes).tolist():
+                self.turn(perm, *self.decode_move(code))
+            return perm.reshape(-1)
+        perms = self.get_perm_matrix()
+        for code in np.asarray(codes).tolist():
+            perm = perm[perms[code]]
+        return perm
+
+
+_move_tables = {}
+
+
+def get_move_tables(size):
+    """Shared MoveTables for a cube size, built on first use"""
+    if size not in _move_tables:
+        _move_tables[size] = MoveTables(size)
+    return _move_tables[size]
+
+
+class CubeBatch:
+    """Many cubes of one size stepped together as an (M, 6, N, N) facelet array.
+
+    All count cubes start out in use. allocate() and release() hand single
+    cubes out and back, growing the array when none are free, so a batch can
+    also hold cubes that come and go.
+    """
+    def __init__(self, size, count):
+        self.size = size
+        self.count = count
+        self.tables = get_move_tables(size)
+        self.free = []
+        self.reset()
+
+    def reset(self):
+        """Put every cube back in the solved state"""
+        n = self.size
+        self.facelets = np.broadcast_to(solved_facelets(n), (self.count, 6, n, n)).copy()
+
+    def allocate(self):
+        """Index of a free cube reset to solved, doubling the batch if none is free"""
+        if not self.free:
+            n = self.size
+            grown = max(self.count, 16)
+            self.facelets = np.concatenate([self.facelets, np.empty((grown, 6, n, n), dtype=np.uint8)])
+            self.free = list(range(self.count + grown - 1, self.count - 1, -1))
+            self.count += grown
+        cube = self.free.pop()
+        self.facelets[cube] = solved_facelets(self.size)
+        return cube
+
+    def release(self, cube):
+        """Hand a cube back for a later allocate()"""
+        self.free.append(cube)
+
+    def apply_move(self, face, layer=0, clockwise=True):
+        """Apply the same move to every cube"""
+        self.apply_moves([(face, layer, clockwise)])
+
+    def apply_moves(self, moves, reuse=False):
+        """Apply the same move sequence to every cube with one gather"""
+        perm = self.tables.compose(moves, reuse)
+        flat = self.facelets.reshape(self.count, -1)
+        self.facelets = flat[:, perm].reshape(self.facelets.shape)
+
+    def apply_move_codes(self, codes, cubes=None):
+        """Apply one move per cube, given as an array of move codes.
+
+        Without cubes there is one code for every cube of the batch, otherwise
+        codes[i] turns cube cubes[i].
+        """
+        codes = np.asarray(codes)
+        expected = self.count if cubes is None else len(cubes)
+        if codes.shape != (expected,):
+            raise ValueError(f"Expected {expected} move codes, got shape {codes.shape}")
+        if cubes is not None:
+            cubes = np.asarray(cubes, dtype=np.intp)
+        if self.tables.in_place:
+            # Large cubes have no permutation matrix; turn each code's cubes together
+            for code in np.unique(codes).tolist():
+                group = np.flatnonzero(codes == code)
+                if cubes is not None:
+                    group = cubes[group]
+                move = self.tables.decode_move(code)
+                if len(group) == 1:
+                    self.tables.turn(self.facelets[group[0]], *move)
+                    continue
+                turned = self.facelets[group]
+                self.tables.turn(turned, *move)
+                self.facelets[group] = turned
+            return
+        perms = self.tables.get_perm_matrix()[codes]
+        flat = self.facelets.reshape(self.count, -1)
+        if cubes is None:
+            self.facelets = np.take_along_axis(flat, perms, axis=1).reshape(self.facelets.shape)
+        else:
+            flat[cubes] = np.take_along_axis(flat[cubes], perms, axis=1)
+
+    def apply_sequences(self, cubes, sequences):
+        """Apply a move code array to each of cubes, one round of moves at a time"""
+        cubes = np.asarray(cubes, dtype=np.intp)
+        lengths = np.array([len(codes) for codes in sequences])
+        rounds = np.zeros((len(cubes), lengths.max(initial=0)), dtype=np.intp)
+        for row, codes in enumerate(sequences):
+            rounds[row, :len(codes)] = codes
+        for step in range(rounds.shape[1]):
+            active = lengths > step
+            self.apply_move_codes(rounds[active, step], cubes[active])
+
+    def apply_per_cube(self, moves):
+        """Apply one (face, layer, clockwise) move per cube"""
+        codes = np.fromiter((self.tables.encode_move(*move) for move in moves),
+                            dtype=np.intp, count=self.count)
+        self.apply_move_codes(codes)
+
+    def solved_mask(self, cubes=None):
+        """Boolean mask of cubes, every one by default, whose faces are each a single color"""
+        return facelets_solved(self.facelets if cubes is None else self.facelets[cubes])
+
+    def face_histograms(self):
+        """(M, 6, 6) counts of each color on each face"""
+        offsets = (np.arange(self.count * 6) * 6).reshape(self.count, 6, 1, 1)
+        counts = np.bincount((self.facelets + offsets).ravel(), minlength=self.count * 36)
+        return counts.reshape(self.count, 6, 6)
+
 
 class RubiksCube:
     def __init__(self, size):
@@ -19,218 +423,148 @@ class RubiksCube:
         self.rotation_y = 45
         self.cube_size = 1.0
         self.gap = 0.1
-        self.solve_step = 0
         
-        # Animation variables
+        # Animation variables, driven by wall-clock time
         self.is_animating = False
         self.animation_progress = 0.0
-        self.animation_speed = 0.08  # Slower for smoother animation
+        self.move_duration = 0.2  # Seconds per animated quarter turn
+        self.max_queue_time = 5.0  # Queued moves speed up to finish within this
+        self.skip_animation = False  # Commit queued moves without animating
         self.current_rotation = None
+        self.last_update = None
+        self.queue_deadline = None
+        
+        # GPU buffers, created on the first draw with a live GL context
+        self.renderer = None
+        self.state_version = 0
+        
+        # (future, state_version) of a search running in a SolverPool, and
+        # solutions found so far keyed by canonical state hash
+        self.pending_solve = None
+        self.solutions = TranspositionCache(1024)
         
         # Color scheme - standard Rubik's cube colors
-        self.colors = [
-            [1.0, 1.0, 1.0],  # White - Front (positive Z)
-            [1.0, 1.0, 0.0],  # Yellow - Back (negative Z)  
-            [0.0, 1.0, 0.0],  # Green - Right (positive X)
-            [0.0, 0.0, 1.0],  # Blue - Left (negative X)
-            [1.0, 0.0, 0.0],  # Red - Top (positive Y)
-            [1.0, 0.5, 0.0],  # Orange - Bottom (negative Y)
-        ]
+        self.colors = [list(color) for color in STICKER_COLORS]
         
         # Initialize cube state - only store colors for visible faces
         self.reset_cube()
-        self.move_history = []
-        
-        print(f"Created {size}x{size}x{size} cube with optimized rendering")
 
     def reset_cube(self):
         """Reset cube to solved state"""
-        self.cube_state = {}
-        
-        # Only create cubes that have at least one visible face (on the exterior)
-        for x in range(self.size):
-            for y in range(self.size):
-                for z in range(self.size):
-                    # Only create cube if it's on the exterior
-                    if (x == 0 or x == self.size-1 or 
-                        y == 0 or y == self.size-1 or 
-                        z == 0 or z == self.size-1):
-                        
-                        # Determine visible faces and their solved colors
-                        faces = {}
-                        if z == self.size-1: faces['front'] = 0   # White
-                        if z == 0: faces['back'] = 1              # Yellow
-                        if x == self.size-1: faces['right'] = 2   # Green
-                        if x == 0: faces['left'] = 3              # Blue
-                        if y == self.size-1: faces['top'] = 4     # Red
-                        if y == 0: faces['bottom'] = 5            # Orange
-                        
-                        self.cube_state[(x, y, z)] = faces
-        
-        self.move_history = []
+        n = self.size
+        
+        # One uint8 color per sticker, each face starts out in its own color
+        self.facelets = solved_facelets(n)
+        
+        # Move tables are shared by every cube of this size
+        self.tables = get_move_tables(n)
+        
+        # 64-bit Zobrist hash, kept up to date move by move
+        self.zobrist = get_zobrist_keys(self.tables)
+        self.state_hash = self.zobrist.full(self.facelets)
+        
+        # Played and pending moves, one uint16 code each
+        self.move_history = MoveLog(self.tables)
+        self.move_queue = MoveLog(self.tables)
+        self.history_simplified = True
         self.is_scrambled = False
-        print(f"Reset complete - tracking {len(self.cube_state)} exterior cubes")
+        self.queue_deadline = None
+        self.is_animating = False
+        self.current_rotation = None
+        self.animation_progress = 0.0
+        self.state_version += 1
 
     def get_face_positions(self, face, layer=0):
         """Get positions of cubes in a specific face/slice"""
-        positions = []
-        
-        if face == 'R':  # Right face
-            x = self.size - 1 - layer
-            positions = [(x, y, z) for y in range(self.size) for z in range(self.size) 
-                        if (x, y, z) in self.cube_state]
-        elif face == 'L':  # Left face
-            x = layer
-            positions = [(x, y, z) for y in range(self.size) for z in range(self.size) 
-                        if (x, y, z) in self.cube_state]
-        elif face == 'U':  # Up face
-            y = self.size - 1 - layer
-            positions = [(x, y, z) for x in range(self.size) for z in range(self.size) 
-                        if (x, y, z) in self.cube_state]
-        elif face == 'D':  # Down face
-            y = layer
-            positions = [(x, y, z) for x in range(self.size) for z in range(self.size) 
-                        if (x, y, z) in self.cube_state]
-        elif face == 'F':  # Front face
-            z = self.size - 1 - layer
-            positions = [(x, y, z) for x in range(self.size) for y in range(self.size) 
-                        if (x, y, z) in self.cube_state]
-        elif face == 'B':  # Back face
-            z = layer
-            positions = [(x, y, z) for x in range(self.size) for y in range(self.size) 
-                        if (x, y, z) in self.cube_state]
-        
-        return positions
-
-    def rotate_face_positions(self, positions, face, clockwise=True):
-        """Rotate the positions of cubes in a face"""
-        if not positions:
-            return {}
-        
-        # Group positions by their layer coordinate
-        if face in ['R', 'L']:
-            # X-axis rotation: rotate in YZ plane
-            fixed_x = positions[0][0]
-            coords = [(pos[1], pos[2]) for pos in positions]
-            new_coords = self.rotate_2d_coords(coords, clockwise ^ (face == 'L'))
-            new_positions = [(fixed_x, ny, nz) for ny, nz in new_coords]
-        elif face in ['U', 'D']:
-            # Y-axis rotation: rotate in XZ plane
-            fixed_y = positions[0][1]
-            coords = [(pos[0], pos[2]) for pos in positions]
-            new_coords = self.rotate_2d_coords(coords, clockwise ^ (face == 'D'))
-            new_positions = [(nx, fixed_y, nz) for nx, nz in new_coords]
-        else:  # F, B
-            # Z-axis rotation: rotate in XY plane
-            fixed_z = positions[0][2]
-            coords = [(pos[0], pos[1]) for pos in positions]
-            new_coords = self.rotate_2d_coords(coords, clockwise ^ (face == 'B'))
-            new_positions = [(nx, ny, fixed_z) for nx, ny in new_coords]
-        
-        # Create mapping from old to new positions
-        position_mapping = {}
-        for i, old_pos in enumerate(positions):
-            position_mapping[old_pos] = new_positions[i]
-        
-        return position_mapping
-
-    def rotate_2d_coords(self, coords, clockwise=True):
-        """Rotate 2D coordinates 90 degrees around center"""
-        if not coords:
+        if not is_valid_move(face, layer, self.size):
             return []
         
-        # Find center
-        min_coord = min(coords)
-        max_coord = max(coords)
-        center = ((min_coord[0] + max_coord[0]) / 2, (min_coord[1] + max_coord[1]) / 2)
-        
-        rotated = []
-        for x, y in coords:
-            # Translate to origin
-            tx, ty = x - center[0], y - center[1]
-            # Rotate 90 degrees
-            if clockwise:
-                nx, ny = ty, -tx
-            else:
-                nx, ny = -ty, tx
-            # Translate back
-            rotated.append((nx + center[0], ny + center[1]))
-        
-        # Convert back to integers
-        return [(round(x), round(y)) for x, y in rotated]
-
-    def rotate_cube_colors(self, old_faces, face, clockwise=True):
-        """Rotate colors on a cube when its position changes"""
-        if not old_faces:
-            return {}
-        
-        new_faces = old_faces.copy()
-        
-        # Rotate the face colors based on which face is being turned
-        if face in ['R', 'L']:
-            # X-axis rotation affects front, back, top, bottom faces
-            cycle = ['front', 'top', 'back', 'bottom']
-        elif face in ['U', 'D']:
-            # Y-axis rotation affects front, right, back, left faces
-            cycle = ['front', 'right', 'back', 'left']
-        else:  # F, B
-            # Z-axis rotation affects top, right, bottom, left faces
-            cycle = ['top', 'right', 'bottom', 'left']
-        
-        # Apply rotation direction
-        if not clockwise ^ (face in ['L', 'D', 'B']):
-            cycle.reverse()
-        
-        # Rotate colors in the cycle
-        if all(c in old_faces for c in cycle):
-            temp = old_faces[cycle[0]]
-            for i in range(len(cycle) - 1):
-                if cycle[i+1] in old_faces:
-                    new_faces[cycle[i]] = old_faces[cycle[i+1]]
-            new_faces[cycle[-1]] = temp
-        
-        return new_faces
-
-    def apply_rotation(self, face, layer=0, clockwise=True):
-        """Apply a rotation to a face/slice"""
+        axis, index, _ = slice_turn(face, layer, True, self.size)
+        return self.tables.slice_positions(axis, index)
+
+    def apply_rotation(self, face, layer=0, clockwise=True, record=True):
+        """Start animating a rotation of a face/slice; undo steps pass record=False"""
         if self.is_animating:
             return False
-        
-        # Get affected positions
-        positions = self.get_face_positions(face, layer)
-        if not positions:
+        if not is_valid_move(face, layer, self.size):
             return False
         
-        # Start animation
+        # A step turns one or more slices of a single axis together
+        axis, index, positive = slice_turn(face, layer, clockwise, self.size)
         self.is_animating = True
         self.animation_progress = 0.0
         self.current_rotation = {
-            'face': face,
-            'layer': layer,
-            'clockwise': clockwise,
-            'positions': positions,
-            'axis': self.get_rotation_axis(face)
+            'moves': [(face, layer, clockwise)],
+            'axis': axis,
+            'turns': {index: positive},
+            'record': record
         }
         
         return True
 
-    def get_rotation_axis(self, face):
-        """Get rotation axis for a face"""
-        axes = {
-            'R': (1, 0, 0), 'L': (-1, 0, 0),
-            'U': (0, 1, 0), 'D': (0, -1, 0),
-            'F': (0, 0, 1), 'B': (0, 0, -1)
-        }
-        return axes.get(face, (1, 0, 0))
+    def join_rotation(self, face, layer=0, clockwise=True):
+        """Add a move to the step that has just started, if it turns another slice of its axis"""
+        rotation = self.current_rotation
+        if not self.is_animating or self.animation_progress or rotation is None:
+            return False
+        if not is_valid_move(face, layer, self.size):
+            return False
+        
+        # Slices of one axis commute, so they can all turn at once
+        axis, index, positive = slice_turn(face, layer, clockwise, self.size)
+        if axis != rotation['axis'] or index in rotation['turns']:
+            return False
+        rotation['moves'].append((face, layer, clockwise))
+        rotation['turns'][index] = positive
+        return True
+
+    def queue_moves(self, moves):
+        """Queue (face, layer, clockwise) moves to be animated in order"""
+        self.move_queue.extend(moves)
+        return len(self.move_queue)
 
-    def update_animation(self):
-        """Update animation progress"""
-        if not self.is_animating:
+    def update_animation(self, now=None):
+        """Advance animations by the wall-clock time since the last update"""
+        if now is None:
+            now = time.perf_counter()
+        # Time spent idle does not count towards moves queued since then
+        elapsed = 0.0 if self.last_update is None or not self.is_animating else now - self.last_update
+        self.last_update = now
+        
+        if self.skip_animation and self.move_queue:
+            if self.is_animating:
+                self.complete_rotation()
+                self.is_animating = False
+            self.apply_move_codes(self.move_queue.to_array())
+            self.move_queue.clear()
             return
         
-        self.animation_progress += self.animation_speed
-        
-        if self.animation_progress >= 1.0:
+        # Play a long queue faster so it finishes within max_queue_time
+        pending = len(self.move_queue) + (1.0 - self.animation_progress if self.is_animating else 0.0)
+        pending_time = pending * self.move_duration
+        if not pending:
+            self.queue_deadline = None
+        elif self.queue_deadline is None and pending_time > self.max_queue_time:
+            self.queue_deadline = now + self.max_queue_time
+        speed = 1.0
+        if self.queue_deadline is not None:
+            speed = max(1.0, pending_time / max(self.queue_deadline - now, 1e-3))
+        budget = elapsed * speed / self.move_duration  # In quarter turns
+        
+        # Frames that fall behind commit whole moves instead of slowing down
+        while True:
+            if not self.is_animating:
+                if not self.move_queue or not self.apply_rotation(*self.move_queue.popleft()):
+                    break
+                while self.move_queue and self.join_rotation(*self.move_queue[0]):
+                    self.move_queue.popleft()
+            
+            remaining = 1.0 - self.animation_progress
+            if budget < remaining:
+                self.animation_progress += budget
+                break
+            
+            budget -= remaining
             self.complete_rotation()
             self.is_animating = False
 
@@ -239,82 +573,215 @@ class RubiksCube:
         if not self.current_rotation:
             return
         
-        face = self.current_rotation['face']
-        layer = self.current_rotation['layer']
-        clockwise = self.current_rotation['clockwise']
-        positions = self.current_rotation['positions']
-        
-        # Get new position mapping
-        position_mapping = self.rotate_face_positions(positions, face, clockwise)
-        
-        # Create new cube state
-        new_state = {}
-        
-        # Copy non-rotating cubes
-        for pos, faces in self.cube_state.items():
-            if pos not in positions:
-                new_state[pos] = faces.copy()
-        
-        # Move and rotate the affected cubes
-        for old_pos in positions:
-            new_pos = position_mapping[old_pos]
-            old_faces = self.cube_state[old_pos]
-            new_faces = self.rotate_cube_colors(old_faces, face, clockwise)
-            new_state[new_pos] = new_faces
-        
-        self.cube_state = new_state
-        self.move_history.append((face, layer, clockwise))
+        # One gather through the precomputed permutation per move, or an
+        # in-place strided turn on large cubes
+        for face, layer, clockwise in self.current_rotation['moves']:
+            axis, index, _ = slice_turn(face, layer, clockwise, self.size)
+            self.state_hash = self.zobrist.toggle(self.state_hash, self.facelets, axis, index)
+            self.facelets = self.tables.turn(self.facelets, face, layer, clockwise)
+            self.state_hash = self.zobrist.toggle(self.state_hash, self.facelets, axis, index)
+            if self.current_rotation['record']:
+                self.move_history.append((face, layer, clockwise))
+                self.history_simplified = False
+        self.state_version += 1
         
         # Clear animation state
         self.current_rotation = None
         self.animation_progress = 0.0
 
-    def scramble(self, num_moves=None):
-        """Scramble the cube"""
-        if self.is_animating:
-            return "Animation in progress..."
-        
-        if num_moves is None:
-            num_moves = max(20, self.size * 10)
-        
-        self.scramble_moves = []
-        faces = ['R', 'L', 'U', 'D', 'F', 'B']
-        
-        for _ in range(num_moves):
-            face = random.choice(faces)
-            layer = random.randint(0, self.size - 1) if self.size > 3 else 0
-            clockwise = random.choice([True, False])
-            self.scramble_moves.append((face, layer, clockwise))
-        
-        self.is_scrambled = True
-        return f"Generated {num_moves} scramble moves"
+    def apply_moves(self, moves, reuse=False):
+        """Apply a list of (face, layer, clockwise) moves at once, without animation.
 
-    def execute_next_scramble(self):
-        """Execute next scramble move"""
-        if not hasattr(self, 'scramble_moves') or not self.scramble_moves:
+        Pass reuse=True for a sequence that will be played again, such as an
+        algorithm, to keep its composed permutation cached.
+        """
+        if self.is_animating:
             return False
         
+        moves = list(moves)
+        perm = self.tables.compose(moves, reuse)
+        self.facelets = self.facelets.reshape(-1)[perm].reshape(self.facelets.shape)
+        self.state_hash = self.zobrist.full(self.facelets)
+        self.move_history.extend(moves)
+        self.history_simplified = False
+        self.state_version += 1
+        return True
+
+    def apply_move_codes(self, codes):
+        """Apply an array of move codes at once, without animation"""
         if self.is_animating:
             return False
         
-        face, layer, clockwise = self.scramble_moves.pop(0)
-        return self.apply_rotation(face, layer, clockwise)
+        self.apply_perm(self.tables.compose_codes(codes), codes)
+        return True
+
+    def apply_perm(self, perm, codes):
+        """Move the stickers by the composed permutation of codes and record them"""
+        self.facelets = self.facelets.reshape(-1)[perm].reshape(self.facelets.shape)
+        self.state_hash = self.zobrist.full(self.facelets)
+        self.move_history.extend_codes(codes)
+        self.history_simplified = False
+        self.state_version += 1
+
+    def save_history(self, path):
+        """Write the move history to a binary move file"""
+        self.move_history.save(path)
+        return f"Saved {len(self.move_history)} moves to {path}"
+
+    def replay_moves(self, path):
+        """Apply the moves of a binary move file at once, without animation.
+
+        The whole file is read and checked first, so a truncated or corrupt
+        file leaves the cube as it was.
+        """
+        if self.is_animating or self.move_queue:
+            return "Animation in progress..."
+        
+        try:
+            size, chunks = read_move_file(path)
+            if size != self.size:
+                chunks.close()
+                return f"Cannot replay: {path} holds moves for a {size}×{size}×{size} cube"
+            replayed = MoveLog(self.tables)
+            perm = np.arange(self.facelets.size)
+            for chunk in chunks:
+                perm = perm[self.tables.compose_codes(chunk)]
+                replayed.extend_codes(chunk)
+        except (OSError, ValueError) as error:
+            return f"Cannot replay: {error}"
+        self.apply_perm(perm, replayed.to_array())
+        return f"Replayed {len(replayed)} moves from {path}"
+
+    def scramble(self, num_moves=None, seed=None, random_state=False):
+        """Scramble the cube, reproducibly when seeded; random_state picks a uniformly random 2x2/3x3 state"""
+        from scrambleGenerator import ScrambleGenerator
+        generator = ScrambleGenerator(self.size, seed)
+        if random_state:
+            # Random states come from the solver, whose tables may still be building
+            from cubeSolver import tables_ready, prepare_tables
+            generator.check_random_state()
+            if not tables_ready():
+                builds = prepare_tables()
+                progress = min(build.progress for build in builds) if builds else 1.0
+                return f"Solver tables are still being generated ({progress:.0%})..."
+            scramble_moves = generator.random_state()
+        else:
+            scramble_moves = generator.moves(num_moves)
+        self.queue_moves(scramble_moves)
+        self.is_scrambled = True
+        return f"Generated {len(scramble_moves)} scramble moves"
 
     def solve_step(self):
         """Perform one step of solving (reverse last move)"""
         if self.is_animating:
             return "Animation in progress..."
         
+        if self.move_queue:
+            return "Moves still queued..."
+        
+        # Undo the shortest equivalent of the history, not every recorded move
+        if not self.history_simplified:
+            moves = simplify_moves(self.move_history, self.size)
+            self.move_history = MoveLog(self.tables)
+            self.move_history.extend(moves)
+            self.history_simplified = True
+        
         if not self.move_history:
             return "Cube is already solved!"
         
-        # Reverse the last move
-        face, layer, clockwise = self.move_history.pop()
-        if self.apply_rotation(face, layer, not clockwise):
+        # Reverse the last move without recording the reversal
+        face, layer, clockwise = self.move_history[-1]
+        if self.apply_rotation(face, layer, not clockwise, record=False):
+            self.move_history.pop()
             return f"Undid {face} move - {len(self.move_history)} moves remaining"
         
         return "Failed to apply move"
 
+    def is_solved(self):
+        """True when every face shows one color, checked against the solved hashes in O(1)"""
+        return self.state_hash in self.zobrist.solved
+
+    def solve(self, pool=None):
+        """Queue a solution for the current state.
+        
+        With a SolverPool the search runs in its worker processes and
+        finish_solve() queues the moves once they arrive.
+        """
+        if self.is_animating or self.move_queue:
+            return "Animation in progress..."
+        if self.pending_solve is not None:
+            return "Already searching for a solution..."
+        if self.is_solved():
+            return "Cube is already solved!"
+        
+        # A position seen before, up to symmetry, gets its earlier solution back
+        cached = self.recall_solution()
+        if cached is not None:
+            return self.queue_solution(cached)
+        
+        # Imported here since the solver builds on this module's move tables
+        from cubeSolver import solve, tables_ready, prepare_tables
+        
+        if not tables_ready():
+            builds = prepare_tables()
+            progress = min(build.progress for build in builds) if builds else 1.0
+            return f"Solver tables are still being generated ({progress:.0%})..."
+        
+        if pool is not None:
+            self.pending_solve = (pool.solve(self.facelets), self.state_version)
+            return "Searching for a solution..."
+        
+        try:
+            moves = solve(self)
+        except ValueError as error:
+            return f"Cannot solve: {error}"
+        self.remember_solution(moves)
+        return self.queue_solution(moves)
+
+    def finish_solve(self):
+        """Queue the moves of a finished background solve; returns a status message or None"""
+        if self.pending_solve is None or not self.pending_solve[0].done():
+            return None
+        future, version = self.pending_solve
+        self.pending_solve = None
+        
+        try:
+            moves = future.result()
+        except Exception as error:
+            # Includes a broken or shut down solver pool, which must not take the window down
+            return f"Cannot solve: {error or type(error).__name__}"
+        if version != self.state_version:
+            return "Cube changed while solving - press ENTER to solve again"
+        self.remember_solution(moves)
+        return self.queue_solution(moves)
+
+    def canonical_key(self):
+        """(hash, symmetry) of the canonical form shared by the 48 symmetric variants of this state"""
+        canonical, symmetry, _ = get_symmetries(self.tables).canonicalize(self.facelets)
+        return self.zobrist.full(canonical), symmetry
+
+    def remember_solution(self, moves):
+        """Cache a solution, as turns of the canonical state"""
+        key, symmetry = self.canonical_key()
+        turns = [slice_turn(*move, self.size) for move in moves]
+        self.solutions.put(key, get_symmetries(self.tables).transform_turns(turns, symmetry))
+
+    def recall_solution(self):
+        """Cached solution of this state or a symmetric one, or None"""
+        key, symmetry = self.canonical_key()
+        turns = self.solutions.get(key)
+        if turns is None:
+            return None
+        symmetries = get_symmetries(self.tables)
+        turns = symmetries.transform_turns(turns, symmetries.inverse[symmetry])
+        return [slice_move(*turn, self.size) for turn in turns]
+
+    def queue_solution(self, moves):
+        if not moves:
+            return "Cube is already solved!"
+        self.queue_moves(moves)
+        return f"Solving in {len(moves)} quarter turns"
+
     def get_world_position(self, grid_pos):
         """Convert grid position to world coordinates"""
         x, y, z = grid_pos
@@ -324,437 +791,26 @@ class RubiksCube:
         world_z = (z - (self.size - 1) / 2) * spacing
         return [world_x, world_y, world_z]
 
-    def draw_cube_face(self, vertices, color):
-        """Draw a single face of a cube"""
-        glColor3fv(color)
-        glBegin(GL_QUADS)
-        for vertex in vertices:
-            glVertex3fv(vertex)
-        glEnd()
-
-    def draw_single_cube(self, position, faces):
-        """Draw a single cube at given position"""
-        world_pos = self.get_world_position(position)
-        x, y, z = world_pos
-        s = self.cube_size / 2
-        
-        # Apply animation rotation if this cube is being rotated
-        glPushMatrix()
-        
-        if self.is_animating and position in self.current_rotation['positions']:
-            # Rotate around face center
-            face = self.current_rotation['face']
-            axis = self.current_rotation['axis']
-            angle = self.animation_progress * 90
-            if not self.current_rotation['clockwise']:
-                angle = -angle
-            
-            # Calculate rotation center
-            if face in ['R', 'L']:
-                center_x = (self.current_rotation['layer'] - (self.size-1)/2) * (self.cube_size + self.gap)
-                glTranslatef(center_x, 0, 0)
-                glRotatef(angle, *axis)
-                glTranslatef(-center_x, 0, 0)
-            elif face in ['U', 'D']:
-                center_y = (self.current_rotation['layer'] - (self.size-1)/2) * (self.cube_size + self.gap)
-                glTranslatef(0, center_y, 0)
-                glRotatef(angle, *axis)
-                glTranslatef(0, -center_y, 0)
-            else:  # F, B
-                center_z = (self.current_rotation['layer'] - (self.size-1)/2) * (self.cube_size + self.gap)
-                glTranslatef(0, 0, center_z)
-                glRotatef(angle, *axis)
-                glTranslatef(0, 0, -center_z)
-        
-        # Cube vertices
-        vertices = [
-            [x-s, y-s, z-s], [x+s, y-s, z-s], [x+s, y+s, z-s], [x-s, y+s, z-s],  # back
-            [x-s, y-s, z+s], [x+s, y-s, z+s], [x+s, y+s, z+s], [x-s, y+s, z+s],  # front
-        ]
-        
-        # Face definitions
-        face_vertices = {
-            'front':  [vertices[4], vertices[7], vertices[6], vertices[5]],
-            'back':   [vertices[1], vertices[0], vertices[3], vertices[2]],
-            'right':  [vertices[5], vertices[6], vertices[2], vertices[1]],
-            'left':   [vertices[0], vertices[4], vertices[7], vertices[3]],
-            'top':    [vertices[3], vertices[7], vertices[6], vertices[2]],
-            'bottom': [vertices[0], vertices[1], vertices[5], vertices[4]],
-        }
-        
-        # Draw visible faces
-        for face_name, color_idx in faces.items():
-            if face_name in face_vertices:
-                face_verts = face_vertices[face_name]
-                color = self.colors[color_idx]
-                self.draw_cube_face(face_verts, color)
-        
-        # Draw wireframe
-        glColor3f(0.0, 0.0, 0.0)
-        glLineWidth(1.5)
-        edges = [
-            [0,1], [1,2], [2,3], [3,0],  # back face
-            [4,5], [5,6], [6,7], [7,4],  # front face
-            [0,4], [1,5], [2,6], [3,7]   # connecting edges
-        ]
-        
-        glBegin(GL_LINES)
-        for edge in edges:
-            glVertex3fv(vertices[edge[0]])
-            glVertex3fv(vertices[edge[1]])
-        glEnd()
-        
-        glPopMatrix()
+    def render_image(self, width=256, height=256):
+        """Current view, including a turn in progress, as an RGB array drawn without a window"""
+        # Imported here since the headless renderer builds on this module's move tables
+        from headlessRenderer import get_renderer
+        
+        renderer = get_renderer(self.size, width, height, self.rotation_x, self.rotation_y)
+        rotation = self.current_rotation if self.is_animating else None
+        return renderer.render(self.facelets, rotation, self.animation_progress, self.colors)
 
     def draw(self):
-        """Draw the entire cube"""
-        self.update_animation()
-        
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glLoadIdentity()
-        
-        # Camera positioning
-        camera_distance = self.size * 4
-        glTranslatef(0.0, 0.0, -camera_distance)
-        glRotatef(self.rotation_x, 1, 0, 0)
-        glRotatef(self.rotation_y, 0, 1, 0)
-        
-        # Draw only exterior cubes
-        for position, faces in self.cube_state.items():
-            self.draw_single_cube(position, faces)
-
-class ControlPanel:
-    def __init__(self, cube, command_queue):
-        self.cube = cube
-        self.command_queue = command_queue
-        self.root = None
-        self.status_var = None
-        
-    def create_panel(self):
-        """Create the control panel"""
-        self.root = tk.Tk()
-        self.root.title("Rubik's Cube Controls")
-        self.root.geometry("350x600")
-        self.root.resizable(False, False)
-        
-        main_frame = ttk.Frame(self.root, padding="10")
-        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Title
-        title_label = ttk.Label(main_frame, text="🎲 Rubik's Cube", 
-                               font=('Arial', 14, 'bold'))
-        title_label.grid(row=0, column=0, columnspan=2, pady=(0, 10))
-        
-        # Cube info
-        info_text = f"{self.cube.size}×{self.cube.size}×{self.cube.size} Cube"
-        info_label = ttk.Label(main_frame, text=info_text, font=('Arial', 10))
-        info_label.grid(row=1, column=0, columnspan=2, pady=(0, 15))
-        
-        # Status
-        status_frame = ttk.LabelFrame(main_frame, text="Status", padding="5")
-        status_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        self.status_var = tk.StringVar(value="Ready! Optimized for larger cubes.")
-        status_label = ttk.Label(status_frame, textvariable=self.status_var, 
-                                wraplength=300, justify=tk.LEFT)
-        status_label.grid(row=0, column=0, sticky=tk.W)
-        
-        # New cube section
-        new_cube_frame = ttk.LabelFrame(main_frame, text="New Cube", padding="10")
-        new_cube_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        ttk.Label(new_cube_frame, text="Size (1-15):").grid(row=0, column=0, sticky=tk.W, pady=2)
-        self.size_var = tk.StringVar(value=str(self.cube.size))
-        size_entry = ttk.Entry(new_cube_frame, textvariable=self.size_var, width=5)
-        size_entry.grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=2)
-        
-        ttk.Button(new_cube_frame, text="🆕 Create New Cube", 
-                  command=self.create_new_cube).grid(row=1, column=0, columnspan=2, pady=(5, 0))
-        
-        # Controls
-        controls_frame = ttk.LabelFrame(main_frame, text="Controls", padding="10")
-        controls_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        ttk.Button(controls_frame, text="🔀 Scramble", 
-                  command=self.scramble_cube).grid(row=0, column=0, columnspan=2, 
-                                                   sticky=(tk.W, tk.E), pady=2)
-        
-        ttk.Button(controls_frame, text="⚡ Solve Step (SPACE)", 
-                  command=self.solve_step).grid(row=1, column=0, columnspan=2, 
-                                               sticky=(tk.W, tk.E), pady=2)
-        
-        ttk.Button(controls_frame, text="🔄 Reset View", 
-                  command=self.reset_view).grid(row=2, column=0, padx=(0, 2), 
-                                              sticky=(tk.W, tk.E), pady=2)
-        
-        ttk.Button(controls_frame, text="✅ Reset Cube", 
-                  command=self.reset_cube).grid(row=2, column=1, padx=(2, 0), 
-                                               sticky=(tk.W, tk.E), pady=2)
-        
-        controls_frame.columnconfigure(0, weight=1)
-        controls_frame.columnconfigure(1, weight=1)
-        
-        # Manual rotations
-        manual_frame = ttk.LabelFrame(main_frame, text="Manual Rotations", padding="10")
-        manual_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        faces = [('R', 'Right'), ('L', 'Left'), ('U', 'Up'), ('D', 'Down'), ('F', 'Front'), ('B', 'Back')]
-        for i, (face, name) in enumerate(faces):
-            row = i // 2
-            col = i % 2
-            ttk.Button(manual_frame, text=f"{face} - {name}", 
-                      command=lambda f=face: self.manual_rotation(f)).grid(
-                          row=row, column=col, padx=2, pady=2, sticky=(tk.W, tk.E))
-        
-        manual_frame.columnconfigure(0, weight=1)
-        manual_frame.columnconfigure(1, weight=1)
-        
-        # Instructions
-        inst_frame = ttk.LabelFrame(main_frame, text="Instructions", padding="10")
-        inst_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E))
-        
-        instructions = [
-            "🖱️ Mouse: Drag to rotate view",
-            "⎵ SPACE: Undo last move", 
-            "🔀 S: Start scrambling",
-            "🔄 R: Reset camera view",
-            "⌨️ 1-6: Manual face rotations",
-            "⌨️ Hold SHIFT for counter-clockwise",
-            "⌨ ESC: Quit"
-        ]
-        
-        for i, instruction in enumerate(instructions):
-            ttk.Label(inst_frame, text=instruction, font=('Arial', 8)).grid(row=i, column=0, 
-                                                                            sticky=tk.W, pady=1)
-        
-        self.update_status()
-        
-    def create_new_cube(self):
-        try:
-            size = int(self.size_var.get())
-            if size < 1 or size > 15:
-                messagebox.showerror("Error", "Size must be between 1 and 15!")
-                return
-            self.command_queue.put(('new_cube', size))
-            self.status_var.set(f"Creating new {size}×{size}×{size} cube...")
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid number!")
-    
-    def scramble_cube(self):
-        self.command_queue.put(('scramble', None))
-    
-    def solve_step(self):
-        self.command_queue.put(('solve_step', None))
-    
-    def reset_view(self):
-        self.command_queue.put(('reset_view', None))
-    
-    def reset_cube(self):
-        self.command_queue.put(('reset_cube', None))
-    
-    def manual_rotation(self, face):
-        self.command_queue.put(('manual_rotation', face))
-    
-    def update_status(self):
-        try:
-            while True:
-                try:
-                    status_msg = self.command_queue.get_nowait()
-                    if isinstance(status_msg, str):
-                        self.status_var.set(status_msg)
-                except queue.Empty:
-                    break
-        except:
-            pass
-        
-        if self.root:
-            self.root.after(100, self.update_status)
-    
-    def run(self):
-        self.create_panel()
-        self.root.mainloop()
+        """Draw the entire cube into the current GL context; update_animation() advances it first"""
+        if self.renderer is None:
+            from cubeRenderer import CubeRenderer
+            self.renderer = CubeRenderer(self)
+        self.renderer.draw_scene(self)
 
 def main():
-    size = 3  # Start with 3x3x3
-    
-    print(f"Starting {size}×{size}×{size} Rubik's cube with face rotations...")
-    
-    pygame.init()
-    
-    width, height = 1000, 800
-    screen = pygame.display.set_mode((width, height), DOUBLEBUF | OPENGL)
-    pygame.display.set_caption(f"3D Rubik's Cube ({size}×{size}×{size}) - Face Rotations")
-    
-    # OpenGL setup
-    glEnable(GL_DEPTH_TEST)
-    glClearColor(0.2, 0.2, 0.2, 1.0)
-    
-    glMatrixMode(GL_PROJECTION)
-    gluPerspective(60, width/height, 1, 100)
-    glMatrixMode(GL_MODELVIEW)
-    
-    cube = RubiksCube(size)
-    
-    # Communication queues
-    command_queue = queue.Queue()
-    status_queue = queue.Queue()
-    
-    # Control panel thread
-    panel_thread = threading.Thread(target=lambda: ControlPanel(cube, command_queue).run(), daemon=True)
-    panel_thread.start()
-    
-    # Control variables
-    mouse_down = False
-    last_mouse_pos = [0, 0]
-    clock = pygame.time.Clock()
-    keys_pressed = set()
-    
-    # Auto-scramble variables
-    auto_scramble_timer = 0
-    scramble_delay = 0.3  # seconds between moves
-    
-    print("🎲 Enhanced Rubik's Cube Features:")
-    print("✅ Proper face/slice rotations")
-    print("✅ Only exterior cubes rendered") 
-    print("✅ Support for larger cubes (up to 15×15×15)")
-    print("✅ Undo-based solving")
-    print("✅ Smooth animations")
-    
-    running = True
-    while running:
-        dt = clock.tick(60) / 1000.0
-        
-        # Auto-execute scramble moves
-        if hasattr(cube, 'is_scrambled') and cube.is_scrambled and hasattr(cube, 'scramble_moves'):
-            if cube.scramble_moves and not cube.is_animating:
-                auto_scramble_timer += dt
-                if auto_scramble_timer >= scramble_delay:
-                    if cube.execute_next_scramble():
-                        remaining = len(cube.scramble_moves)
-                        if remaining > 0:
-                            status_queue.put(f"Scrambling... {remaining} moves left")
-                        else:
-                            status_queue.put("Scramble complete! Use SPACE to solve step by step.")
-                            cube.is_scrambled = False
-                    auto_scramble_timer = 0
-        
-        # Process commands
-        try:
-            while True:
-                try:
-                    command, data = command_queue.get_nowait()
-                    if command == 'scramble':
-                        result = cube.scramble()
-                        status_queue.put(result)
-                        auto_scramble_timer = 0
-                    elif command == 'solve_step':
-                        result = cube.solve_step()
-                        status_queue.put(result)
-                    elif command == 'reset_view':
-                        cube.rotation_x = 20
-                        cube.rotation_y = 45
-                        status_queue.put("View reset!")
-                    elif command == 'reset_cube':
-                        cube.reset_cube()
-                        status_queue.put("Cube reset to solved state!")
-                    elif command == 'new_cube':
-                        cube = RubiksCube(data)
-                        pygame.display.set_caption(f"3D Rubik's Cube ({data}×{data}×{data}) - Face Rotations")
-                        status_queue.put(f"New {data}×{data}×{data} cube created!")
-                    elif command == 'manual_rotation':
-                        if cube.apply_rotation(data):
-                            status_queue.put(f"Applied {data} rotation")
-                        else:
-                            status_queue.put("Wait for animation to finish")
-                except queue.Empty:
-                    break
-        except:
-            pass
-        
-        # Send status updates to control panel
-        try:
-            while not status_queue.empty():
-                msg = status_queue.get_nowait()
-                command_queue.put(msg)
-        except:
-            pass
-        
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                running = False
-            
-            elif event.type == KEYDOWN:
-                keys_pressed.add(event.key)
-                
-                if event.key == K_ESCAPE or event.key == K_q:
-                    running = False
-                elif event.key == K_SPACE:
-                    result = cube.solve_step()
-                    status_queue.put(result)
-                elif event.key == K_s:
-                    result = cube.scramble()
-                    status_queue.put(result)
-                    auto_scramble_timer = 0
-                elif event.key == K_r:
-                    cube.rotation_x = 20
-                    cube.rotation_y = 45
-                    status_queue.put("View reset!")
-                
-                # Manual face rotations with shift for counter-clockwise
-                shift_pressed = K_LSHIFT in keys_pressed or K_RSHIFT in keys_pressed
-                clockwise = not shift_pressed
-                
-                if event.key == K_1:  # R face
-                    cube.apply_rotation('R', 0, clockwise)
-                elif event.key == K_2:  # L face
-                    cube.apply_rotation('L', 0, clockwise)
-                elif event.key == K_3:  # U face
-                    cube.apply_rotation('U', 0, clockwise)
-                elif event.key == K_4:  # D face
-                    cube.apply_rotation('D', 0, clockwise)
-                elif event.key == K_5:  # F face
-                    cube.apply_rotation('F', 0, clockwise)
-                elif event.key == K_6:  # B face
-                    cube.apply_rotation('B', 0, clockwise)
-                
-                # Arrow keys for camera
-                elif event.key == K_LEFT:
-                    cube.rotation_y -= 5
-                elif event.key == K_RIGHT:
-                    cube.rotation_y += 5
-                elif event.key == K_UP:
-                    cube.rotation_x -= 5
-                elif event.key == K_DOWN:
-                    cube.rotation_x += 5
-            
-            elif event.type == KEYUP:
-                keys_pressed.discard(event.key)
-            
-            elif event.type == MOUSEBUTTONDOWN:
-                if event.button == 1:
-                    mouse_down = True
-                    last_mouse_pos = pygame.mouse.get_pos()
-            
-            elif event.type == MOUSEBUTTONUP:
-                if event.button == 1:
-                    mouse_down = False
-            
-            elif event.type == MOUSEMOTION:
-                if mouse_down:
-                    mouse_pos = pygame.mouse.get_pos()
-                    dx = mouse_pos[0] - last_mouse_pos[0]
-                    dy = mouse_pos[1] - last_mouse_pos[1]
-                    
-                    cube.rotation_y += dx * 0.3
-                    cube.rotation_x += dy * 0.3
-                    
-                    last_mouse_pos = mouse_pos
-        
-        cube.draw()
-        pygame.display.flip()
-    
-    pygame.quit()
-    sys.exit()
+    """Open the window and control panel; pygame, OpenGL and Tk load only here"""
+    from cubeApp import main as run_app
+    run_app()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
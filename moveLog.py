@@ -0,0 +1,139 @@
+"""Compact move lists holding one 16-bit code per move.
+
+Codes are MoveTables.encode_move() numbers, (face * size + layer) * 2 +
+direction, so every move of cubes up to 5000x5000x5000 fits an array('H').
+A MoveLog keeps a read cursor into its array, so it works as a queue
+(popleft) and a stack (pop) without shifting memory.
+
+Logs save to a small binary file: a fixed header followed by the codes as
+little-endian uint16. Files are written and read back in chunks, so logs of
+millions of moves never become Python tuples.
+"""
+import struct
+from array import array
+from itertools import islice
+import numpy as np
+
+# Magic, format version, cube size, move count
+HEADER = struct.Struct('<4sHHQ')
+MAGIC = b'JZML'
+FORMAT_VERSION = 1
+
+# Moves read or written per chunk when streaming a file
+CHUNK_MOVES = 1 << 16
+
+
+class MoveLog:
+    """Sequence of moves for one cube size, stored as uint16 move codes"""
+    def __init__(self, tables, codes=()):
+        self.tables = tables
+        self.codes = array('H', codes)
+        self.start = 0  # Codes before the cursor have been popped from the left
+
+    def __len__(self):
+        return len(self.codes) - self.start
+
+    def __iter__(self):
+        decode = self.tables.decode_move
+        return (decode(code) for code in islice(self.codes, self.start, None))
+
+    def __getitem__(self, index):
+        """(face, layer, clockwise) move at index, negative indices counting from the end"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MoveLog index out of range")
+        return self.tables.decode_move(self.codes[self.start + index])
+
+    def append(self, move):
+        self.codes.append(self.tables.encode_move(*move))
+
+    def extend(self, moves):
+        """Append (face, layer, clockwise) moves, or the codes of another MoveLog"""
+        if isinstance(moves, MoveLog):
+            self.extend_codes(moves.to_array())
+        else:
+            encode = self.tables.encode_move
+            self.codes.extend(encode(*move) for move in moves)
+
+    def extend_codes(self, codes):
+        """Append move codes from any integer array"""
+        self.codes.frombytes(np.asarray(codes, dtype=np.uint16).tobytes())
+
+    def popleft(self):
+        if not len(self):
+            raise IndexError("pop from an empty MoveLog")
+        code = self.codes[self.start]
+        self.start += 1
+
+        # Drop consumed codes once they make up most of the buffer
+        if self.start >= 4096 and 2 * self.start >= len(self.codes):
+            del self.codes[:self.start]
+            self.start = 0
+        return self.tables.decode_move(code)
+
+    def pop(self):
+        if not len(self):
+            raise IndexError("pop from an empty MoveLog")
+        return self.tables.decode_move(self.codes.pop())
+
+    def clear(self):
+        self.codes = array('H')
+        self.start = 0
+
+    def to_array(self):
+        """Copy of the pending codes as a uint16 NumPy array"""
+        return np.frombuffer(self.codes, dtype=np.uint16)[self.start:].copy()
+
+    def save(self, path):
+        """Write the log to a binary move file"""
+        codes = np.frombuffer(self.codes, dtype=np.uint16)[self.start:]
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.tables.size, len(codes)))
+            for offset in range(0, len(codes), CHUNK_MOVES):
+                file.write(codes[offset:offset + CHUNK_MOVES].astype('<u2').tobytes())
+
+    @classmethod
+    def load(cls, path, tables):
+        """Read a whole move file recorded on a cube of tables.size"""
+        log = cls(tables)
+        size, chunks = read_move_file(path)
+        if size != tables.size:
+            chunks.close()
+            raise ValueError(f"Move file is for a {size}x{size}x{size} cube, not {tables.size}x{tables.size}x{tables.size}")
+        for chunk in chunks:
+            log.extend_codes(chunk)
+        return log
+
+
+def read_move_file(path, chunk_size=CHUNK_MOVES):
+    """(cube size, generator of uint16 code chunks) for a binary move file"""
+    file = open(path, 'rb')
+    try:
+        magic, version, size, count = HEADER.unpack(file.read(HEADER.size))
+    except struct.error:
+        file.close()
+        raise ValueError(f"{path} is not a move file")
+    if magic != MAGIC or version != FORMAT_VERSION:
+        file.close()
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} move file")
+    if not size:
+        file.close()
+        raise ValueError(f"{path} has no cube size")
+
+    # Six faces, size layers and two directions, see MoveTables.encode_move
+    num_moves = 12 * size
+
+    def chunks():
+        with file:
+            remaining = count
+            while remaining:
+                chunk = np.fromfile(file, dtype='<u2', count=min(chunk_size, remaining))
+                if not len(chunk):
+                    raise ValueError(f"{path} ends after {count - remaining} of {count} moves")
+                if chunk.max() >= num_moves:
+                    raise ValueError(f"{path} holds move code {int(chunk.max())}, but a "
+                                     f"{size}x{size}x{size} cube only has {num_moves} moves")
+                remaining -= len(chunk)
+                yield chunk.astype(np.uint16)
+    return size, chunks()
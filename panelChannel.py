@@ -0,0 +1,127 @@
+"""Typed two-way channel between the render process and the control panel process.
+
+Each end wraps one end of a duplex multiprocessing pipe with two threads, so
+neither the pygame loop nor the Tk loop ever blocks on the other:
+
+- a sender drains an outbox. Commands go out one by one and in order. Status
+  fields are coalesced: a field set several times before the sender gets
+  to it is sent once, with its latest value, in a single StatusUpdate.
+- a receiver blocks on the pipe and queues incoming messages, then calls
+  notify() so the owning loop can pick them up without polling.
+
+Closing either end, or the pipe breaking, is reported to the other end as a
+ChannelClosed message.
+"""
+import queue
+import threading
+from typing import NamedTuple
+
+# Requests the panel can make of the render process
+COMMANDS = frozenset({
+    'new_cube', 'scramble', 'solve_step', 'solve', 'reset_view', 'reset_cube',
+    'manual_rotation', 'skip_animation', 'profile', 'trace',
+})
+
+# State the render process reports to the panel
+STATUS_FIELDS = frozenset({'message', 'size', 'skip_animation', 'profiling', 'perf'})
+
+
+class Command(NamedTuple):
+    """Panel request for the render process"""
+    name: str
+    data: object = None
+
+
+class StatusUpdate(NamedTuple):
+    """Latest value of every status field that changed since the previous update"""
+    fields: dict
+
+
+class ChannelClosed(NamedTuple):
+    """Queued once the other end has gone away"""
+
+
+class Channel:
+    """One end of the panel pipe"""
+    def __init__(self, connection, notify=None):
+        self.connection = connection
+        self.notify = notify
+        self.inbox = queue.Queue()
+        self.closed = False
+
+        # Pending commands in order, and the latest value of each status field
+        self.lock = threading.Condition()
+        self.commands = []
+        self.status = {}
+
+        self.sender = threading.Thread(target=self.send_loop, daemon=True)
+        self.sender.start()
+        threading.Thread(target=self.receive_loop, daemon=True).start()
+
+    def send(self, name, data=None):
+        """Queue a command for the other end"""
+        if name not in COMMANDS:
+            raise ValueError(f"Unknown panel command {name!r}")
+        with self.lock:
+            self.commands.append(Command(name, data))
+            self.lock.notify()
+
+    def publish(self, field, value):
+        """Set a status field; only its latest value is sent"""
+        if field not in STATUS_FIELDS:
+            raise ValueError(f"Unknown status field {field!r}")
+        with self.lock:
+            self.status[field] = value
+            self.lock.notify()
+
+    def receive(self):
+        """Messages that arrived since the last call, without blocking"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.inbox.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def send_loop(self):
+        while True:
+            with self.lock:
+                while not (self.commands or self.status or self.closed):
+                    self.lock.wait()
+                messages = self.commands
+                if self.status:
+                    messages.append(StatusUpdate(self.status))
+                self.commands, self.status = [], {}
+                closing = self.closed
+            try:
+                for message in messages:
+                    self.connection.send(message)
+                if closing:
+                    # Tell the other end directly: a receiver blocked on this
+                    # end would keep the pipe open past close()
+                    self.connection.send(ChannelClosed())
+            except (OSError, ValueError):
+                return
+            if closing:
+                return
+
+    def receive_loop(self):
+        while True:
+            try:
+                message = self.connection.recv()
+            except (EOFError, OSError):
+                message = ChannelClosed()
+            if self.closed and not isinstance(message, ChannelClosed):
+                continue
+            self.inbox.put(message)
+            if self.notify is not None:
+                self.notify()
+            if isinstance(message, ChannelClosed):
+                return
+
+    def close(self, timeout=1.0):
+        """Send what is queued, tell the other end, and stop sending"""
+        with self.lock:
+            self.closed = True
+            self.lock.notify()
+        self.sender.join(timeout)
@@ -0,0 +1,262 @@
+"""Seeded scrambles, one at a time or millions at once.
+
+ScrambleGenerator draws from its own NumPy generator, so a seed reproduces
+every scramble it makes. Random-move scrambles are built a move per step
+for many scrambles together. Each step is drawn uniformly from the moves
+that cannot shorten the sequence: turns about one axis come in increasing
+slice order, a slice is never undone, and a half turn is the same quarter
+turn twice. Sizes up to 3 turn outer faces only, like the solvers. Bigger
+cubes turn every slice.
+
+Random-state scrambles (2x2 and 3x3) pick a cubie state uniformly from
+every reachable one, then undo its two-phase solution to get the moves.
+random_states() skips the solving and writes the states straight to
+facelets, for datasets of uniformly random cubes.
+
+    python scrambleGenerator.py scrambles.npz --size 3 --count 1000000 --seed 7
+"""
+import argparse
+import time
+import numpy as np
+
+from jazzCube import CubeBatch, get_move_tables, slice_move, solved_facelets
+
+# Cubes of a bulk call whose facelets are worked on together
+CHUNK = 1 << 16
+
+# Largest table of composed permutations, in entries, that bulk states() may
+# build: runs of moves are applied with one gather per run instead of per move
+BLOCK_TABLE_LIMIT = 1 << 22
+
+
+def default_length(size):
+    """Random-move scramble length for a cube size"""
+    return max(20, size * 10)
+
+
+def parities(perms):
+    """(M,) array: 0 for each even row of an (M, n) permutation array, 1 for each odd one"""
+    inversions = perms[:, :, None] > perms[:, None, :]
+    return np.triu(inversions, 1).sum(axis=(1, 2)) % 2
+
+
+def cubie_layout(size):
+    """Flat sticker indices of each corner and edge slot, and the colors of each piece"""
+    from cubeSolver import CORNER_NAMES, EDGE_NAMES, FACE_LETTERS, cubie_cell, sticker_index
+    layout = {}
+    for kind, names in (('corner', CORNER_NAMES), ('edge', EDGE_NAMES)):
+        layout[kind + '_stickers'] = np.array(
+            [[sticker_index(letter, cubie_cell(name, size, 1), size) for letter in name] for name in names])
+        # Solved facelets show the color of each face's own index
+        layout[kind + '_colors'] = np.array([[FACE_LETTERS[letter] for letter in name] for name in names],
+                                            dtype=np.uint8)
+    return layout
+
+
+def cubie_facelets(cubies, size):
+    """(M, 6, N, N) facelets of (M, 8) cp, co and (M, 12) ep, eo arrays; edges only count on a 3x3"""
+    cp, co, ep, eo = cubies
+    layout = cubie_layout(size)
+    count = len(cp)
+    solved = solved_facelets(size).reshape(-1)
+    flat = np.broadcast_to(solved, (count, solved.size)).copy()
+
+    # Piece cp[i] sits in slot i, its first sticker twisted onto sticker co[i]
+    pieces = [('corner', cp, co, 3)]
+    if size == 3:
+        pieces.append(('edge', ep, eo, 2))
+    for kind, perm, orientation, turns in pieces:
+        slots = np.arange(perm.shape[1])
+        stickers, colors = layout[kind + '_stickers'], layout[kind + '_colors']
+        for k in range(turns):
+            np.put_along_axis(flat, stickers[slots, (orientation + k) % turns], colors[perm, k], axis=1)
+    return flat.reshape(count, 6, size, size)
+
+
+class ScrambleGenerator:
+    """Random-move and random-state scrambles for one cube size"""
+    def __init__(self, size, seed=None):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.tables = get_move_tables(size)
+
+        # Slices a scramble turns, and the clockwise move code of each
+        # (axis, slice); the counter-clockwise code is one more
+        self.slices = sorted({0, size - 1}) if size <= 3 else list(range(size))
+        self.base_codes = np.array([
+            [self.tables.encode_move(*slice_move(axis, index, True, size)[:2]) for index in self.slices]
+            for axis in range(3)
+        ], dtype=np.uint16)
+
+        # Random-move walk: the state is the move just made, and each state
+        # lists the moves allowed next
+        self.transitions, self.choices, self.state_codes = self.build_walk()
+
+        # Composed permutations of every run of 1, 2, ... scramble moves,
+        # indexed by the runs' local move numbers; built on first bulk use
+        self.run_tables = None
+        self.local_moves = None
+
+    def build_walk(self):
+        """(next state per state and choice, choices per state, move code per state)"""
+        slices = len(self.slices)
+        # State ((axis * slices + index) * 2 + direction) * 2 + half, where half
+        # marks a completed half turn; one extra state starts every scramble
+        shape = (3, slices, 2, 2)
+        axis, index, direction, half = (a[:, None] for a in np.unravel_index(np.arange(12 * slices), shape))
+        k = np.arange(6 * slices + 1)
+
+        # Choices: either way on any slice of another axis, either way on a
+        # later slice of this axis, or completing a half turn
+        others = 4 * slices
+        later = 2 * (slices - 1 - index)
+        other = k < others
+        same = ~other & (k < others + later)
+        next_state = np.ravel_multi_index((
+            np.where(other, (axis + 1 + k // (2 * slices)) % 3, axis),
+            np.where(other, k // 2 % slices, np.where(same, index + 1 + (k - others) // 2, index)),
+            np.where(other | same, k % 2, 0),
+            ~other & ~same,
+        ), shape, mode='clip')
+        choices = (others + later + ((direction == 0) & (half == 0)))[:, 0]
+
+        # First move: any slice of any axis, either way
+        start = np.ravel_multi_index((k // (2 * slices), k // 2 % slices, k % 2, 0), shape, mode='clip')
+        transitions = np.vstack([next_state, start]).astype(np.int32)
+        choices = np.append(choices, 6 * slices)
+        state_codes = (self.base_codes[axis, index] + direction)[:, 0].astype(np.uint16)
+        return transitions, choices, state_codes
+
+    def build_run_tables(self):
+        """Permutation tables of runs of scramble moves, as long as BLOCK_TABLE_LIMIT allows"""
+        used = np.concatenate([self.base_codes.ravel(), self.base_codes.ravel() + 1])
+        self.local_moves = np.full(self.tables.num_moves, -1, dtype=np.intp)
+        self.local_moves[used] = np.arange(len(used))
+        perms = self.tables.get_perm_matrix()[used].astype(np.int32)
+        self.run_tables = [perms]
+        while self.run_tables[-1].size * len(used) <= BLOCK_TABLE_LIMIT:
+            # Run (a, b) applies a then b: old[perm_a][perm_b] = old[perm_a[perm_b]]
+            self.run_tables.append(self.run_tables[-1][:, perms].reshape(-1, perms.shape[1]))
+
+    def move_codes(self, count, length=None):
+        """(count, length) uint16 move codes of count random-move scrambles"""
+        if length is None:
+            length = default_length(self.size)
+        codes = np.empty((count, length), dtype=np.uint16)
+        state = np.full(count, len(self.choices) - 1)
+        for step in range(length):
+            state = self.transitions[state, self.rng.integers(0, self.choices[state])]
+            codes[:, step] = self.state_codes[state]
+        return codes
+
+    def moves(self, length=None):
+        """One random-move scramble as (face, layer, clockwise) moves"""
+        decode = self.tables.decode_move
+        return [decode(code) for code in self.move_codes(1, length)[0].tolist()]
+
+    def states(self, codes):
+        """(M, 6, N, N) facelets reached by applying each row of move codes to a solved cube"""
+        codes = np.asarray(codes)
+        n = self.size
+        count = len(codes)
+        facelets = np.empty((count, 6, n, n), dtype=np.uint8)
+        if self.run_tables is None and not self.tables.in_place:
+            self.build_run_tables()
+        for start in range(0, count, CHUNK):
+            rows = codes[start:start + CHUNK]
+            batch = CubeBatch(n, len(rows))
+            moves = self.local_moves[rows] if self.run_tables is not None else None
+            if moves is not None and moves.min(initial=0) >= 0:
+                # Scramble moves only: one gather per run of moves
+                flat = batch.facelets.reshape(len(rows), -1)
+                block = len(self.run_tables)
+                for first in range(0, moves.shape[1], block):
+                    run = moves[:, first:first + block]
+                    keys = run @ len(self.run_tables[0]) ** np.arange(run.shape[1] - 1, -1, -1)
+                    flat = np.take_along_axis(flat, self.run_tables[run.shape[1] - 1][keys], axis=1)
+                batch.facelets = flat.reshape(batch.facelets.shape)
+            else:
+                for step in rows.T:
+                    batch.apply_move_codes(step)
+            facelets[start:start + CHUNK] = batch.facelets
+        return facelets
+
+    def bulk(self, count, length=None):
+        """(codes, facelets) of count random-move scrambles and the states they reach"""
+        codes = self.move_codes(count, length)
+        return codes, self.states(codes)
+
+    def check_random_state(self):
+        if self.size not in (2, 3):
+            raise ValueError(f"Random-state scrambles need a 2x2 or 3x3 cube, not {self.size}x{self.size}")
+
+    def random_cubies(self, count):
+        """(cp, co, ep, eo) arrays of count cubie states drawn uniformly from the reachable ones"""
+        self.check_random_state()
+        rng = self.rng
+        cp = rng.permuted(np.tile(np.arange(8), (count, 1)), axis=1)
+        co = rng.integers(0, 3, (count, 8))
+        co[:, 7] = -co[:, :7].sum(axis=1) % 3
+        if self.size == 3:
+            ep = rng.permuted(np.tile(np.arange(12), (count, 1)), axis=1)
+            eo = rng.integers(0, 2, (count, 12))
+            eo[:, 11] = eo[:, :11].sum(axis=1) % 2
+            # Swapping two edges pairs every odd edge permutation with an even one
+            swap = parities(cp) != parities(ep)
+        else:
+            # Corners only: virtual edges get whichever parity matches, as in read_cubie()
+            ep = np.tile(np.arange(12), (count, 1))
+            eo = np.zeros((count, 12), dtype=np.int64)
+            swap = parities(cp) == 1
+        ep[swap, :2] = ep[swap, 1::-1]
+        return cp, co, ep, eo
+
+    def random_state(self, max_length=25, time_limit=1.0):
+        """Moves reaching a uniformly random state of a 2x2 or 3x3 cube.
+
+        The moves undo the state's two-phase solution, so the first call
+        builds the solver tables if they are not cached yet, which takes a
+        while; callers that must stay responsive check tables_ready() first.
+        """
+        from cubeSolver import get_two_phase_solver, search_moves
+        cubie = tuple(array[0].tolist() for array in self.random_cubies(1))
+        solution = get_two_phase_solver().solve_cubie(cubie, max_length, time_limit)
+        if solution is None:
+            raise ValueError("No solution found for the random state")
+        # Undoing the solution from solved reaches the state
+        return search_moves([3 * (m // 3) + 2 - m % 3 for m in reversed(solution)])
+
+    def random_states(self, count):
+        """(M, 6, N, N) facelets of count uniformly random 2x2 or 3x3 states, without their moves"""
+        facelets = [cubie_facelets(self.random_cubies(min(CHUNK, count - start)), self.size)
+                    for start in range(0, count, CHUNK)]
+        if not facelets:
+            return np.empty((0, 6, self.size, self.size), dtype=np.uint8)
+        return np.concatenate(facelets)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate seeded scrambles and their states as NumPy arrays")
+    parser.add_argument('output', help=".npz file for the codes and facelets arrays")
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--length', type=int, help="moves per scramble (default: max(20, 10 * size))")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--random-state', action='store_true',
+                        help="uniformly random 2x2/3x3 states instead, without move codes")
+    args = parser.parse_args(argv)
+
+    generator = ScrambleGenerator(args.size, args.seed)
+    start = time.perf_counter()
+    if args.random_state:
+        arrays = {'facelets': generator.random_states(args.count)}
+    else:
+        codes, facelets = generator.bulk(args.count, args.length)
+        arrays = {'codes': codes, 'facelets': facelets}
+    elapsed = time.perf_counter() - start
+    np.savez(args.output, size=args.size, **arrays)
+    print(f"{args.count} scrambles in {elapsed:.2f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Zobrist hashing of facelet states and an LRU transposition cache.
+
+A state hashes to the XOR of one random 64-bit key per (sticker, color)
+pair. A move only touches the stickers of the slice it turns, so the hash is
+updated by XOR-ing their keys out before the turn and back in after it.
+Keys come from a fixed seed, so every process hashes a state the same way.
+"""
+from collections import OrderedDict
+import numpy as np
+
+from cubeGeometry import FACE_NORMALS, SYMMETRY_MATRICES
+
+SEED = 0x6a617a7a
+
+
+def solved_colorings():
+    """Face colors of a solved cube in each of its 24 orientations"""
+    normals = np.array(FACE_NORMALS)
+    # The rotations are the first 24 symmetries
+    return [[FACE_NORMALS.index(tuple(v)) for v in (normals @ rotation.T).tolist()]
+            for rotation in SYMMETRY_MATRICES[:24]]
+
+
+class ZobristKeys:
+    """Random keys and slice sticker lists for hashing one cube size"""
+    def __init__(self, tables):
+        n = tables.size
+        self.size = n
+        self.sticker_cells = tables.sticker_cells
+        rng = np.random.default_rng([SEED, n])
+        self.keys = rng.integers(np.iinfo(np.uint64).max, size=(6 * n * n, 6),
+                                 dtype=np.uint64, endpoint=True)
+        self.rows = np.arange(6 * n * n)
+
+        # Flat sticker indices of each (axis, index) slice, filled on first use
+        self.stickers = {}
+
+        # Any orientation of a solved cube counts as solved
+        face_keys = np.bitwise_xor.reduce(self.keys.reshape(6, n * n, 6), axis=1)
+        self.solved = {int(np.bitwise_xor.reduce(face_keys[range(6), coloring]))
+                       for coloring in solved_colorings()}
+
+    def full(self, facelets):
+        """Hash of a (6, N, N) facelet array, computed from scratch"""
+        return int(np.bitwise_xor.reduce(self.keys[self.rows, facelets.reshape(-1)]))
+
+    def slice_stickers(self, axis, index):
+        """Flat indices of every sticker on the cubies of one slice"""
+        key = (axis, index)
+        if key not in self.stickers:
+            self.stickers[key] = np.flatnonzero(self.sticker_cells[:, axis] == index)
+        return self.stickers[key]
+
+    def toggle(self, state_hash, facelets, axis, index):
+        """XOR the keys of one slice's stickers into state_hash.
+
+        Called once before a turn of the slice and once after it, this
+        swaps the old colors of the turned stickers for the new ones.
+        """
+        stickers = self.slice_stickers(axis, index)
+        colors = facelets.reshape(-1)[stickers]
+        return state_hash ^ int(np.bitwise_xor.reduce(self.keys[stickers, colors]))
+
+
+_zobrist_keys = {}
+
+
+def get_zobrist_keys(tables):
+    """Shared ZobristKeys for the cube size of a MoveTables, built on first use"""
+    if tables.size not in _zobrist_keys:
+        _zobrist_keys[tables.size] = ZobristKeys(tables)
+    return _zobrist_keys[tables.size]
+
+
+class TranspositionCache:
+    """Least-recently-used map from state hashes to whatever a search stores for them"""
+    def __init__(self, max_entries=1 << 16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, state_hash):
+        return state_hash in self.entries
+
+    def get(self, state_hash, default=None):
+        """Stored value for a hash, marking it recently used"""
+        if state_hash not in self.entries:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(state_hash)
+        return self.entries[state_hash]
+
+    def put(self, state_hash, value):
+        """Store a value, dropping the least recently used entry once full"""
+        self.entries[state_hash] = value
+        self.entries.move_to_end(state_hash)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,120 @@
+"""On-disk cache of precomputed solver tables.
+
+Each table set lives in its own directory named by table kind, cube size and
+format version, one .npy file per array. Sets are loaded memory-mapped, so
+startup only maps files and processes share pages through the OS cache.
+Missing sets are generated in a background thread and moved into place in
+one rename, so readers never see a half-written set.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+CACHE_DIR = os.environ.get('JAZZCUBE_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'jazzCube'))
+
+
+class TableBuild:
+    """A table set being generated in a background thread"""
+    def __init__(self, cache, kind, size, version, build, progress=None):
+        self.progress = 0.0
+        self.message = "Starting"
+        self.error = None
+        self.listeners = [progress] if progress else []
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(cache, kind, size, version, build), daemon=True)
+        self.thread.start()
+
+    def report(self, fraction, message):
+        """Progress callback handed to the table builder"""
+        self.progress, self.message = fraction, message
+        for listener in self.listeners:
+            listener(fraction, message)
+
+    def run(self, cache, kind, size, version, build):
+        try:
+            cache.save(kind, size, version, build(self.report))
+            self.report(1.0, "Done")
+        except Exception as error:
+            self.error = error
+        finally:
+            self.finished.set()
+
+    def done(self):
+        return self.finished.is_set()
+
+    def wait(self):
+        """Block until the set is on disk, re-raising any build error"""
+        self.finished.wait()
+        if self.error is not None:
+            raise self.error
+
+
+class TableCache:
+    """Versioned, memory-mapped table sets keyed by kind and cube size"""
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.builds = {}
+        self.lock = threading.Lock()
+
+    def path(self, kind, size, version):
+        return os.path.join(self.cache_dir, f"{kind}-{size}", f"v{version}")
+
+    def exists(self, kind, size, version):
+        return os.path.isdir(self.path(kind, size, version))
+
+    def load(self, kind, size, version):
+        """Dict of read-only memmapped arrays, or None when the set is missing"""
+        path = self.path(kind, size, version)
+        if not os.path.isdir(path):
+            return None
+        return {name[:-4]: np.load(os.path.join(path, name), mmap_mode='r')
+                for name in os.listdir(path) if name.endswith('.npy')}
+
+    def save(self, kind, size, version, arrays):
+        """Write a table set, replacing older versions of the same kind and size"""
+        path = self.path(kind, size, version)
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+
+        staging = tempfile.mkdtemp(prefix='.build-', dir=parent)
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        try:
+            os.rename(staging, path)
+        except OSError:
+            # Another process finished the same set first
+            shutil.rmtree(staging, ignore_errors=True)
+
+        for entry in os.listdir(parent):
+            if entry != f"v{version}" and entry.startswith('v'):
+                shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+    def generate(self, kind, size, version, build, progress=None):
+        """Start building a set in the background, or join the build in flight.
+
+        build(progress) returns a dict of arrays and may call
+        progress(fraction, message) as it goes.
+        """
+        key = (kind, size, version)
+        with self.lock:
+            running = self.builds.get(key)
+            if running is not None and not (running.done() and running.error is not None):
+                if progress and not running.done():
+                    running.listeners.append(progress)
+                return running
+            self.builds[key] = TableBuild(self, kind, size, version, build, progress)
+            return self.builds[key]
+
+    def get(self, kind, size, version, build, progress=None):
+        """A table set, generated first if needed (blocking until it is ready)"""
+        arrays = self.load(kind, size, version)
+        if arrays is None:
+            self.generate(kind, size, version, build, progress).wait()
+            arrays = self.load(kind, size, version)
+        return arrays
+
+
+# Shared by every solver in this process
+table_cache = TableCache()
@@ -0,0 +1,82 @@
+"""Tests for streaming animation export."""
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from animationExport import encode_png, export_recording, export_recordings, frames, write_y4m
+from jazzCube import RubiksCube
+from moveLog import MoveLog
+
+MOVES = [('R', 0, True), ('U', 0, False), ('F', 0, True)]
+
+
+def decode_png(data):
+    """(height, width, 3) image of an encode_png() file"""
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks, offset = {}, 8
+    while offset < len(data):
+        length, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        chunks[kind] = data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+    width, height = struct.unpack('>II', chunks[b'IHDR'][:8])
+    rows = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(height, -1)
+    assert (rows[:, 0] == 0).all()
+    return rows[:, 1:].reshape(height, width, 3)
+
+
+def test_frames_play_every_move_at_the_frame_rate():
+    cube = RubiksCube(3)
+    cube.move_duration = 0.25
+    start = cube.render_image(32, 32)
+    images = list(frames(cube, iter(MOVES), fps=8, width=32, height=32, hold=0.375))
+    # Three held frames at each end, two frames per 0.25 s move and the finished state
+    assert len(images) == 3 + 3 * 2 + 1 + 3
+    assert (images[0] == start).all()
+    expected = RubiksCube(3)
+    expected.apply_moves(MOVES)
+    assert (cube.facelets == expected.facelets).all()
+    assert (images[-1] == expected.render_image(32, 32)).all()
+
+
+def test_png_files_round_trip():
+    image = np.random.default_rng(0).integers(0, 256, size=(5, 7, 3), dtype=np.uint8)
+    assert (decode_png(encode_png(image)) == image).all()
+
+
+def test_y4m_streams_have_one_plane_set_per_frame(tmp_path):
+    path = str(tmp_path / 'out.y4m')
+    images = [np.full((4, 6, 3), value, dtype=np.uint8) for value in (0, 255)]
+    assert write_y4m(iter(images), path, fps=30) == 2
+    data = open(path, 'rb').read()
+    header, rest = data.split(b'\n', 1)
+    assert header == b'YUV4MPEG2 W6 H4 F30:1 Ip A1:1 C444'
+    assert len(rest) == 2 * (len(b'FRAME\n') + 4 * 6 * 3)
+    # Black and white are studio-swing luma 16 and 235
+    assert rest[6] == 16 and rest[len(rest) // 2 + 6] == 235
+
+
+def test_recordings_stream_move_files(tmp_path):
+    move_file = str(tmp_path / 'moves.jzml')
+    log = MoveLog(RubiksCube(2).tables)
+    log.extend([('R', 0, True), ('U', 0, True)] * 3)
+    log.save(move_file)
+    output = str(tmp_path / 'frames')
+    result = export_recording(output, size=2, moves=MOVES, move_file=move_file, fps=8,
+                              width=24, height=24, move_duration=0.125, hold=0.0)
+    assert result['moves'] == 9 and result['frames'] == 10
+    names = sorted(os.listdir(output))
+    assert names[0] == 'frame_000000.png' and len(names) == 10
+    assert decode_png(open(os.path.join(output, names[-1]), 'rb').read()).shape == (24, 24, 3)
+
+
+def test_parallel_exports_match_serial_ones(tmp_path):
+    jobs = [{'output': str(tmp_path / f"{name}_{seed}.y4m"), 'size': 3, 'scramble': 4, 'seed': seed,
+             'fps': 10, 'width': 16, 'height': 16, 'move_duration': 0.1, 'hold': 0.0}
+            for name in ('serial', 'parallel') for seed in (1, 2)]
+    serial = export_recordings(jobs[:2], workers=1)
+    parallel = export_recordings(jobs[2:], workers=2)
+    assert [result['frames'] for result in serial] == [result['frames'] for result in parallel]
+    for first, second in zip(serial, parallel):
+        assert open(first['output'], 'rb').read() == open(second['output'], 'rb').read()
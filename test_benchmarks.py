@@ -0,0 +1,37 @@
+"""Tests for the benchmark runner and its regression check."""
+import json
+
+from benchmarks import HIGHER_IS_BETTER, compare, main, parse_sizes
+
+
+def faster(results):
+    """Copy of results with every timing ten times better"""
+    if isinstance(results, dict):
+        return {key: faster(value) if not any(part in key for part in HIGHER_IS_BETTER) else value * 10
+                for key, value in results.items()}
+    return results / 10 if isinstance(results, float) else results
+
+
+def test_size_lists_take_ranges():
+    assert parse_sizes('2-5,8') == [2, 3, 4, 5, 8]
+    assert parse_sizes('3') == [3]
+
+
+def test_compare_reports_metrics_that_got_worse():
+    baseline = {'format': 1, 'sizes': {'3': {'rotation_us': {'p50': 10.0}, 'bulk_moves_per_s': 1000.0}}}
+    results = {'format': 1, 'sizes': {'3': {'rotation_us': {'p50': 10.5}, 'bulk_moves_per_s': 800.0}}}
+    regressions = compare(results, baseline, 0.1)
+    assert [entry['metric'] for entry in regressions] == ['sizes.3.bulk_moves_per_s']
+    assert compare(baseline, results, 0.1) == []
+
+
+def test_run_writes_json_and_fails_on_regressions(tmp_path):
+    output = tmp_path / 'run.json'
+    assert main(['--sizes', '2', '--moves', '20', '--solves', '0', '--output', str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert list(results['sizes']) == ['2']
+
+    # A baseline ten times faster turns every timing into a regression
+    (tmp_path / 'baseline.json').write_text(json.dumps(faster(results)))
+    assert main(['--sizes', '2', '--moves', '20', '--solves', '0', '--output', str(output),
+                 '--compare', str(tmp_path / 'baseline.json')]) == 1
@@ -0,0 +1,177 @@
+"""Tests for the asyncio cube session service."""
+import asyncio
+import json
+import random
+
+import pytest
+
+from cubeService import CubeClient, CubeService
+from jazzCube import MOVE_AXES, RubiksCube
+
+
+def run(test):
+    """Run an async test against a started service and one connected client"""
+    async def main():
+        service = CubeService(idle_timeout=1000.0)
+        host, port = await service.start()
+        client = await CubeClient.connect(host, port)
+        try:
+            await test(service, client)
+        finally:
+            await client.close()
+            await service.close()
+    asyncio.run(main())
+
+
+def random_moves(size, count, rng):
+    return [(rng.choice(list(MOVE_AXES)), rng.randrange(size), rng.random() < 0.5) for _ in range(count)]
+
+
+def expected_facelets(size, moves):
+    cube = RubiksCube(size)
+    cube.apply_moves(moves)
+    return (cube.facelets.reshape(-1) + ord('0')).tobytes().decode('ascii')
+
+
+def test_batched_sessions_match_single_cubes():
+    async def test(service, client):
+        rng = random.Random(0)
+        sessions = [((await client.request('create', size=size))['session'], size)
+                    for size in (2, 3, 3, 4, 25, 3)]
+        played = {session: [] for session, _ in sessions}
+
+        async def play(session, size):
+            moves = random_moves(size, 5, rng)
+            played[session] += moves
+            await service.move(session, moves)
+
+        for _ in range(4):
+            await asyncio.gather(*(play(session, size) for session, size in sessions))
+        assert service.batches < 4 * len(sessions)
+        for session, size in sessions:
+            state = await client.request('state', session=session)
+            assert state['facelets'] == expected_facelets(size, played[session])
+            assert state['history'] == 20
+    run(test)
+
+
+def test_undo_sees_moves_queued_earlier_in_the_batch():
+    async def test(service, client):
+        session = (await client.request('create', size=3))['session']
+        results = await asyncio.gather(service.move(session, [['R', 0, True], ['U', 0, True]]),
+                                       service.undo(session, 1),
+                                       service.move(session, [['F', 0, False]]),
+                                       service.undo(session, 5))
+        assert [result['history'] for result in results] == [0, 0, 0, 0]
+        assert all(result['solved'] for result in results)
+        assert service.batches == 1
+    run(test)
+
+
+@pytest.mark.parametrize('count', [True, -1, 1.5, 'x', None])
+def test_undo_counts_are_validated(count):
+    async def test(service, client):
+        session = (await client.request('create', size=3))['session']
+        with pytest.raises(ValueError, match="Undo count"):
+            await client.request('undo', session=session, count=count)
+    run(test)
+
+
+def test_bad_requests_answer_with_errors():
+    async def test(service, client):
+        session = (await client.request('create', size=3))['session']
+        # JSON's 1e400 parses to infinity
+        client.writer.write(b'{"op": "undo", "session": "%s", "count": 1e400, "id": 7}\n' % session.encode())
+        await client.writer.drain()
+        response = json.loads(await client.reader.readline())
+        assert response['ok'] is False and response['id'] == 7
+
+        for request in [dict(op='move', session='nope', moves=[]),
+                        dict(op='move', session=session, moves=[['X', 0, True]]),
+                        dict(op='move', session=session, moves=[['R', 1.0, True]]),
+                        dict(op='move', session=session, moves=[['R', 0, 1]]),
+                        dict(op='scramble', session=session, count=10 ** 9),
+                        dict(op='create', size=0),
+                        dict(op='move', session=session),
+                        dict(op='bogus')]:
+            with pytest.raises(ValueError):
+                await client.request(**request)
+        assert (await client.request('state', session=session))['history'] == 0
+    run(test)
+
+
+def test_unexpected_errors_keep_the_connection():
+    async def test(service, client):
+        async def broken(request):
+            raise ZeroDivisionError("division by zero")
+        dispatch, service.dispatch = service.dispatch, broken
+        with pytest.raises(ValueError, match="Internal error: ZeroDivisionError"):
+            await client.request('stats')
+        service.dispatch = dispatch
+        assert (await client.request('stats'))['sessions'] == 0
+    run(test)
+
+
+def test_failed_batches_leave_histories_alone():
+    async def test(service, client):
+        session = (await client.request('create', size=3))['session']
+        await service.move(session, [['R', 0, True], ['U', 0, True]])
+        store = service.sessions[session].store
+
+        def fail(*args):
+            raise RuntimeError("out of memory")
+        store.apply_sequences = fail
+        with pytest.raises(RuntimeError):
+            await service.move(session, [['F', 0, True]])
+        with pytest.raises(RuntimeError):
+            await service.undo(session, 2)
+        del store.apply_sequences
+        state = service.state(session)
+        assert state['history'] == 2 and state['pending'] == 0
+        assert state['facelets'] == expected_facelets(3, [('R', 0, True), ('U', 0, True)])
+    run(test)
+
+
+def test_scrambles_are_reproducible_when_seeded():
+    async def test(service, client):
+        first, second = [(await client.request('create', size=4))['session'] for _ in range(2)]
+        await client.request('scramble', session=first, seed=5, count=30)
+        await client.request('scramble', session=second, seed=5, count=30)
+        states = [(await client.request('state', session=session))['facelets'] for session in (first, second)]
+        assert states[0] == states[1] and not (await client.request('state', session=first))['solved']
+    run(test)
+
+
+def test_memory_limit_evicts_only_what_it_needs():
+    async def main():
+        service = CubeService(idle_timeout=0.4, max_memory=200_000)
+        await service.start()
+        try:
+            for _ in range(400):
+                service.create_session(10)
+            per_session = sum(service.session_bytes(next(iter(service.sessions.values()))))
+            assert service.memory_usage()['total_bytes'] > 200_000
+            await asyncio.sleep(0.25)
+            usage = service.memory_usage()['total_bytes']
+            assert 200_000 - per_session < usage <= 200_000
+            assert service.evictions == 400 - len(service.sessions)
+
+            # Sessions with moves in flight cannot be evicted, so eviction stops
+            for session in service.sessions.values():
+                session.pending += 1
+            service.max_memory = 0
+            await asyncio.sleep(0.25)
+            assert service.memory_usage()['total_bytes'] == usage
+        finally:
+            await service.close()
+    asyncio.run(main())
+
+
+def test_closing_the_last_session_of_a_size_frees_its_array():
+    async def test(service, client):
+        session = (await client.request('create', size=5))['session']
+        assert 5 in service.stores
+        await client.request('close', session=session)
+        assert 5 not in service.stores
+        assert (await client.request('stats'))['sessions'] == 0
+    run(test)
@@ -0,0 +1,91 @@
+"""Tests for the two-phase and reduction solvers.
+
+The first test to need the two-phase tables builds them, which takes a few
+seconds.
+"""
+import os
+import random
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from cubeSolver import SolverPool, get_two_phase_solver, solve
+from jazzCube import MOVE_AXES, RubiksCube, facelets_solved
+
+
+def scrambled(size, seed, length=40):
+    rng = random.Random(seed)
+    faces = list(MOVE_AXES)
+    cube = RubiksCube(size)
+    cube.apply_moves([(rng.choice(faces), rng.randrange(size), rng.random() < 0.5) for _ in range(length)])
+    return cube
+
+
+def face_turns(moves):
+    """Face-turn count of a move list, a half turn being one move"""
+    return sum(1 for i, move in enumerate(moves) if i == 0 or move != moves[i - 1])
+
+
+@pytest.mark.parametrize('size, seed', [(2, 0), (2, 1), (3, 0), (3, 1), (3, 2), (4, 0)])
+def test_solver_round_trip(size, seed):
+    cube = scrambled(size, seed)
+    moves = solve(cube, max_length=25, time_limit=30.0)
+    if size <= 3:
+        assert face_turns(moves) <= 25
+    cube.apply_moves(moves)
+    assert facelets_solved(cube.facelets)
+
+
+def test_solved_cube_needs_no_moves():
+    assert solve(RubiksCube(3)) == []
+
+
+def test_unreachable_states_are_rejected():
+    cube = scrambled(3, 3)
+    # Swapping two stickers of one corner twists it in place
+    cube.facelets[0, 2, 2], cube.facelets[2, 2, 2] = cube.facelets[2, 2, 2], cube.facelets[0, 2, 2]
+    with pytest.raises(ValueError):
+        solve(cube)
+
+
+def test_search_without_a_solution_raises(monkeypatch):
+    solver = get_two_phase_solver()
+    monkeypatch.setattr(solver, 'solve_cubie', lambda *args: None)
+    with pytest.raises(ValueError, match="No solution found"):
+        solver.solve_facelets(scrambled(3, 4).facelets)
+
+
+@pytest.fixture
+def pool():
+    pool = SolverPool(2)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_solves_in_the_background(pool):
+    cube = scrambled(3, 5)
+    moves = pool.solve(cube.facelets, time_limit=5.0).result(timeout=120)
+    cube.apply_moves(moves)
+    assert facelets_solved(cube.facelets)
+    assert pool.solve(cube.facelets).result(timeout=1) == []
+
+
+def test_pool_recovers_from_a_killed_worker(pool):
+    pool.executor.submit(time.sleep, 0).result()
+    broken = pool.executor
+    cube = scrambled(3, 6)
+    # No solution is one move long, so the search runs until it is killed
+    cube.pending_solve = (pool.solve(cube.facelets, max_length=1, time_limit=60.0), cube.state_version)
+    time.sleep(0.5)
+    for process in broken._processes.values():
+        os.kill(process.pid, signal.SIGKILL)
+    with pytest.raises(BrokenProcessPool):
+        cube.pending_solve[0].result(timeout=60)
+    assert cube.finish_solve().startswith("Cannot solve")
+    assert pool.executor is not broken
+
+    moves = pool.solve(cube.facelets, time_limit=5.0).result(timeout=120)
+    cube.apply_moves(moves)
+    assert facelets_solved(cube.facelets)
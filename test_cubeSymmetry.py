@@ -0,0 +1,86 @@
+"""Tests for symmetry reduction of cube states."""
+import random
+
+import numpy as np
+import pytest
+
+from cubeSymmetry import get_symmetries
+from jazzCube import MOVE_AXES, RubiksCube, facelets_solved, get_move_tables, slice_move, slice_turn
+
+
+def random_moves(size, count, seed):
+    rng = random.Random(seed)
+    return [(rng.choice(list(MOVE_AXES)), rng.randrange(size), rng.random() < 0.5) for _ in range(count)]
+
+
+def scrambled(size, seed, length=30):
+    cube = RubiksCube(size)
+    cube.apply_moves(random_moves(size, length, seed))
+    return cube
+
+
+def moved(size, facelets, moves):
+    cube = RubiksCube(size)
+    cube.facelets = facelets.copy()
+    cube.apply_moves(moves)
+    return cube.facelets
+
+
+@pytest.mark.parametrize('size', [2, 3, 4])
+def test_symmetries_keep_a_solved_cube_solved(size):
+    symmetries = get_symmetries(get_move_tables(size))
+    solved = RubiksCube(size).facelets
+    assert (symmetries.apply(solved, 0) == solved).all()
+    for symmetry in range(48):
+        assert facelets_solved(symmetries.apply(solved, symmetry))
+        assert sorted(symmetries.perms[symmetry]) == list(range(6 * size * size))
+        state = scrambled(size, symmetry).facelets
+        inverse = symmetries.inverse[symmetry]
+        assert (symmetries.apply(symmetries.apply(state, symmetry), inverse) == state).all()
+
+
+@pytest.mark.parametrize('size', [2, 3, 4])
+def test_symmetric_states_share_one_canonical_form(size):
+    symmetries = get_symmetries(get_move_tables(size))
+    state = scrambled(size, 1).facelets
+    canonical, symmetry, _ = symmetries.canonicalize(state)
+    assert (symmetries.apply(state, symmetry) == canonical).all()
+    variants = np.array([symmetries.apply(state, s) for s in range(48)])
+    batch, _, _ = symmetries.canonicalize(variants)
+    assert (batch == canonical).all()
+
+
+def test_recolored_canonical_form_ignores_the_color_scheme():
+    symmetries = get_symmetries(get_move_tables(3))
+    state = scrambled(3, 2).facelets
+    canonical, symmetry, colors = symmetries.canonicalize(state, recolor=True)
+    assert (symmetries.apply(state, symmetry, colors) == canonical).all()
+    relabeled = np.array([3, 5, 0, 1, 4, 2], dtype=np.uint8)[state]
+    assert (symmetries.canonicalize(relabeled, recolor=True)[0] == canonical).all()
+
+
+@pytest.mark.parametrize('size', [2, 3, 4])
+def test_transformed_turns_commute_with_the_symmetry(size):
+    symmetries = get_symmetries(get_move_tables(size))
+    state = scrambled(size, 3).facelets
+    moves = random_moves(size, 10, 4)
+    turns = [slice_turn(*move, size) for move in moves]
+    after = moved(size, state, moves)
+    for symmetry in range(48):
+        mapped = [slice_move(*turn, size) for turn in symmetries.transform_turns(turns, symmetry)]
+        expected = symmetries.apply(after, symmetry)
+        assert (moved(size, symmetries.apply(state, symmetry), mapped) == expected).all(), symmetry
+
+
+def test_cached_solutions_serve_symmetric_states():
+    cube = scrambled(3, 5, length=8)
+    solution = [(face, layer, not clockwise) for face, layer, clockwise in reversed(list(cube.move_history))]
+    cube.remember_solution(solution)
+
+    # Mirror the same cube, whose solution cache now holds the original state
+    cube.facelets = get_symmetries(cube.tables).apply(cube.facelets, 40)
+    cube.state_hash = cube.zobrist.full(cube.facelets)
+    moves = cube.recall_solution()
+    assert moves is not None and len(moves) == len(solution)
+    cube.apply_moves(moves)
+    assert facelets_solved(cube.facelets)
@@ -0,0 +1,43 @@
+"""Tests for the main-loop frame profiler."""
+import json
+
+from frameProfiler import FrameProfiler
+
+
+def run_frames(profiler, count):
+    for frame in range(count):
+        profiler.start_frame()
+        profiler.mark('events')
+        profiler.mark('draw')
+        profiler.end_frame({'draw_calls': frame})
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = FrameProfiler()
+    run_frames(profiler, 3)
+    assert profiler.stats() == {} and profiler.summary == ""
+
+
+def test_stats_cover_a_rolling_window():
+    profiler = FrameProfiler(window=5)
+    profiler.enable()
+    run_frames(profiler, 8)
+    stats = profiler.stats()
+    assert list(stats) == ['events', 'draw', 'frame']
+    assert all(len(seconds) == 5 for seconds in profiler.stages.values())
+    assert stats['frame']['max'] >= stats['frame']['mean'] >= 0
+    assert profiler.counters == {'draw_calls': 7}
+    assert "draw calls" in profiler.format_summary()
+
+
+def test_traces_are_chrome_trace_json(tmp_path):
+    path = str(tmp_path / 'trace.json')
+    profiler = FrameProfiler()
+    profiler.start_trace(path)
+    assert profiler.enabled
+    run_frames(profiler, 3)
+    assert profiler.stop_trace() == path
+    events = json.load(open(path))
+    assert [event['name'] for event in events if event['ph'] == 'X'] == ['events', 'draw', 'frame'] * 3
+    assert sum(event['ph'] == 'C' for event in events) == 3
+    assert profiler.stop_trace() is None
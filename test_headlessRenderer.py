@@ -0,0 +1,52 @@
+"""Tests for the windowless NumPy renderer."""
+import numpy as np
+
+from headlessRenderer import BORDER_SIZE, HeadlessRenderer, render_thumbnails
+from jazzCube import RubiksCube
+
+
+def scrambled(size):
+    cube = RubiksCube(size)
+    cube.apply_moves([('R', 0, True), ('U', 0, False), ('F', size - 1, True), ('L', 0, True)])
+    return cube
+
+
+def test_solved_cube_shows_three_faces():
+    renderer = HeadlessRenderer(3, 96, 96)
+    image = renderer.render(RubiksCube(3).facelets)
+    assert image.shape == (96, 96, 3) and image.dtype == np.uint8
+    sticker_map = renderer.sticker_map()
+    faces = np.unique(sticker_map[sticker_map < renderer.length] // 9)
+    # The default camera looks at the front, left and top faces
+    assert faces.tolist() == [0, 3, 4]
+    palette = renderer.palette()
+    for face in range(6):
+        assert (image == palette[face]).all(axis=-1).any() == (face in faces)
+
+
+def test_each_pixel_shows_its_sticker():
+    renderer = HeadlessRenderer(3, 64, 48)
+    cube = scrambled(3)
+    image = renderer.render(cube.facelets)
+    sticker_map = renderer.sticker_map()
+    codes = np.concatenate([cube.facelets.reshape(-1), [6, 7]])
+    assert (image == renderer.palette()[codes[sticker_map]]).all()
+    assert (render_thumbnails([cube.facelets, RubiksCube(3).facelets], 64, 48)[0] == image).all()
+
+
+def test_finished_animation_frame_matches_the_turned_state():
+    renderer = HeadlessRenderer(3, 96, 96)
+    cube = scrambled(3)
+    assert cube.apply_rotation('U', 0, True)
+    frames = renderer.render_frames(cube.facelets, cube.current_rotation, [0.0, 0.5, 1.0])
+    assert (frames[0] == renderer.render(cube.facelets)).all()
+    assert not (frames[1] == frames[0]).all()
+    cube.complete_rotation()
+    assert (frames[2] == renderer.render(cube.facelets)).all()
+
+
+def test_large_cubes_drop_the_wireframe():
+    renderer = HeadlessRenderer(BORDER_SIZE + 1, 64, 64)
+    assert not (renderer.sticker_map() == renderer.border).any()
+    small = HeadlessRenderer(3, 64, 64)
+    assert (small.sticker_map() == small.border).any()
@@ -0,0 +1,344 @@
+"""Tests for the cube engine.
+
+Run with `python -m pytest -q`.
+"""
+import os
+import random
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from jazzCube import (MOVE_AXES, PERM_TABLE_LIMIT, CubeBatch, RubiksCube, get_move_tables, rotate_slice,
+                      simplify_moves, slice_turn, sticker_position)
+
+SIZES = [1, 2, 3, 4, 5]
+
+# Outward normal of each facelet face (front, back, right, left, top, bottom)
+NORMALS = np.array([(0, 0, 1), (0, 0, -1), (1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)])
+
+
+def all_moves(size):
+    return [(face, layer, clockwise) for face in MOVE_AXES for layer in range(size)
+            for clockwise in (True, False)]
+
+
+def random_moves(size, count, seed):
+    rng = random.Random(seed)
+    return [(rng.choice(list(MOVE_AXES)), rng.randrange(size), rng.random() < 0.5) for _ in range(count)]
+
+
+def turn(cube, moves):
+    """Play moves through the animation path, finishing each one at once"""
+    for move in moves:
+        assert cube.apply_rotation(*move)
+        cube.complete_rotation()
+        cube.is_animating = False
+
+
+def scrambled(size, seed, length=30):
+    cube = RubiksCube(size)
+    turn(cube, random_moves(size, length, seed))
+    return cube
+
+
+def move_perm(size, face, layer, clockwise):
+    """new_flat = old_flat[perm] for one move, found by turning an index array"""
+    perm = np.arange(6 * size * size).reshape(6, size, size)
+    rotate_slice(perm, *slice_turn(face, layer, clockwise, size))
+    return perm.ravel()
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_move_then_inverse_is_identity(size):
+    cube = scrambled(size, 1, 10)
+    start = cube.facelets.copy()
+    for face, layer, clockwise in all_moves(size):
+        turn(cube, [(face, layer, clockwise), (face, layer, not clockwise)])
+        assert (cube.facelets == start).all()
+        turn(cube, [(face, layer, clockwise)] * 4)
+        assert (cube.facelets == start).all()
+
+
+@pytest.mark.parametrize('size', [2, 3, 4])
+def test_clockwise_as_seen_from_the_named_face(size):
+    faces = np.repeat(np.arange(6), size * size)
+    cells = np.array([sticker_position(face, i, j, size) for face in range(6)
+                      for i in range(size) for j in range(size)])
+    # Doubled sticker coordinates centered on the cube
+    coords = 2 * cells - (size - 1) + NORMALS[faces]
+    for face, (axis, positive) in MOVE_AXES.items():
+        outward = np.eye(3, dtype=int)[axis] * (1 if positive else -1)
+        for layer in range(size):
+            perm = move_perm(size, face, layer, True)
+            moved = perm != np.arange(len(perm))
+            # Clockwise seen from outside is -90 degrees about the outward normal
+            source = coords[perm[moved]]
+            turned = -np.cross(outward, source) + np.outer(source @ outward, outward)
+            assert (turned == coords[moved]).all(), (face, layer)
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_move_tables_match_slice_turns(size):
+    tables = get_move_tables(size)
+    assert get_move_tables(size) is tables
+    for move in all_moves(size):
+        assert (tables.move_perm(*move) == move_perm(size, *move)).all(), move
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_every_color_keeps_its_sticker_count(size):
+    cube = scrambled(size, 2)
+    assert (np.bincount(cube.facelets.ravel(), minlength=6) == size * size).all()
+
+
+@pytest.mark.parametrize('face, layer', [('X', 0), ('R', 3), ('R', -1), ('R', 1.0), ('R', True)])
+def test_invalid_moves_are_rejected(face, layer):
+    cube = RubiksCube(3)
+    assert not cube.apply_rotation(face, layer, True)
+    assert (cube.facelets == np.arange(6)[:, None, None]).all()
+
+
+def test_reset_restores_the_solved_state():
+    cube = scrambled(3, 3)
+    cube.reset_cube()
+    assert (cube.facelets == np.arange(6)[:, None, None]).all()
+    assert cube.facelets.dtype == np.uint8
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_apply_moves_matches_animated_turns(size):
+    moves = random_moves(size, 40, 4)
+    animated = RubiksCube(size)
+    turn(animated, moves)
+    direct = RubiksCube(size)
+    assert direct.apply_moves(moves)
+    assert (direct.facelets == animated.facelets).all()
+    assert list(direct.move_history) == list(animated.move_history)
+
+
+def test_only_reused_sequences_are_cached():
+    tables = get_move_tables(3)
+    tables.sequences.clear()
+    tables.sequence_bytes = 0
+    cube = RubiksCube(3)
+    cube.apply_moves(random_moves(3, 20, 5))
+    assert not tables.sequences
+
+    start = cube.facelets.copy()
+    algorithm = [('R', 0, True), ('U', 0, True), ('R', 0, False), ('U', 0, False)]
+    for _ in range(6):
+        cube.apply_moves(algorithm, reuse=True)
+    assert list(tables.sequences) == [tuple(algorithm)]
+    # R U R' U' has order 6
+    assert (cube.facelets == start).all()
+
+
+def test_sequence_cache_stays_within_its_byte_limit():
+    tables = get_move_tables(2)
+    tables.sequences.clear()
+    tables.sequence_bytes = 0
+    limit = tables.max_sequence_bytes
+    perm_bytes = tables.compose([]).nbytes
+    tables.max_sequence_bytes = 3 * perm_bytes
+    try:
+        for move in all_moves(2):
+            tables.compose([move], reuse=True)
+        assert len(tables.sequences) == 3
+        assert tables.sequence_bytes == 3 * perm_bytes
+        assert list(tables.sequences) == [(move,) for move in all_moves(2)[-3:]]
+    finally:
+        tables.max_sequence_bytes = limit
+
+
+@pytest.mark.parametrize('size', [2, 3, 4])
+def test_batch_moves_match_single_cubes(size):
+    rng = random.Random(6)
+    batch = CubeBatch(size, 8)
+    cubes = [RubiksCube(size) for _ in range(8)]
+    shared = random_moves(size, 5, 7)
+    batch.apply_moves(shared)
+    for cube in cubes:
+        cube.apply_moves(shared)
+    for _ in range(10):
+        moves = [rng.choice(all_moves(size)) for _ in cubes]
+        batch.apply_per_cube(moves)
+        for cube, move in zip(cubes, moves):
+            cube.apply_moves([move])
+    for facelets, cube in zip(batch.facelets, cubes):
+        assert (facelets == cube.facelets).all()
+
+
+def test_batch_masks_and_histograms():
+    batch = CubeBatch(3, 4)
+    codes = np.array([batch.tables.encode_move('R'), batch.tables.encode_move('U', 0, False), 0, 0])
+    batch.apply_move_codes(codes)
+    batch.apply_move_codes(codes ^ 1)
+    batch.apply_per_cube([('F', 0, True), ('F', 0, True), ('F', 0, True), ('F', 0, False)])
+    batch.apply_per_cube([('F', 0, False), ('U', 0, True), ('B', 0, True), ('F', 0, True)])
+    assert batch.solved_mask().tolist() == [True, False, False, True]
+
+    histograms = batch.face_histograms()
+    assert histograms.shape == (4, 6, 6)
+    assert (histograms.sum(axis=2) == 9).all()
+    assert (histograms[0] == 9 * np.eye(6, dtype=int)).all()
+    # F then U: the top face keeps 6 of its own stickers and gains 3 from the left
+    top = histograms[1, 4]
+    assert top[4] == 6 and top[3] == 3
+
+
+def test_batch_rejects_a_code_count_that_does_not_match():
+    with pytest.raises(ValueError):
+        CubeBatch(3, 4).apply_move_codes(np.zeros(3, dtype=np.intp))
+
+
+def test_large_cubes_turn_in_place():
+    size = PERM_TABLE_LIMIT + 1
+    tables = get_move_tables(size)
+    assert tables.in_place
+    with pytest.raises(ValueError):
+        tables.get_perm_matrix()
+
+    moves = random_moves(size, 30, 8)
+    animated = RubiksCube(size)
+    turn(animated, moves)
+    direct = RubiksCube(size)
+    direct.apply_moves(moves)
+    assert (direct.facelets == animated.facelets).all()
+    solved = RubiksCube(size).facelets.ravel()
+    assert (solved[tables.compose(moves)] == direct.facelets.ravel()).all()
+
+    batch = CubeBatch(size, 3)
+    for step in range(10):
+        batch.apply_per_cube([moves[step], moves[step], moves[step + 10]])
+    cube = RubiksCube(size)
+    cube.apply_moves(moves[:10])
+    assert (batch.facelets[0] == cube.facelets).all() and (batch.facelets[1] == cube.facelets).all()
+    cube = RubiksCube(size)
+    cube.apply_moves(moves[10:20])
+    assert (batch.facelets[2] == cube.facelets).all()
+
+
+def test_queued_moves_follow_the_wall_clock():
+    # Alternating axes keeps every move in a step of its own
+    moves = [(face, 0, clockwise) for face, clockwise in zip('RUFLDB' * 2, [True, False, True] * 4)][:10]
+    cube = RubiksCube(3)
+    cube.queue_moves(moves)
+    cube.update_animation(now=0.0)
+    cube.update_animation(now=cube.move_duration / 2)
+    assert cube.is_animating and cube.animation_progress == pytest.approx(0.5)
+    assert len(cube.move_history) == 0
+
+    # A slow frame commits whole moves instead of falling behind
+    cube.update_animation(now=cube.move_duration * 3.25)
+    assert len(cube.move_history) == 3 and cube.animation_progress == pytest.approx(0.25)
+    cube.update_animation(now=60.0)
+    expected = RubiksCube(3)
+    expected.apply_moves(moves)
+    assert not cube.is_animating and (cube.facelets == expected.facelets).all()
+
+
+def test_long_queues_finish_within_max_queue_time():
+    cube = RubiksCube(2)
+    cube.queue_moves(random_moves(2, 200, 10))
+    assert 200 * cube.move_duration > cube.max_queue_time
+    frame = 0
+    while cube.move_queue or cube.is_animating:
+        cube.update_animation(now=frame / 60)
+        frame += 1
+    assert len(cube.move_history) == 200
+    assert cube.max_queue_time - 0.5 < frame / 60 <= cube.max_queue_time + 0.05
+
+
+@pytest.mark.parametrize('size', [2, 3, 4, 5])
+def test_simplified_moves_have_the_same_effect(size):
+    for seed in range(5):
+        moves = random_moves(size, 60, 11 + seed)
+        simplified = simplify_moves(moves, size)
+        assert len(simplified) <= len(moves)
+        tables = get_move_tables(size)
+        assert (tables.compose(simplified) == tables.compose(moves)).all()
+        assert simplify_moves(simplified, size) == simplified
+
+
+def test_simplify_merges_turns_about_one_axis():
+    R, R_, L, U, U_ = ('R', 0, True), ('R', 0, False), ('L', 0, True), ('U', 0, True), ('U', 0, False)
+    assert simplify_moves([R, R_], 3) == []
+    # L commutes with R, so R L R' leaves only L
+    assert simplify_moves([R, L, R_], 3) == simplify_moves([L], 3)
+    # Cancelling the U turns brings the R turns together
+    assert simplify_moves([R, U, U_, R], 3) == simplify_moves([R, R], 3)
+    assert len(simplify_moves([R, R], 3)) == 2
+    assert len(simplify_moves([R, R, R], 3)) == 1
+
+
+def test_undo_steps_through_the_simplified_history():
+    cube = RubiksCube(3)
+    moves = [('R', 0, True), ('U', 0, True), ('U', 0, False), ('F', 0, True), ('F', 0, True), ('F', 0, True)]
+    turn(cube, moves)
+    undone = 0
+    while cube.solve_step().startswith("Undid"):
+        cube.complete_rotation()
+        cube.is_animating = False
+        undone += 1
+    assert undone == 2
+    assert (cube.facelets == np.arange(6)[:, None, None]).all()
+
+
+def test_queued_turns_of_one_axis_animate_as_one_step():
+    moves = [('R', 0, True), ('L', 0, True), ('R', 1, False), ('U', 0, True), ('R', 0, True)]
+    cube = RubiksCube(3)
+    cube.queue_moves(moves)
+    cube.update_animation(now=0.0)
+    assert cube.current_rotation['moves'] == moves[:3]
+    cube.update_animation(now=cube.move_duration * 1.5)
+    assert len(cube.move_history) == 3 and cube.current_rotation['moves'] == [moves[3]]
+    cube.update_animation(now=60.0)
+    expected = RubiksCube(3)
+    expected.apply_moves(moves)
+    assert (cube.facelets == expected.facelets).all()
+    assert list(cube.move_history) == moves
+
+
+def test_engine_imports_without_gui_modules():
+    code = ("import sys, jazzCube, cubeSolver, headlessRenderer; "
+            "print(sorted({'pygame', 'OpenGL', 'tkinter'} & {name.split('.')[0] for name in sys.modules}))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.strip() == '[]'
+
+
+def test_idle_time_does_not_skip_the_next_animation():
+    cube = RubiksCube(3)
+    cube.update_animation(now=0.0)
+    cube.queue_moves([('R', 0, True)])
+    cube.update_animation(now=100.0)
+    assert cube.is_animating and cube.animation_progress == 0.0
+    cube.update_animation(now=100.0 + cube.move_duration / 2)
+    assert cube.animation_progress == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize('size', [3, PERM_TABLE_LIMIT + 1])
+def test_batch_slots_apply_their_own_sequences(size):
+    batch = CubeBatch(size, 0)
+    cubes = [batch.allocate() for _ in range(20)]
+    assert batch.count >= 20 and sorted(cubes) == list(range(20))
+    batch.release(cubes[3])
+    assert batch.allocate() == cubes[3]
+
+    tables = batch.tables
+    sequences = [random_moves(size, length, 12 + length) for length in (0, 3, 7, 1)]
+    used = [cubes[5], cubes[2], cubes[3], cubes[0]]
+    batch.apply_sequences(used, [np.array([tables.encode_move(*move) for move in moves], dtype=np.intp)
+                                 for moves in sequences])
+    for cube, moves in zip(used, sequences):
+        single = RubiksCube(size)
+        single.apply_moves(moves)
+        assert (batch.facelets[cube] == single.facelets).all()
+    assert batch.solved_mask(used).tolist() == [True, False, False, False]
+    assert batch.solved_mask([cubes[1]]).tolist() == [True]
+
+    # A released cube comes back solved
+    batch.release(cubes[2])
+    assert batch.solved_mask([batch.allocate()]).tolist() == [True]
@@ -0,0 +1,77 @@
+"""Tests for move logs and the binary move file format."""
+import random
+
+import numpy as np
+import pytest
+
+from jazzCube import MOVE_AXES, RubiksCube, get_move_tables
+from moveLog import HEADER, MoveLog, read_move_file
+
+
+def random_moves(size, count, seed):
+    rng = random.Random(seed)
+    return [(rng.choice(list(MOVE_AXES)), rng.randrange(size), rng.random() < 0.5) for _ in range(count)]
+
+
+def test_log_works_as_queue_and_stack():
+    moves = random_moves(4, 6, 0)
+    log = MoveLog(get_move_tables(4))
+    log.extend(moves)
+    assert list(log) == moves and log[-1] == moves[-1]
+    assert log.popleft() == moves[0]
+    assert log.pop() == moves[-1]
+    assert list(log) == moves[1:-1] and len(log) == 4
+    log.clear()
+    with pytest.raises(IndexError):
+        log.pop()
+
+
+def test_files_round_trip_in_chunks(tmp_path):
+    path = str(tmp_path / 'moves.jzml')
+    tables = get_move_tables(5)
+    log = MoveLog(tables)
+    log.extend(random_moves(5, 1000, 1))
+    log.save(path)
+    size, chunks = read_move_file(path, chunk_size=300)
+    chunks = list(chunks)
+    assert size == 5 and [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    assert list(MoveLog.load(path, tables)) == list(log)
+    with pytest.raises(ValueError):
+        MoveLog.load(path, get_move_tables(3))
+
+
+def test_replay_matches_the_recorded_cube(tmp_path):
+    path = str(tmp_path / 'moves.jzml')
+    cube = RubiksCube(3)
+    cube.apply_moves(random_moves(3, 50, 2))
+    cube.save_history(path)
+    replayed = RubiksCube(3)
+    assert replayed.replay_moves(path) == f"Replayed 50 moves from {path}"
+    assert (replayed.facelets == cube.facelets).all()
+    assert list(replayed.move_history) == list(cube.move_history)
+
+
+@pytest.mark.parametrize('damage', ['truncated', 'bad code', 'not a move file', 'missing'])
+def test_bad_files_leave_the_cube_unchanged(tmp_path, damage):
+    path = str(tmp_path / 'moves.jzml')
+    cube = RubiksCube(3)
+    cube.apply_moves(random_moves(3, 40, 3))
+    cube.save_history(path)
+    data = open(path, 'rb').read()
+    if damage == 'truncated':
+        data = data[:-10]
+    elif damage == 'bad code':
+        data = data[:HEADER.size + 40] + np.array([200], dtype='<u2').tobytes() + data[HEADER.size + 42:]
+    elif damage == 'not a move file':
+        data = b'not moves'
+    if damage == 'missing':
+        path += '.gone'
+    else:
+        open(path, 'wb').write(data)
+
+    target = RubiksCube(3)
+    target.apply_moves(random_moves(3, 5, 4))
+    start, history = target.facelets.copy(), list(target.move_history)
+    message = target.replay_moves(path)
+    assert message.startswith("Cannot replay")
+    assert (target.facelets == start).all() and list(target.move_history) == history
@@ -0,0 +1,62 @@
+"""Tests for the typed channel between the render and panel processes."""
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from panelChannel import Channel, ChannelClosed, Command, StatusUpdate
+
+
+def channel_pair():
+    woken = threading.Event()
+    left, right = multiprocessing.Pipe()
+    return Channel(left), Channel(right, woken.set), woken
+
+
+def wait_for(channel, count, timeout=5.0):
+    messages = []
+    deadline = time.monotonic() + timeout
+    while len(messages) < count and time.monotonic() < deadline:
+        messages += channel.receive()
+        time.sleep(0.01)
+    return messages
+
+
+def test_commands_arrive_in_order_and_wake_the_receiver():
+    panel, render, woken = channel_pair()
+    panel.send('scramble')
+    panel.send('new_cube', 4)
+    panel.send('solve')
+    assert wait_for(render, 3) == [Command('scramble'), Command('new_cube', 4), Command('solve')]
+    assert woken.is_set()
+
+
+def test_status_fields_are_coalesced():
+    panel, render, _ = channel_pair()
+    # Holding the lock keeps the sender waiting until every field is set
+    with render.lock:
+        for step in range(10):
+            render.publish('message', f"step {step}")
+        render.publish('size', 5)
+    assert wait_for(panel, 1) == [StatusUpdate({'message': "step 9", 'size': 5})]
+    assert wait_for(panel, 1, timeout=0.2) == []
+
+
+def test_unknown_names_are_rejected():
+    panel, render, _ = channel_pair()
+    with pytest.raises(ValueError):
+        panel.send('explode')
+    with pytest.raises(ValueError):
+        render.publish('colour', 'red')
+
+
+def test_closing_one_end_is_reported_to_the_other():
+    panel, render, _ = channel_pair()
+    panel.send('reset_cube')
+    panel.close()
+    assert wait_for(render, 2) == [Command('reset_cube'), ChannelClosed()]
+
+    panel, render, _ = channel_pair()
+    render.connection.close()
+    assert wait_for(panel, 1) == [ChannelClosed()]
@@ -0,0 +1,70 @@
+"""Tests for seeded random-move and random-state scrambles."""
+import numpy as np
+import pytest
+
+from cubeSolver import get_two_phase_solver, read_cubie
+from jazzCube import PERM_TABLE_LIMIT, RubiksCube, facelets_solved, get_move_tables, simplify_moves
+from scrambleGenerator import ScrambleGenerator, cubie_facelets
+
+
+def test_seeded_scrambles_repeat():
+    assert ScrambleGenerator(3, 7).moves() == ScrambleGenerator(3, 7).moves()
+    assert ScrambleGenerator(3, 7).moves() != ScrambleGenerator(3, 8).moves()
+    first, second = RubiksCube(4), RubiksCube(4)
+    first.scramble(seed=3)
+    second.scramble(seed=3)
+    assert list(first.move_queue) == list(second.move_queue)
+
+
+@pytest.mark.parametrize('size', [2, 3, 4, 5])
+def test_scrambles_never_shorten_themselves(size):
+    generator = ScrambleGenerator(size, 1)
+    codes = generator.move_codes(50, 40)
+    assert codes.shape == (50, 40)
+    decode = generator.tables.decode_move
+    for row in codes:
+        moves = [decode(code) for code in row.tolist()]
+        assert len(simplify_moves(moves, size)) == 40
+        if size <= 3:
+            assert all(layer == 0 for _, layer, _ in moves)
+
+
+@pytest.mark.parametrize('size', [2, 3, 4, PERM_TABLE_LIMIT + 1])
+def test_bulk_states_match_replayed_cubes(size):
+    generator = ScrambleGenerator(size, 2)
+    codes, states = generator.bulk(20, 15)
+    others = np.random.default_rng(3).integers(0, get_move_tables(size).num_moves, (20, 15))
+    for rows, facelets in ((codes, states), (others, generator.states(others))):
+        assert facelets.shape == (20, 6, size, size) and facelets.dtype == np.uint8
+        for row in (0, 7, 19):
+            cube = RubiksCube(size)
+            cube.apply_move_codes(rows[row])
+            assert (cube.facelets == facelets[row]).all()
+
+
+@pytest.mark.parametrize('size', [2, 3])
+def test_random_states_are_reachable(size):
+    generator = ScrambleGenerator(size, 4)
+    states = generator.random_states(50)
+    assert states.shape == (50, 6, size, size)
+    assert not facelets_solved(states).any()
+    for facelets in states:
+        read_cubie(facelets)
+    solved = (np.arange(8)[None], np.zeros((1, 8), dtype=int), np.arange(12)[None], np.zeros((1, 12), dtype=int))
+    assert facelets_solved(cubie_facelets(solved, size)).all()
+
+
+def test_random_state_moves_reach_the_sampled_state():
+    get_two_phase_solver()
+    cubie = tuple(array[0].tolist() for array in ScrambleGenerator(3, 5).random_cubies(1))
+    moves = ScrambleGenerator(3, 5).random_state()
+    # Quarter turns of a solution of at most 25 face turns
+    assert len(moves) <= 2 * 25
+    cube = RubiksCube(3)
+    cube.apply_moves(moves)
+    assert read_cubie(cube.facelets) == cubie
+
+
+def test_random_states_need_a_small_cube():
+    with pytest.raises(ValueError):
+        ScrambleGenerator(4).random_states(1)
@@ -0,0 +1,65 @@
+"""Tests for Zobrist state hashes and the transposition cache."""
+import random
+
+import numpy as np
+import pytest
+
+from jazzCube import MOVE_AXES, RubiksCube
+from stateHash import TranspositionCache, solved_colorings
+
+
+def turn(cube, moves):
+    for move in moves:
+        assert cube.apply_rotation(*move)
+        cube.complete_rotation()
+        cube.is_animating = False
+
+
+def random_moves(size, count, seed):
+    rng = random.Random(seed)
+    return [(rng.choice(list(MOVE_AXES)), rng.randrange(size), rng.random() < 0.5) for _ in range(count)]
+
+
+def test_solved_colorings_are_the_24_orientations():
+    colorings = solved_colorings()
+    assert len({tuple(coloring) for coloring in colorings}) == 24
+    assert colorings[0] == list(range(6))
+    # Opposite faces stay opposite
+    for coloring in colorings:
+        assert {frozenset(coloring[face:face + 2]) for face in (0, 2, 4)} == {
+            frozenset(pair) for pair in ((0, 1), (2, 3), (4, 5))}
+
+
+@pytest.mark.parametrize('size', [2, 3, 4])
+def test_incremental_hash_matches_a_full_hash(size):
+    cube = RubiksCube(size)
+    turn(cube, random_moves(size, 30, 0))
+    assert cube.state_hash == cube.zobrist.full(cube.facelets)
+    cube.apply_moves(random_moves(size, 30, 1))
+    assert cube.state_hash == cube.zobrist.full(cube.facelets)
+    assert not cube.is_solved()
+
+
+@pytest.mark.parametrize('size', [2, 3, 4])
+def test_any_orientation_of_a_solved_cube_is_solved(size):
+    cube = RubiksCube(size)
+    assert cube.is_solved()
+    # Turning every slice of one axis rotates the whole cube
+    turn(cube, [('R', layer, True) for layer in range(size)])
+    assert cube.is_solved()
+    assert not (cube.facelets == np.arange(6)[:, None, None]).all()
+    turn(cube, [('U', 0, True)])
+    assert not cube.is_solved()
+
+
+def test_cache_drops_the_least_recently_used_entry():
+    cache = TranspositionCache(max_entries=2)
+    cache.put(1, 'one')
+    cache.put(2, 'two')
+    assert cache.get(1) == 'one'
+    cache.put(3, 'three')
+    assert 2 not in cache and 1 in cache and 3 in cache
+    assert cache.get(2, 'missing') == 'missing'
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.hits == cache.misses == 0
@@ -0,0 +1,65 @@
+"""Tests for the on-disk solver table cache."""
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from tableCache import TableCache
+
+
+def counting_build(calls, release=None):
+    def build(progress):
+        calls.append(1)
+        if release is not None:
+            release.wait(5)
+        progress(0.5, "half way")
+        return {'squares': np.arange(10) ** 2, 'flags': np.array([True, False])}
+    return build
+
+
+def test_tables_are_built_once_then_memory_mapped(tmp_path):
+    cache = TableCache(str(tmp_path))
+    calls = []
+    assert cache.load('demo', 3, 1) is None
+    arrays = cache.get('demo', 3, 1, counting_build(calls))
+    assert (arrays['squares'] == np.arange(10) ** 2).all()
+    assert isinstance(arrays['squares'], np.memmap) and not arrays['squares'].flags.writeable
+
+    again = TableCache(str(tmp_path)).get('demo', 3, 1, counting_build(calls))
+    assert (again['flags'] == [True, False]).all()
+    assert len(calls) == 1
+
+
+def test_saving_a_version_replaces_older_ones(tmp_path):
+    cache = TableCache(str(tmp_path))
+    cache.save('demo', 2, 1, {'a': np.zeros(3)})
+    cache.save('demo', 2, 2, {'a': np.ones(3)})
+    assert not cache.exists('demo', 2, 1) and cache.exists('demo', 2, 2)
+    assert os.listdir(os.path.dirname(cache.path('demo', 2, 2))) == ['v2']
+
+
+def test_concurrent_requests_share_one_build(tmp_path):
+    cache = TableCache(str(tmp_path))
+    calls, release = [], threading.Event()
+    reports = []
+    first = cache.generate('demo', 3, 1, counting_build(calls, release))
+    second = cache.generate('demo', 3, 1, counting_build(calls), lambda *report: reports.append(report))
+    assert first is second and not first.done()
+    release.set()
+    second.wait()
+    assert len(calls) == 1
+    assert reports == [(0.5, "half way"), (1.0, "Done")]
+
+
+def test_failed_builds_raise_and_can_be_retried(tmp_path):
+    cache = TableCache(str(tmp_path))
+
+    def broken(progress):
+        raise RuntimeError("out of memory")
+
+    with pytest.raises(RuntimeError):
+        cache.get('demo', 3, 1, broken)
+    assert not cache.exists('demo', 3, 1)
+    arrays = cache.get('demo', 3, 1, counting_build([]))
+    assert len(arrays['squares']) == 10